@@ -0,0 +1,65 @@
+"""Benchmark many game processes saving scores at the same moment.
+
+Every process waits on a barrier, then saves a single score to one shared
+score file, like a crowd of containers finishing their games together.
+
+    python -m benchmarks.score_writers --processes 64 --backend csv
+"""
+import argparse
+import os
+import tempfile
+import time
+from multiprocessing import Barrier, Process, Queue
+
+import numpy as np
+
+from dopewars.scores import CSVBackend, SQLiteBackend, Scores
+
+
+def backend(kind: str, file: str):
+    """Return score backend `kind` storing to `file`, keeping every score."""
+    if kind == "csv":
+        return CSVBackend(file, keep=None)
+    return SQLiteBackend(file)
+
+
+def finish_game(kind: str, file: str, score: int, barrier, results) -> None:
+    """Save `score` once all processes are ready, report time taken."""
+    scores = Scores(file, backend(kind, file))
+    barrier.wait()
+    started = time.perf_counter()
+    scores.add((score, f"bot{score}", 30))
+    scores.save()
+    results.put(time.perf_counter() - started)
+
+
+def run(processes: int, kind: str) -> None:
+    """Run benchmark with `processes` writers, print latencies and lost scores."""
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "scores.csv" if kind == "csv" else "scores.db")
+        barrier = Barrier(processes)
+        results = Queue()
+        workers = [
+            Process(target=finish_game, args=(kind, file, n, barrier, results))
+            for n in range(processes)
+        ]
+        for worker in workers:
+            worker.start()
+        latencies = np.array([results.get() for _ in workers]) * 1000
+        for worker in workers:
+            worker.join()
+        saved = {score for score, _, _ in backend(kind, file).top(processes)}
+    lost = processes - len(saved)
+    p50, p99 = np.quantile(latencies, (0.5, 0.99))
+    print(
+        f"{kind}: {processes} writers, save p50 {p50:.2f}ms p99 {p99:.2f}ms "
+        f"max {latencies.max():.2f}ms, lost {lost} scores"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-p", "--processes", type=int, default=64)
+    parser.add_argument("-b", "--backend", choices=("csv", "sqlite"), default="csv")
+    args = parser.parse_args()
+    run(args.processes, args.backend)
@@ -0,0 +1,171 @@
+"""Benchmark many concurrent sessions on one game server process.
+
+Starts `start.py serve` in a subprocess, connects every client, waits until
+all of them are in a game to sample the server's memory, then lets every
+client play its game to the end.
+
+    python -m benchmarks.server_sessions --sessions 1000 --turns 30
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from dopewars.server import PAGE_SIZE
+
+QUIET = 0.05  # Seconds of silence ending a screen without a `: ` prompt
+
+
+def server_rss(pid: int) -> int:
+    """Return resident memory of process `pid` in bytes."""
+    with open(f"/proc/{pid}/statm") as statm:
+        return int(statm.read().split()[1]) * PAGE_SIZE
+
+
+def answer(screen: str, prompt: str, started: bool) -> str:
+    """Return answer moving every turn, starting one game then quitting."""
+    if prompt == "What would you like to do: ":
+        return "3" if started else "1"
+    if prompt == "Name: ":
+        return "Bot"
+    if prompt == "What do you want to do: ":
+        return "4" if "4) Move" in screen else "3"
+    if prompt == "Destination: ":
+        return "1"
+    return ""  # Acknowledge events and score screens
+
+
+class Client:
+    """Play one scripted game over a connection, timing every answer."""
+
+    def __init__(self, port: int, turns: int, in_game: "Barrier") -> None:
+        self.port = port
+        self.turns = turns
+        self.in_game = in_game
+        self.latencies: List[float] = []
+        self.received: float = None
+
+    async def _screen(self, reader: asyncio.StreamReader) -> str:
+        """Read until a prompt ending in `: `, or until the server goes quiet.
+
+        Records the time the first byte arrived in `self.received`.
+        """
+        data = await reader.read(65536)
+        self.received = time.perf_counter()
+        while data and not data.endswith(b": "):
+            try:
+                more = await asyncio.wait_for(reader.read(65536), QUIET)
+            except asyncio.TimeoutError:
+                break
+            if not more:
+                break
+            data += more
+        return data.decode()
+
+    async def play(self) -> None:
+        """Connect and play until the server says goodbye."""
+        reader, writer = await asyncio.open_connection("127.0.0.1", self.port)
+        started = False
+        screen = await self._screen(reader)
+        while screen and "Goodbye!" not in screen:
+            prompt = screen.rsplit("\n", 1)[-1]
+            if prompt == "How many turns: ":
+                reply = str(self.turns)
+            else:
+                reply = answer(screen, prompt, started)
+            if prompt == "Name: ":
+                started = True
+            elif prompt == "What do you want to do: " and not self.in_game.done:
+                await self.in_game.wait()
+            writer.write(f"{reply}\n".encode())
+            sent = time.perf_counter()
+            screen = await self._screen(reader)
+            self.latencies.append(self.received - sent)
+        writer.close()
+
+
+class Barrier:
+    """Let waiters through once `parties` of them arrived."""
+
+    def __init__(self, parties: int) -> None:
+        self._parties = parties
+        self._event = asyncio.Event()
+
+    @property
+    def waiting(self) -> int:
+        """Return number of parties still to arrive."""
+        return self._parties
+
+    @property
+    def done(self) -> bool:
+        """Return whether the barrier opened."""
+        return self._event.is_set()
+
+    async def wait(self) -> None:
+        """Wait for the other parties."""
+        self._parties -= 1
+        if self._parties == 0:
+            self._event.set()
+        await self._event.wait()
+
+
+async def drive(port: int, pid: int, sessions: int, turns: int) -> None:
+    """Run `sessions` clients against the server on `port`, print results."""
+    baseline = server_rss(pid)
+    in_game = Barrier(sessions + 1)
+    clients = [Client(port, turns, in_game) for _ in range(sessions)]
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(client.play()) for client in clients]
+    while in_game.waiting > 1:
+        await asyncio.sleep(0.01)
+    memory = server_rss(pid) - baseline
+    await in_game.wait()
+    await asyncio.gather(*tasks)
+    seconds = time.perf_counter() - started
+    latencies = np.array([t for client in clients for t in client.latencies])
+    p50, p99 = np.quantile(latencies, (0.5, 0.99)) * 1000
+    print(
+        f"{sessions} sessions of {turns} turns in {seconds:.2f}s, "
+        f"{memory / sessions / 1024:.1f} KiB per session in game, "
+        f"round trip p50 {p50:.2f}ms p99 {p99:.2f}ms over {len(latencies)} lines"
+    )
+
+
+def run(sessions: int, turns: int) -> None:
+    """Start a server, run the benchmark against it, print server stats."""
+    with tempfile.TemporaryDirectory() as directory:
+        command = [
+            sys.executable,
+            "start.py",
+            "serve",
+            "--port=0",
+            "--host=127.0.0.1",
+            f"--scores={os.path.join(directory, 'scores.db')}",
+            "--report=0",
+        ]
+        server = subprocess.Popen(
+            command, stdout=subprocess.PIPE, universal_newlines=True
+        )
+        try:
+            port = int(server.stdout.readline().rsplit(":", 1)[1])
+            loop = asyncio.new_event_loop()
+            loop.run_until_complete(drive(port, server.pid, sessions, turns))
+            loop.close()
+        finally:
+            server.send_signal(signal.SIGINT)
+            print(server.communicate()[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--sessions", type=int, default=1000)
+    parser.add_argument("-t", "--turns", type=int, default=30)
+    args = parser.parse_args()
+    run(args.sessions, args.turns)
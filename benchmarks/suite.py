@@ -0,0 +1,273 @@
+"""Benchmark the game's hot paths and compare them against a baseline.
+
+Every benchmark is timed with timeit, keeping the best of several repeats,
+and reported in seconds per call.  Results are written as JSON and compared
+with a committed baseline; anything slower than the baseline by more than
+the threshold is flagged, and the exit status is 1.
+
+    python -m benchmarks.suite                     # Run all, compare
+    python -m benchmarks.suite -k scores           # Run matching benchmarks
+    python -m benchmarks.suite --update-baseline   # Accept current timings
+"""
+import argparse
+import atexit
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import timeit
+from functools import partial
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from dopewars.batch import BatchAction, BatchEnv
+from dopewars.drugs import CATALOG, Drug
+from dopewars.engine import Game
+from dopewars.player import Player
+from dopewars.rng import GameRNG
+from dopewars.scores import _LEADERBOARDS, Scores, SQLiteBackend
+from dopewars.simulate import play_game
+from dopewars.strategies import bargain_hunter, wander
+from dopewars.utilities import fmt_money
+
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+THRESHOLD = 0.25  # Allowed slowdown before flagging a regression
+REPEAT = 5
+
+Setup = Callable[[], Callable[[], None]]
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark.
+
+    The decorated function prepares whatever is needed and returns the
+    callable to time, so that setup isn't timed.
+    """
+
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+
+    return register
+
+
+@benchmark("day_construction")
+def day_construction() -> Callable[[], None]:
+    """Time building a Day, rolling its event and materializing its market."""
+    game = Game("Bob", days=1_000_000, rng=GameRNG(1))
+
+    def run() -> None:
+        game.current_day_num += 1
+        game.make_day().drugs()
+
+    return run
+
+
+@benchmark("buy_sell_round_trip")
+def buy_sell_round_trip() -> Callable[[], None]:
+    """Time buying then selling one unit of a drug."""
+    player = Player("Bob", 10_000, GameRNG(1))
+    weed = Drug.from_spec(CATALOG[0])
+    weed.quantity = 10 ** 12
+
+    def run() -> None:
+        player.buy_drugs(weed, 1)
+        player.sell(weed.id, 1, weed.price)
+
+    return run
+
+
+@benchmark("calc_interest")
+def calc_interest() -> Callable[[], None]:
+    """Time a day of interest in every city's bank, then reading the score.
+
+    Balances are reset every call, as compounding them millions of times
+    would make them huge.
+    """
+    game = Game("Bob", rng=GameRNG(1))
+    banks = [city.bank for city in game.cities.values() if city.bank]
+
+    def run() -> None:
+        for bank in banks:
+            bank.restore(1_000_000, True)
+        game.current_day_num += 1
+        game.score
+
+    return run
+
+
+@benchmark("interest_30_days")
+def interest_30_days() -> Callable[[], None]:
+    """Time 30 days of interest in every city's bank, then reading the score.
+
+    This is how banks are used in a game: balances sit for many days and
+    the score is read at the end.
+    """
+    game = Game("Bob", rng=GameRNG(1))
+    banks = [city.bank for city in game.cities.values() if city.bank]
+
+    def run() -> None:
+        for bank in banks:
+            bank.restore(1_000_000, True)
+        game.current_day_num += 30
+        game.score
+
+    return run
+
+
+def score_database(rows: int) -> str:
+    """Return path of a fresh score database holding `rows` scores."""
+    directory = tempfile.mkdtemp(prefix="dopewars-bench-")
+    atexit.register(shutil.rmtree, directory, True)
+    file = os.path.join(directory, "scores.db")
+    backend = SQLiteBackend(file)
+    backend.add([(n * 7919 % 1_000_003, f"bot{n}", 30) for n in range(rows)])
+    backend.close()
+    return file
+
+
+def scores_read(rows: int) -> Callable[[], None]:
+    """Time opening a file of `rows` stored scores, with nothing cached.
+
+    This is what a new game pays to show the top scores.
+    """
+    file = score_database(rows)
+
+    def run() -> None:
+        _LEADERBOARDS.clear()
+        Scores(file)._backend.close()
+
+    return run
+
+
+def scores_save(rows: int) -> Callable[[], None]:
+    """Time saving a score next to `rows` stored scores."""
+    s = Scores(score_database(rows))
+
+    def run() -> None:
+        s.add((500, "Bob", 30))
+        s.save()
+
+    return run
+
+
+for rows, label in ((10, "10"), (10_000, "10k"), (1_000_000, "1M")):
+    benchmark(f"scores_read_{label}")(partial(scores_read, rows))
+    benchmark(f"scores_save_{label}")(partial(scores_save, rows))
+
+
+@benchmark("fmt_money")
+def fmt_money_() -> Callable[[], None]:
+    """Time formatting a large amount."""
+    return lambda: fmt_money(1_234_567_890)
+
+
+@benchmark("game_30_days")
+def game_30_days() -> Callable[[], None]:
+    """Time a full headless 30 day game played by bargain_hunter."""
+    games = iter(range(10 ** 9))
+    return lambda: play_game(bargain_hunter, 1, next(games), days=30)
+
+
+@benchmark("game_10000_days")
+def game_10000_days() -> Callable[[], None]:
+    """Time a full headless 10,000 day game played by wander.
+
+    Traders tend to meet the good cop long before the last day, wandering
+    guarantees every day is played.
+    """
+    games = iter(range(10 ** 9))
+    return lambda: play_game(wander, 1, next(games), days=10_000)
+
+
+@benchmark("batch_step_1000")
+def batch_step_1000() -> Callable[[], None]:
+    """Time one turn of 1,000 games in a BatchEnv, trading and moving.
+
+    Compare with game_30_days / 30 for the cost of a turn of a single Game.
+    """
+    env = BatchEnv(1000, seed=1)
+    observation = [env.reset()]
+    cities = np.arange(1000) % len(env.city_names)
+
+    def run() -> None:
+        if env.over.all():
+            observation[0] = env.reset()
+        trade = np.where(observation[0].prices < 1000, 10, -observation[0].holdings)
+        observation[0] = env.step(BatchAction(trade, city=cities))[0]
+
+    return run
+
+
+def measure(setup: Setup, repeat: int = REPEAT) -> float:
+    """Return best time per call, in seconds, of the callable `setup` returns."""
+    timer = timeit.Timer(setup())
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], threshold: float
+) -> List[str]:
+    """Return report lines, marking regressions beyond `threshold`."""
+    lines = []
+    for name, seconds in results.items():
+        line = f"{name:<24}{seconds * 1e6:>14,.2f} us"
+        if name in baseline:
+            ratio = seconds / baseline[name]
+            line += f"  {ratio:>6.2f}x baseline"
+            if ratio > 1 + threshold:
+                line += "  REGRESSION"
+        lines.append(line)
+    return lines
+
+
+def main() -> int:
+    """Run benchmarks, write and compare results, return exit status."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-k", "--filter", default="", help="only names containing")
+    parser.add_argument("-o", "--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="store results as baseline"
+    )
+    args = parser.parse_args()
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.filter in name:
+            results[name] = measure(setup, args.repeat)
+            print(f"{name:<24}{results[name] * 1e6:>14,.2f} us", file=sys.stderr)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+    report = compare(results, baseline, args.threshold)
+    print("\n".join(report))
+
+    document = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2)
+    if args.update_baseline:
+        document["results"] = {**baseline, **results}
+        with open(args.baseline, "w") as file:
+            json.dump(document, file, indent=2)
+            file.write("\n")
+    regressed = any(line.endswith("REGRESSION") for line in report)
+    return 1 if regressed and not args.update_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
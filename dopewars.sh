@@ -1,5 +1,6 @@
 #!/usr/bin/env bash
 
 docker run -it \
-  -v /Users/Xander/python/DopeWars/scores.csv:/app/scores.csv \
-  jakks/dopewars
\ No newline at end of file
+  -v /Users/Xander/python/DopeWars/data:/app/data \
+  -v /Users/Xander/python/DopeWars/scores.csv:/app/scores.csv:ro \
+  jakks/dopewars
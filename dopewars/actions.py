@@ -0,0 +1,165 @@
+"""Contain action logs.
+
+An ActionLog records what a game needs to be replayed exactly: the seed and
+settings it started with, and every action applied to it.  As markets and
+random streams are pure functions of the seed and day, nothing else is
+needed.  It also records each turn's event and the final score, so that a
+replay can be checked against the original game.
+"""
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from enum import IntEnum
+from typing import Iterator, List, Tuple
+
+from dopewars.utilities import pack_int, unpack_int
+
+MAGIC = b"DWLG"
+VERSION = 3  # 2: events rolled with a single draw, 3: money of any size
+NO_EVENT = 255
+
+HEADER = struct.Struct("<4sBB")
+GAME = struct.Struct("<IIBII")  # Followed by money and score, see pack_int
+
+
+class Action(IntEnum):
+    """Codes of actions, with the meaning of their two arguments."""
+
+    BUY = 0  # drug ID, quantity
+    SELL = 1  # drug ID, quantity
+    DEPOSIT = 2  # 0, amount
+    WITHDRAW = 3  # 0, amount
+    WEAPON = 4  # weapon code, 0
+    MOVE = 5  # city index, 0
+    END_TURN = 6  # 0, 0
+
+
+TURN_ENDS = (Action.MOVE, Action.END_TURN)
+
+
+class ActionLog:
+    """Hold a game's starting settings and every action applied to it."""
+
+    __slots__ = ("name", "days", "money", "seed", "game", "score", "events", "_log")
+
+    def __init__(
+        self, name: str, days: int, money: int, seed: int, game: int = 0
+    ) -> None:
+        """
+        :param name: player name
+        :param days: number of turns
+        :param money: starting money
+        :param seed: master seed of the game's GameRNG
+        :param game: game index of the game's GameRNG
+        """
+        self.name = name
+        self.days = days
+        self.money = money
+        self.seed = seed
+        self.game = game
+        self.score: int = None  # Final score, once the game is over
+        self.events = bytearray()  # Event code of every turn, or NO_EVENT
+        self._log = array("q")  # Flat (action, argument, argument) triples
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.name} {self.seed}:{self.game}"
+
+    def __len__(self) -> int:
+        return len(self._log) // 3
+
+    def __iter__(self) -> Iterator[Tuple[Action, int, int]]:
+        log = self._log
+        for index in range(0, len(log), 3):
+            yield Action(log[index]), log[index + 1], log[index + 2]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ActionLog):
+            return self.dumps() == other.dumps()
+        return NotImplemented
+
+    def append(self, action: Action, first: int = 0, second: int = 0) -> None:
+        """Record an action.
+
+        :param action: action code
+        :param first: first argument, see Action
+        :param second: second argument, see Action
+        """
+        self._log.extend((action, first, second))
+
+    def turn_starts(self) -> List[int]:
+        """Return index of the first action of every turn, turn one first."""
+        starts = [0]
+        for index, (action, _, _) in enumerate(self):
+            if action in TURN_ENDS:
+                starts.append(index + 1)
+        return starts
+
+    def dumps(self) -> bytes:
+        """Return log packed into bytes."""
+        seed = self.seed.to_bytes((self.seed.bit_length() + 7) // 8, "little")
+        name = self.name.encode()
+        score = -1 if self.score is None else self.score
+        log = array("q", self._log)
+        if sys.byteorder == "big":
+            log.byteswap()
+        return b"".join(
+            (
+                HEADER.pack(MAGIC, VERSION, len(seed)),
+                seed,
+                GAME.pack(self.game, self.days, len(name), len(self.events), len(self)),
+                pack_int(self.money),
+                pack_int(score),
+                name,
+                bytes(self.events),
+                log.tobytes(),
+            )
+        )
+
+    @classmethod
+    def loads(cls, data: bytes) -> "ActionLog":
+        """Return log unpacked from `data`, see dumps.
+
+        :param data: packed log
+        """
+        magic, version, seed_length = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not an action log")
+        if version != VERSION:
+            raise ValueError(f"Unsupported action log version: {version}")
+        offset = HEADER.size
+        seed = int.from_bytes(data[offset : offset + seed_length], "little")
+        offset += seed_length
+        game, days, name_length, events, actions = GAME.unpack_from(data, offset)
+        money, offset = unpack_int(data, offset + GAME.size)
+        score, offset = unpack_int(data, offset)
+        name = data[offset : offset + name_length].decode()
+        offset += name_length
+        log = cls(name, days, money, seed, game)
+        log.score = None if score < 0 else score
+        log.events = bytearray(data[offset : offset + events])
+        offset += events
+        log._log.frombytes(data[offset : offset + actions * 3 * 8])
+        if sys.byteorder == "big":
+            log._log.byteswap()
+        return log
+
+    def save(self, file: str) -> None:
+        """Atomically write log to `file`."""
+        directory = os.path.dirname(os.path.abspath(file))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(prefix=".actions-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(self.dumps())
+            os.replace(temp, file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    @classmethod
+    def load(cls, file: str) -> "ActionLog":
+        """Return log saved in `file`."""
+        with open(file, "rb") as saved:
+            return cls.loads(saved.read())
@@ -1,14 +1,47 @@
 """Contain bank implementation."""
+from fractions import Fraction
+from functools import lru_cache
+from typing import Callable, Optional, Tuple
 
 from dopewars.utilities import fmt_money
 
+Listener = Callable[["Bank", int, int], None]  # Bank, old and new balance
+
+
+@lru_cache(maxsize=None)
+def _ratio(rate: float) -> Tuple[int, int]:
+    """Return numerator and denominator of decimal `rate`, e.g. 1 and 100."""
+    fraction = Fraction(str(rate))
+    return fraction.numerator, fraction.denominator
+
 
 class Bank:
     """Hold player's money, calculate interest on deposits.
 
     Banks can have minimum deposits, with which come higher interest rates.
+
+    Interest is compounded daily, each day's truncated to whole dollars, in
+    integer arithmetic.  A bank given a clock accrues lazily: it remembers
+    the day its balance was last brought up to date, and compounds the days
+    since only when the balance is read or changed, so untouched and empty
+    accounts cost nothing as days go by.  A bank given a listener reports
+    every change of its balance to it, so that totals across banks can be
+    kept without reading every bank.
     """
 
+    __slots__ = (
+        "name",
+        "_interest_rate",
+        "_balance",
+        "_min_deposit",
+        "_initial_deposit",
+        "_numerator",
+        "_denominator",
+        "_accrued",
+        "_clock",
+        "_listener",
+    )
+
     def __init__(
         self, name: str, interest_rate: float, min_deposit: int = None
     ) -> None:
@@ -17,6 +50,10 @@ class Bank:
         self._balance: int = 0
         self._min_deposit = min_deposit
         self._initial_deposit = True
+        self._numerator, self._denominator = _ratio(interest_rate)
+        self._accrued = 0  # Clock reading the balance is up to date with
+        self._clock: Callable[[], int] = None
+        self._listener: Optional[Listener] = None
 
     def __str__(self):
         return f"{self.__class__.__name__}"
@@ -32,7 +69,8 @@ class Bank:
                     return f"Amount must be greater than {fmt_money(self._min_deposit)}"
                 else:
                     self._initial_deposit = False
-        self._balance += amount
+        self.accrue()
+        self._set_balance(self._balance + amount)
         return f"Balance: {fmt_money(self.balance)}"
 
     def withdraw(self, amount: int) -> int:
@@ -41,19 +79,87 @@ class Bank:
         :param amount: int
         :return: int returns amount withdrawn
         """
+        self.accrue()
         if amount > self._balance:
             return 0
-        self._balance -= amount
+        self._set_balance(self._balance - amount)
         return amount
 
     @property
     def balance(self) -> int:
         """Return balance."""
+        self.accrue()
         return self._balance
 
-    def calc_interest(self) -> None:
-        """Calculate compounded interest."""
-        self._balance += int(self._balance * self._interest_rate)
+    @property
+    def interest_rate(self) -> float:
+        """Return daily interest rate."""
+        return self._interest_rate
+
+    @property
+    def min_deposit(self) -> int:
+        """Return minimum first deposit, 0 if there is none."""
+        return self._min_deposit or 0
+
+    @property
+    def opened(self) -> bool:
+        """Return whether the minimum first deposit was made."""
+        return not self._initial_deposit
+
+    def restore(self, balance: int, opened: bool) -> None:
+        """Restore balance and account status of a saved game.
+
+        :param balance: balance as of the clock's current reading
+        :param opened: whether the minimum first deposit was made
+        """
+        self._initial_deposit = not opened
+        self._accrued = self._clock() if self._clock else 0
+        self._set_balance(balance)
+
+    def set_clock(self, clock: Callable[[], int]) -> None:
+        """Accrue a day of interest lazily every time `clock` ticks.
+
+        :param clock: returns the number of days of interest owed so far
+        """
+        self.accrue()
+        self._clock = clock
+        self._accrued = clock()
+
+    def set_listener(self, listener: Optional[Listener]) -> None:
+        """Call `listener` with this bank, old and new balance on every change.
+
+        :param listener: callback, None to stop reporting changes
+        """
+        self._listener = listener
+
+    def _set_balance(self, balance: int) -> None:
+        """Set balance, reporting the change to the listener."""
+        old, self._balance = self._balance, balance
+        if self._listener is not None and balance != old:
+            self._listener(self, old, balance)
+
+    def accrue(self) -> None:
+        """Compound interest for every day the clock ticked since last time."""
+        if self._clock is not None:
+            now = self._clock()
+            if now != self._accrued:
+                days, self._accrued = now - self._accrued, now
+                self.calc_interest(days)
+
+    def calc_interest(self, days: int = 1) -> None:
+        """Compound `days` days of interest.
+
+        Each day adds int(balance * rate), as exact integer arithmetic so
+        that balances of any size neither lose precision nor overflow.
+        """
+        balance = self._balance
+        numerator, denominator = self._numerator, self._denominator
+        for _ in range(days):
+            interest = balance * numerator // denominator
+            if not interest:
+                break  # Nothing will ever change
+            balance += interest
+        self._set_balance(balance)
 
 
 class TexasMidland(Bank):
@@ -62,6 +168,8 @@ class TexasMidland(Bank):
     1% interest
     """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name="Texas Midland Bank", interest_rate=0.01)
 
@@ -72,6 +180,8 @@ class BoAConstrictor(Bank):
     4% Interest
     """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name="BoA Constrictor", interest_rate=0.04, min_deposit=50000)
 
@@ -82,6 +192,8 @@ class LehmanSis(Bank):
     6% Interest
     """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name="Lehman Sisters", interest_rate=0.06, min_deposit=250_000)
 
@@ -93,6 +205,8 @@ class GoldmanSacks(Bank):
     10% Interest
     """
 
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(
             name="Goldman Sacks", interest_rate=0.08, min_deposit=1_000_000
@@ -0,0 +1,281 @@
+"""Contain a vectorized environment stepping many games in lockstep.
+
+BatchEnv holds N independent games as NumPy arrays, one row per game, and
+applies trades, banking, weapons, moves, interest, events and markets to
+the whole batch with array operations, rather than through N Game, Day and
+Player objects.  Its interface follows gym: reset returns an Observation,
+step takes a BatchAction and returns the next Observation, rewards, done
+flags and an info dict.
+
+Rules are those of dopewars.engine, with two differences:
+
+* Markets are exactly those of the matching Game, see BatchEnv.reset, but
+  events and thefts are drawn from the batch's own stream, following the
+  same tables.
+* Invalid actions are clipped to what the rules allow instead of raising:
+  sales to what is held, purchases to supply and money, withdrawals to the
+  balance, deposits to cash; unknown or unaffordable weapons and first
+  deposits below a bank's minimum are skipped.
+
+    env = BatchEnv(4096, seed=1)
+    observation, done = env.reset(), False
+    while not done.all():
+        observation, reward, done, info = env.step(policy(observation))
+"""
+from fractions import Fraction
+from typing import Dict, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from dopewars.actions import NO_EVENT
+from dopewars.drugs import CATALOG, DrugSpec
+from dopewars.engine import STARTING_MONEY, generate_cities
+from dopewars.events import EVENT_DRAW, EVENT_TABLE, Event
+from dopewars.market import CounterMarket
+from dopewars.rng import MARKET, stream_key
+from dopewars.weapons import WEAPONS
+
+INT64_MAX = np.iinfo(np.int64).max
+
+
+class Observation(NamedTuple):
+    """Hold the state of every game, one row per game."""
+
+    day: np.ndarray  # Day number
+    city: np.ndarray  # City index, in generate_cities order
+    money: np.ndarray
+    holdings: np.ndarray  # Units held of every drug, shaped (games, drugs)
+    prices: np.ndarray  # Today's prices, shaped (games, drugs)
+    quantities: np.ndarray  # Today's supply left, shaped (games, drugs)
+    balances: np.ndarray  # Bank balances, shaped (games, cities), 0 for none
+    weapon: np.ndarray  # Weapon code, see WEAPONS
+
+
+class BatchAction(NamedTuple):
+    """Hold one turn of every game, one row per game.
+
+    Applied in the order a player would: sales, withdrawals, weapon,
+    purchases in drug ID order, deposits, then the move ending the turn.
+    """
+
+    trade: np.ndarray  # Units of every drug to buy, negative to sell
+    bank: np.ndarray = None  # Amount to deposit, negative to withdraw
+    weapon: np.ndarray = None  # Weapon code to buy, 0 for none
+    city: np.ndarray = None  # Destination, the current city to stay
+
+
+class BatchEnv:
+    """Play many independent games at once with array operations.
+
+    Rewards are changes in score, so a game's rewards add up to its final
+    score minus its score on day one.  Games that are over ignore actions.
+    """
+
+    def __init__(
+        self,
+        games: int,
+        seed: int = None,
+        days: int = 30,
+        money: int = STARTING_MONEY,
+        catalog: Sequence[DrugSpec] = CATALOG,
+    ) -> None:
+        """
+        :param games: number of games played side by side
+        :param seed: master seed, random if omitted
+        :param days: number of turns per game
+        :param money: starting money
+        :param catalog: drugs on offer, in ID order
+        """
+        if days < 1:
+            raise ValueError("Game must last at least one day")
+        self.games = games
+        self.seed: int = np.random.SeedSequence(seed).entropy
+        self.days = days
+        self.money = money
+        self.episode = -1
+        self.rng = np.random.Generator(np.random.PCG64(self.seed))
+        self.market = CounterMarket(0, catalog)
+        cities = list(generate_cities().values())
+        self.city_names = [city.name for city in cities]
+        self._start_city = self.city_names.index("Miami")
+        self._has_bank = np.array([city.bank is not None for city in cities])
+        # Exact interest rates as fractions, like Bank's
+        rates = [Fraction(str(c.bank.interest_rate if c.bank else 0)) for c in cities]
+        self._rate_num = np.array([rate.numerator for rate in rates], dtype=np.int64)
+        self._rate_den = np.array([rate.denominator for rate in rates], dtype=np.int64)
+        self._max_balance = INT64_MAX // np.maximum(self._rate_num, 1)
+        self._minimum = np.array([c.bank.min_deposit if c.bank else 0 for c in cities])
+        self._weapon_price = np.full((len(cities), len(WEAPONS)), -1)  # -1: none
+        for c, city in enumerate(cities):
+            for weapon in city.store.inventory if city.store else ():
+                self._weapon_price[c, WEAPONS.index(type(weapon))] = weapon.price
+        self._defeats = np.array(
+            [(False,) * len(Event)] + [weapon.defeats for weapon in WEAPONS[1:]]
+        )
+        self._outcomes = np.array(  # Event of every draw, -1 for none
+            [-1 if spec is None else spec.event for spec in EVENT_TABLE]
+        )
+
+        shape = (games, len(catalog))
+        self._rows = np.arange(games)
+        self._keys = np.zeros(games, dtype=np.uint64)
+        self.day = np.zeros(games, dtype=np.int64)
+        self.city = np.zeros(games, dtype=np.int64)
+        self.cash = np.zeros(games, dtype=np.int64)
+        self.holdings = np.zeros(shape, dtype=np.int64)
+        self.prices = np.zeros(shape, dtype=np.int64)
+        self.quantities = np.zeros(shape, dtype=np.int64)
+        self.balances = np.zeros((games, len(cities)), dtype=np.int64)
+        self.opened = np.zeros((games, len(cities)), dtype=bool)
+        self.weapon = np.zeros(games, dtype=np.int64)
+        self.event = np.full(games, NO_EVENT, dtype=np.int64)
+        self.over = np.ones(games, dtype=bool)
+        self.busted = np.zeros(games, dtype=bool)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.games} games"
+
+    @property
+    def scores(self) -> np.ndarray:
+        """Return money owned in every game, including bank balances."""
+        return self.cash + self.balances.sum(axis=1)
+
+    def observe(self) -> Observation:
+        """Return a copy of the state of every game."""
+        return Observation(
+            self.day.copy(),
+            self.city.copy(),
+            self.cash.copy(),
+            self.holdings.copy(),
+            self.prices.copy(),
+            self.quantities.copy(),
+            self.balances.copy(),
+            self.weapon.copy(),
+        )
+
+    def reset(self) -> Observation:
+        """Start new games, on day one in Miami.
+
+        Every reset starts the next episode: game n of episode e has the
+        markets of Game(..., rng=GameRNG(seed, e * games + n)).
+        """
+        self.episode += 1
+        first = self.episode * self.games
+        self._keys[:] = [
+            stream_key(self.seed, game, MARKET)
+            for game in range(first, first + self.games)
+        ]
+        self.day[:] = 0
+        self.city[:] = self._start_city
+        self.cash[:] = self.money
+        for array in self.holdings, self.balances, self.opened, self.weapon:
+            array[...] = 0
+        self.over[:] = False
+        self.busted[:] = False
+        self.event[:] = NO_EVENT
+        self._start_day(~self.over)
+        return self.observe()
+
+    def step(
+        self, action: BatchAction
+    ) -> Tuple[Observation, np.ndarray, np.ndarray, Dict[str, np.ndarray]]:
+        """Play one turn of every game that isn't over.
+
+        :param action: what to do in every game, see BatchAction
+        :return: observation, rewards, whether each game is over, and info
+            holding `busted` flags and today's `event` codes, NO_EVENT for
+            days without one
+        """
+        active = ~self.over
+        rows, here = self._rows, self.city
+        score = self.scores
+        trade = np.asarray(action.trade, dtype=np.int64) * active[:, None]
+        trade = np.broadcast_to(trade, self.holdings.shape)
+        bank = self._actions(action.bank, active)
+        weapon = self._actions(action.weapon, active)
+        city = np.where(active, self._actions(action.city, active, here), here)
+        if ((city < 0) | (city >= len(self.city_names))).any():
+            raise ValueError("Unknown city")
+
+        sold = np.minimum(np.maximum(-trade, 0), self.holdings)
+        self.holdings -= sold
+        self.cash += (sold * self.prices).sum(axis=1)
+
+        withdrawn = np.minimum(np.maximum(-bank, 0), self.balances[rows, here])
+        self.balances[rows, here] -= withdrawn
+        self.cash += withdrawn
+
+        known = (weapon > 0) & (weapon < len(WEAPONS))
+        price = self._weapon_price[here, np.where(known, weapon, 0)]
+        armed = known & (price >= 0) & (self.cash >= price)
+        self.cash -= np.where(armed, price, 0)
+        self.weapon[armed] = weapon[armed]
+
+        for drug in range(trade.shape[1]):
+            prices = self.prices[:, drug]
+            units = np.minimum(np.maximum(trade[:, drug], 0), self.quantities[:, drug])
+            units = np.minimum(units, self.cash // prices)
+            self.quantities[:, drug] -= units
+            self.holdings[:, drug] += units
+            self.cash -= units * prices
+
+        deposit = np.minimum(np.maximum(bank, 0), self.cash) * self._has_bank[here]
+        allowed = self.opened[rows, here] | (deposit >= self._minimum[here])
+        deposit = np.where(allowed, deposit, 0)
+        self.balances[rows, here] += deposit
+        self.opened[rows, here] |= deposit > 0
+        self.cash -= deposit
+
+        self.city[:] = city
+        self.over |= active & (self.day >= self.days)  # Moved off the last day
+        self.event[:] = NO_EVENT
+        self._start_day(active & ~self.over)
+        info = {"busted": self.busted.copy(), "event": self.event.copy()}
+        return self.observe(), self.scores - score, self.over.copy(), info
+
+    def _actions(self, actions, active: np.ndarray, default=0) -> np.ndarray:
+        """Return per-game `actions` as an int array, `default` if omitted."""
+        if actions is None:
+            return np.broadcast_to(default, active.shape)
+        return np.broadcast_to(np.asarray(actions, dtype=np.int64), active.shape)
+
+    def _start_day(self, starting: np.ndarray) -> None:
+        """Accrue interest and start the next day of `starting` games."""
+        interest = self.balances * self._rate_num // self._rate_den
+        if (self.balances > np.minimum(self._max_balance, INT64_MAX - interest)).any():
+            raise OverflowError("Bank balance too large for int64 interest")
+        self.balances += interest * starting[:, None]
+        self.day += starting
+        market = self.market.games(self._keys, self.day, self.city)
+        self.prices[starting] = market.price[starting]
+        self.quantities[starting] = market.quantity[starting]
+        self._roll_events(starting)
+
+    def _roll_events(self, rolling: np.ndarray) -> None:
+        """Roll today's event of `rolling` games, following EVENT_TABLE."""
+        rng, n = self.rng, self.games
+        event = self._outcomes[rng.integers(EVENT_DRAW, size=n)]
+        fires = rolling & (event >= 0)
+        self.event[fires] = event[fires]
+        defended = fires & self._defeats[self.weapon, event]
+        self.weapon[defended] = 0  # Spent defeating the event
+        hit = fires & ~defended
+        holding = self.holdings.any(axis=1)
+
+        # A robber takes 5-15% of cash
+        robbed = hit & (event == Event.ROBBER)
+        share = rng.integers(5, 16, size=n) / 100
+        self.cash -= np.where(robbed, (share * self.cash).astype(np.int64), 0)
+
+        # A corrupt cop takes a quarter of one drug held, at least one unit
+        seized = np.flatnonzero(hit & (event == Event.CORRUPT_COP) & holding)
+        held = self.holdings[seized] > 0
+        pick = (rng.random(len(seized)) * held.sum(axis=1)).astype(np.int64)
+        drug = (held.cumsum(axis=1) > pick[:, None]).argmax(axis=1)
+        taken = np.maximum(self.holdings[seized, drug] // 4, 1)
+        self.holdings[seized, drug] -= taken
+
+        # A good cop ends the game of anyone holding drugs
+        busted = hit & (event == Event.GOOD_COP) & holding
+        self.busted |= busted
+        self.over |= busted
@@ -11,6 +11,8 @@ class City:
     Holds name, as well as vendors.
     """
 
+    __slots__ = ("name", "bank", "store")
+
     def __init__(self, name: str, **kwargs) -> None:
         """
 
@@ -1,11 +1,17 @@
 """
 Contains implementation of a Day
 """
-from random import choice, randint
+import math
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
 from dopewars.cities import City
-from dopewars.drugs import Drug, DRUGS
+from dopewars.drugs import CATALOG, Drug, drug_id
+from dopewars.events import EVENT_DRAW, EVENT_NAMES, EVENT_TABLE, Event
+from dopewars.market import MARKET
 from dopewars.player import Player
+from dopewars.rng import GameRNG
+
+Market = Tuple[Sequence[int], Sequence[int], Sequence[int]]
 
 
 class Day:
@@ -14,54 +20,123 @@ class Day:
     Player can make trades and will encounter random events.
     """
 
-    def __init__(self, city: City, player: Player) -> None:
+    def __init__(
+        self,
+        city: City,
+        player: Player,
+        market: Union[Market, Callable[[], Market]] = None,
+        rng: GameRNG = None,
+        roll_event: bool = True,
+    ) -> None:
+        """
+        :param city: City the player is in
+        :param player: Player
+        :param market: surges, prices and quantities of every drug in
+            catalog order, as generated by MarketGenerator.generate, or a
+            callable returning them, called the first time drugs are
+            needed.  Generated for this day if omitted.
+        :param rng: game's random streams, defaults to the player's
+        :param roll_event: roll for an event, False for no event
+        """
         self.city = city
+        self._rng = rng or player.rng
         self.player: Player = player
         self.end_game: bool = False
-        self._drugs: dict[str:Drug] = {}
+        self._market = market
+        self._quotes: Market = None  # Resolved market, see _market_quotes
+        self._market_drugs: List[Optional[Drug]] = None  # Indexed by drug ID
+        self.event: Event = None
         self.event_text: str = None
         self.event_name: str = None
-        self._generate_drugs()
-        self._generate_event()
+        if roll_event:
+            self._generate_event()
 
     def __str__(self):
         return f"City {self.city.name}"
 
-    def _generate_drugs(self) -> None:
-        """Generate list of drugs available for purchase for this particular day."""
-        for drug in DRUGS:
-            d = drug()
-            self._drugs[d.name] = d
-
-    def buy(self, drug: str, quantity: int) -> None:
+    def _market_quotes(self) -> Market:
+        """Return today's surges, prices and quantities, resolving them once."""
+        if self._quotes is None:
+            market = self._market
+            if market is None:
+                block = MARKET.generate(self._rng.market)
+                market = [row[0, 0].tolist() for row in block]
+            elif callable(market):
+                market = market()
+            self._quotes = market
+            self._market_drugs = [None] * len(CATALOG)
+        return self._quotes
+
+    def _drug(self, drug_id: int) -> Drug:
+        """Return Drug `drug_id` on offer, creating it on first use.
+
+        Drugs are only created once traded or listed, prices are read from
+        the market directly.
+        """
+        surges, prices, quantities = self._market_quotes()
+        drug = self._market_drugs[drug_id]
+        if drug is None:
+            drug = self._market_drugs[drug_id] = Drug.from_market(
+                CATALOG[drug_id], surges[drug_id], prices[drug_id], quantities[drug_id]
+            )
+        return drug
+
+    @property
+    def _drugs(self) -> List[Drug]:
+        """Return drugs available for purchase, creating them on first use."""
+        for drug_id in range(len(CATALOG)):
+            self._drug(drug_id)
+        return self._market_drugs
+
+    def _quote(self, drug_id: int, field: int) -> int:
+        """Return price (1) or quantity (2) of drug `drug_id`, not creating it."""
+        column = (self._quotes or self._market_quotes())[field]
+        drug = self._market_drugs[drug_id]
+        if drug is None:
+            return column[drug_id]
+        return drug.price if field == 1 else drug.quantity
+
+    @property
+    def materialized(self) -> bool:
+        """Return whether today's market was looked at yet."""
+        return self._quotes is not None
+
+    def buy(self, drug: Union[int, str], quantity: int) -> None:
         """Create interface for player to buy a drug.
 
         Decrements the amount available upon purchase.
-        :param drug: str
+        :param drug: drug ID or name
         :param quantity: int
         """
-        if self._drugs.get(drug) is None:
-            return
-        self.player.buy_drugs(self._drugs[drug], quantity)
+        self.player.buy_drugs(self._drug(drug_id(drug)), quantity)
 
-    def sell(self, drug: str, quantity: int) -> None:
+    def sell(self, drug: Union[int, str], quantity: int) -> None:
         """Create interface for player to sell a drug.
 
-        :param drug: drug name
+        :param drug: drug ID or name
         :param quantity: quantity to sell
         """
-        price = self._drugs[drug].price
-        self.player.sell(drug, quantity, price)
+        drug = drug_id(drug)
+        self.player.sell(drug, quantity, self._quote(drug, 1))
 
-    def get_drugs(self):
-        """Return available drugs.
+    def get_drugs(self) -> Dict[str, Drug]:
+        """Return available drugs, keyed by name."""
+        return {drug.name: drug for drug in self._drugs}
 
-        Day._drugs has a signature of dict[str: Drug]
-        """
+    def drugs(self) -> List[Drug]:
+        """Return available drugs, indexed by drug ID."""
         return self._drugs
 
     def print_offerings(self) -> None:
         """Print current offerings amounts and prices."""
+        print("\n".join(self.offerings()))
+
+    def offerings(self, averages: Sequence[float] = None) -> List[str]:
+        """Return lines of table of current offerings amounts and prices.
+
+        :param averages: average price of every drug, see
+            PriceHistory.averages, adds a column comparing prices to them
+        """
 
         def spacer(str_len: int, amount: int) -> str:
             """Pad string length with spaces to create a uniformly spaced grid.
@@ -73,9 +148,10 @@ class Day:
             return ((amount - str_len) * " ") + "|"
 
         title_bar = "#)  | Item     | Price   | Avail | Max |"
-        print(title_bar)
-        print(len(title_bar) * "+")
-        for index, (_, drug) in enumerate(self._drugs.items()):
+        if averages is not None:
+            title_bar += " vs avg |"
+        lines = [title_bar, len(title_bar) * "+"]
+        for index, drug in enumerate(self._drugs):
             spaces = "  " if index + 1 <= 9 else " "
             max_amount = min((self.player.money // drug.price), drug.quantity)
             name = f"{index + 1}){spaces}| {drug.name}"
@@ -83,57 +159,62 @@ class Day:
             price = f"{drug.formatted_price}{spacer(len(str(drug.formatted_price)), 8)}"
             avail = f"{drug.quantity}{spacer(len(str(drug.quantity)), 6)}"
             max_amt = f"{max_amount} {spacer(len(str(max_amount)), 3)}"
-            print(f"{name} {price} {avail} {max_amt}")
-
-    def get_price(self, drug: str) -> int:
+            line = f"{name} {price} {avail} {max_amt}"
+            if averages is not None:
+                versus = ""
+                if not math.isnan(averages[index]):
+                    versus = f"{drug.price / averages[index] - 1:+.0%}"
+                line += f" {versus}{spacer(len(versus), 7)}"
+            lines.append(line)
+        return lines
+
+    def get_price(self, drug: Union[int, str]) -> int:
         """Return price of a specific drug.
 
-        :param drug: name of drug, str
+        :param drug: drug ID or name
         :return price of drug, int
         """
-        return self._drugs[drug].price
+        return self._quote(drug_id(drug), 1)
 
-    def _generate_event(self) -> None:
-        """Randomly generates events.
-
-        There are three types of events:
-            Robber
-             * Takes a little money / product from player
-            Corrupt Cop
-             * Takes percentage of product if player doesn't have a Gun
-            Untouchable Cop
-             * Takes all product, end game
-             * If you have no product, you're free to go
-        Can only have one type of event happen per turn, one is randomly chosen
+    def get_quantity(self, drug: Union[int, str]) -> int:
+        """Return quantity of a specific drug still on offer.
+
+        :param drug: drug ID or name
         """
+        return self._quote(drug_id(drug), 2)
 
-        def get_chance(number: int) -> bool:
-            """ Return if a randomly chosen number is 1
+    def prices(self) -> List[int]:
+        """Return price of every drug, indexed by drug ID."""
+        prices = self._market_quotes()[1]
+        drugs = self._market_drugs
+        return [p if drug is None else drug.price for p, drug in zip(prices, drugs)]
+
+    def _generate_event(self) -> None:
+        """Roll today's event, see roll_event."""
+        self.event, self.event_text, self.end_game = roll_event(self.player, self._rng)
+        if self.event is not None:
+            self.event_name = EVENT_NAMES[self.event]
 
-            :param number:
-            """
-            return randint(1, number) == 1
 
-        event, value = choice(
-            list({"robber": 3, "corrupt cop": 5, "good cop": 50}.items())
+def roll_event(player: Player, rng: GameRNG) -> Tuple[Optional[Event], str, bool]:
+    """Roll a day's event and apply it to `player`, see dopewars.events.
+
+    One draw picks at most one event: a weapon defeating it is used up
+    instead of the event taking effect.
+    :param player: Player
+    :param rng: game's random streams, started on the day's turn
+    :return: event or None, its text or None, and whether the game is over
+    """
+    spec = EVENT_TABLE[rng.events.randrange(EVENT_DRAW)]
+    if spec is None:
+        return None, None, False
+    weapon = player.weapon
+    if weapon is not None and weapon.mask >> spec.event & 1:
+        player.weapon = None
+        text = (
+            f"You were accosted by a {EVENT_NAMES[spec.event]}, but managed"
+            f" to defend yourself using your {weapon}"
         )
-        chance = get_chance(value)
-        if not chance:
-            return
-        self.event = event
-        if self.player.weapon:
-            if self.player.weapon.defeat(event):
-                self.event_text = (
-                    f"You were accosted by a {event}, but managed"
-                    f" to defend yourself using your {self.player.weapon}"
-                )
-                self.player.weapon = None
-                return
-        if event == "robber":
-            self.event_text = self.player.steal_money()
-        elif event == "corrupt cop":
-            self.event_text = f"A corrupt cop stopped you!\n{self.player.steal_drugs()}"
-        else:
-            if self.player.inv:
-                self.end_game = True
-                self.event_text = "The ultimate boy scout cop got you, game over!"
+        return spec.event, text, False
+    text, end_game = spec.effect(player)
+    return spec.event, text, end_game
@@ -1,15 +1,73 @@
 """Contain drug implementation."""
-from random import randint
+import random
+from array import array
+from enum import IntEnum
+from functools import lru_cache
+from typing import Dict, Iterator, Mapping, NamedTuple, Tuple, Union
 
 from dopewars.utilities import fmt_money
 
 
+class Surge(IntEnum):
+    """Price surge of a drug on a given day."""
+
+    NONE = 0
+    HI = 1  # 1.5-3x base price, less available
+    LO = 2  # 0.33-0.67x base price, more available
+
+
+class DrugSpec(NamedTuple):
+    """Describe a drug on offer."""
+
+    id: int
+    name: str
+    base_price: int
+    jitter: int
+
+
+CATALOG: Tuple[DrugSpec, ...] = tuple(
+    DrugSpec(drug_id, name, base_price, jitter)
+    for drug_id, (name, base_price, jitter) in enumerate(
+        (
+            ("Weed", 100, 15),
+            ("Luuds", 10, 3),
+            ("Coke", 300, 50),
+            ("Molly", 50, 8),
+            ("Shrooms", 25, 5),
+            ("Acid", 500, 100),
+            ("Meth", 10, 15),
+            ("Heroin", 1000, 500),
+            ("DeathStix", 50, 100),
+            ("Olysio", 50000, 20000),
+        )
+    )
+)
+NAMES: Tuple[str, ...] = tuple(spec.name for spec in CATALOG)
+IDS: Dict[str, int] = {spec.name: spec.id for spec in CATALOG}
+
+
+def drug_id(drug: Union[int, str]) -> int:
+    """Return catalog ID of `drug`.
+
+    :param drug: drug ID or name
+    :raise RuntimeError: if there is no such drug
+    """
+    if drug.__class__ is int:
+        if 0 <= drug < len(CATALOG):
+            return drug
+    elif drug in IDS:
+        return IDS[drug]
+    raise RuntimeError("Drug not found")
+
+
 class InventoryDrug:
     """Define how drug in inventory behaves.
 
     Holds quantity, contains method to manage selling it
     """
 
+    __slots__ = ("name", "quantity")
+
     def __init__(self, name: str, quantity: int) -> None:
         """
         :param name: Drug's name
@@ -54,28 +112,154 @@ class InventoryDrug:
         return self
 
 
+@lru_cache(maxsize=None)
+def _index(names: Tuple[str, ...]) -> Dict[str, int]:
+    """Return drug IDs keyed by name, shared by inventories of `names`."""
+    return {name: drug_id for drug_id, name in enumerate(names)}
+
+
+class Inventory:
+    """Hold amount of every drug, in a fixed-length array indexed by drug ID.
+
+    Reads like a mapping of drug name to quantity held, containing only
+    drugs with a non-zero quantity.  Buying and selling by ID is O(1) and
+    allocates nothing.
+    """
+
+    __slots__ = ("_names", "_ids", "_quantities", "_held", "_total")
+
+    def __init__(self, names: Tuple[str, ...] = NAMES) -> None:
+        """
+        :param names: drug names, in drug ID order, defaults to CATALOG's
+        """
+        self._names = names
+        self._ids = _index(names)
+        self._quantities = array("q", bytes(8 * len(names)))
+        self._held = 0  # Number of drugs with a non-zero quantity
+        self._total = 0  # Units held of all drugs
+
+    def __str__(self) -> str:
+        return ", ".join(f"{name}: {quantity}" for name, quantity in self.items())
+
+    def __len__(self) -> int:
+        return self._held
+
+    def __bool__(self) -> bool:
+        return self._held > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for name, _ in self.items():
+            yield name
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) > 0
+
+    def __getitem__(self, name: str) -> int:
+        return self._quantities[self._ids[name]]
+
+    def __setitem__(self, name: str, quantity: int) -> None:
+        drug_id = self._ids[name]
+        self.remove(drug_id, self._quantities[drug_id])
+        self.add(drug_id, quantity)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Mapping) or isinstance(other, Inventory):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def get(self, name: str, default: int = 0) -> int:
+        """Return quantity of drug `name` held, `default` if none."""
+        drug_id = self._ids.get(name)
+        if drug_id is None or not self._quantities[drug_id]:
+            return default
+        return self._quantities[drug_id]
+
+    def items(self) -> Iterator[Tuple[str, int]]:
+        """Yield name and quantity of every drug held, in ID order."""
+        for name, quantity in zip(self._names, self._quantities):
+            if quantity:
+                yield name, quantity
+
+    def id(self, name: str) -> int:
+        """Return ID of drug `name`."""
+        drug_id = self._ids.get(name)
+        if drug_id is None:
+            raise RuntimeError("Drug not found")
+        return drug_id
+
+    @property
+    def total(self) -> int:
+        """Return units held of all drugs together."""
+        return self._total
+
+    def quantity(self, drug_id: int) -> int:
+        """Return quantity held of drug `drug_id`."""
+        return self._quantities[drug_id]
+
+    def add(self, drug_id: int, quantity: int) -> None:
+        """Add `quantity` of drug `drug_id`."""
+        if quantity <= 0:
+            return
+        if not self._quantities[drug_id]:
+            self._held += 1
+        self._quantities[drug_id] += quantity
+        self._total += quantity
+
+    def remove(self, drug_id: int, quantity: int) -> None:
+        """Remove `quantity` of drug `drug_id`.
+
+        :raise RuntimeError: if there isn't enough of it
+        """
+        if quantity <= 0:
+            return
+        held = self._quantities[drug_id]
+        if held < quantity:
+            raise RuntimeError("Insufficient quantity")
+        self._quantities[drug_id] = held - quantity
+        self._total -= quantity
+        if held == quantity:
+            self._held -= 1
+
+
 class Drug:
     """Define how drug's price and quantities are generated.
 
     This class is used for buying only.
     """
 
-    def __init__(self, name: str, base_price: int, jitter: int) -> None:
+    __slots__ = (
+        "id",
+        "name",
+        "_base_price",
+        "_jitter",
+        "_rng",
+        "_surge",
+        "price",
+        "quantity",
+    )
+
+    def __init__(
+        self, name: str, base_price: int, jitter: int, rng: random.Random = None
+    ) -> None:
         """
         :param name: Drug's name
         :param base_price: base price of drug
         :param jitter: amount of units around base_price to jitter, defines
             volatility
-        surge: set when instantiated, can be `hi`, `lo` or None.
-            If set to hi, the base price is modified to be 1.5-3x as much
-            If set to lo, the base price is modified to be 1/3 - 2/3 as much
+        :param rng: random number source, defaults to the random module
+        id: catalog ID of the drug called `name`, None if not in CATALOG
+        surge: set when instantiated, a Surge.
+            If set to HI, the base price is modified to be 1.5-3x as much
+            If set to LO, the base price is modified to be 1/3 - 2/3 as much
         """
         if base_price <= 0 or jitter <= 0:
             raise ValueError("Price and jitter must be larger than 0")
+        self.id = IDS.get(name)
         self._base_price = base_price
         self.name = name
         self._jitter = jitter
-        self._surge = None
+        self._rng = rng or random
+        self._surge = Surge.NONE
         self.price = None
         self.quantity = None
         self._calc_surge()
@@ -85,6 +269,34 @@ class Drug:
     def __str__(self):
         return f"{self.name} price: {self.price}"
 
+    @classmethod
+    def from_spec(cls, spec: DrugSpec, rng: random.Random = None) -> "Drug":
+        """Create drug described by catalog entry `spec`, rolling its market.
+
+        :param spec: catalog entry
+        :param rng: random number source, defaults to the random module
+        """
+        return cls(spec.name, spec.base_price, spec.jitter, rng)
+
+    @classmethod
+    def from_market(
+        cls, spec: DrugSpec, surge: int, price: int, quantity: int
+    ) -> "Drug":
+        """Create drug from pre-generated market values, without rolling dice.
+
+        :param spec: catalog entry
+        :param surge: Surge code
+        :param price: generated price
+        :param quantity: generated quantity
+        """
+        drug = cls.__new__(cls)
+        drug.id, drug.name, drug._base_price, drug._jitter = spec
+        drug._rng = None
+        drug._surge = surge
+        drug.price = price
+        drug.quantity = quantity
+        return drug
+
     @property
     def formatted_price(self) -> str:
         """Return comma formatted drug price."""
@@ -93,26 +305,26 @@ class Drug:
     def _calc_surge(self) -> None:
         """Determine whether or not there will be a price surge.
 
-        set's Drug._surge equal to either `lo` or `hi` if there will be one.
+        set's Drug._surge equal to either Surge.LO or Surge.HI if there will be one.
         """
-        chance = randint(1, 100)
+        chance = self._rng.randint(1, 100)
         if 80 < chance <= 100:
-            self._surge = "hi"
+            self._surge = Surge.HI
         elif 60 < chance <= 80:
-            self._surge = "lo"
+            self._surge = Surge.LO
 
     def _calc_price(self) -> None:
         """Calculate drug price."""
-        if self._surge == "hi":
+        if self._surge == Surge.HI:
             # 1.5-3x as much
-            base = self._base_price * randint(15, 30) / 10
-        elif self._surge == "lo":
+            base = self._base_price * self._rng.randint(15, 30) / 10
+        elif self._surge == Surge.LO:
             # 0.33-0.67x as much
-            base = self._base_price * randint(33, 67) / 100
+            base = self._base_price * self._rng.randint(33, 67) / 100
         else:
             base = self._base_price
 
-        price = int(base) + randint(-self._jitter, self._jitter)
+        price = int(base) + self._rng.randint(-self._jitter, self._jitter)
         self.price = max(
             price, int(0.15 * self._base_price)
         )  # Set a price floor as 15% of base
@@ -122,75 +334,11 @@ class Drug:
 
         If there is a hi surge, less is available, vice versa for a lo surge
         """
-        base_quant = randint(5, 100)
-        if self._surge == "hi":
+        base_quant = self._rng.randint(5, 100)
+        if self._surge == Surge.HI:
             rv = max(int(base_quant / 3), 8)
-        elif self._surge == "lo":
+        elif self._surge == Surge.LO:
             rv = base_quant * 3
         else:
             rv = base_quant
         self.quantity = rv
-
-
-class Weed(Drug):
-    def __init__(self):
-        super().__init__(name="Weed", base_price=100, jitter=15)
-
-
-class Luuds(Drug):
-    def __init__(self):
-        super().__init__(name="Luuds", base_price=10, jitter=3)
-
-
-class Coke(Drug):
-    def __init__(self):
-        super().__init__(name="Coke", base_price=300, jitter=50)
-
-
-class Molly(Drug):
-    def __init__(self):
-        super().__init__(name="Molly", base_price=50, jitter=8)
-
-
-class Shrooms(Drug):
-    def __init__(self):
-        super().__init__(name="Shrooms", base_price=25, jitter=5)
-
-
-class Acid(Drug):
-    def __init__(self):
-        super().__init__(name="Acid", base_price=500, jitter=100)
-
-
-class Meth(Drug):
-    def __init__(self):
-        super().__init__(name="Meth", base_price=10, jitter=15)
-
-
-class Heroin(Drug):
-    def __init__(self):
-        super().__init__(name="Heroin", base_price=1000, jitter=500)
-
-
-class DeathSticks(Drug):
-    def __init__(self):
-        super().__init__(name="DeathStix", base_price=50, jitter=100)
-
-
-class Olysio(Drug):
-    def __init__(self):
-        super(Olysio, self).__init__(name="Olysio", base_price=50000, jitter=20000)
-
-
-DRUGS = [
-    Weed,
-    Luuds,
-    Coke,
-    Molly,
-    Shrooms,
-    Acid,
-    Meth,
-    Heroin,
-    DeathSticks,
-    Olysio
-]
@@ -0,0 +1,400 @@
+"""Contain headless game engine.
+
+The engine owns every rule of a game (trading, moving, banking, interest,
+events and scoring) and never reads input or prints anything, so that it
+can be driven by the terminal frontend, by bots or by simulations.
+"""
+from functools import partial
+from typing import Dict, List, Optional, Set, Union
+
+from dopewars.actions import NO_EVENT, Action, ActionLog
+from dopewars.banks import Bank
+from dopewars.cities import City
+from dopewars.day import Day, Market, roll_event
+from dopewars.drugs import drug_id
+from dopewars.events import Event
+from dopewars.history import HISTORY_CAPACITY, PriceHistory
+from dopewars.market import CounterMarket, PersistentMarket
+from dopewars.player import Player
+from dopewars.rng import GameRNG
+from dopewars.weapons import WEAPONS, Weapon
+
+STARTING_MONEY = 500
+
+
+def generate_cities() -> Dict[str, City]:
+    """Return a fresh set of cities, keyed by name."""
+    cities = (
+        City.miami(),
+        City.nyc(),
+        City.atlanta(),
+        City.chicago(),
+        City.los_angeles(),
+        City.seattle(),
+        City.washington(),
+    )
+    return {city.name: city for city in cities}
+
+
+class Game:
+    """Hold the state of a single game and apply actions to it.
+
+    Every action is a plain method call; invalid actions raise RuntimeError,
+    just like Player does.  The game starts on day one in Miami and is over
+    once the last day has been moved away from, or the good cop gets you.
+
+    Markets are a pure function of the game's seed, day, city and drug, see
+    `market`, and a day's market is only computed once it is looked at, at
+    which point it is queued for `history`.  With `persistent_market`,
+    markets are a PersistentMarket instead: every city's prices and supply
+    carry over from one turn to the next, and purchases deplete supply.
+    Games can record an ActionLog of everything done to them, for
+    dopewars.replay to play back.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        days: int = 30,
+        money: int = STARTING_MONEY,
+        rng: GameRNG = None,
+        record: bool = False,
+        persistent_market: bool = False,
+    ) -> None:
+        """
+        :param name: player name
+        :param days: number of turns
+        :param money: starting money
+        :param rng: random streams for this game, a fresh unseeded one if omitted
+        :param record: record every action in `log`
+        :param persistent_market: carry markets over from one turn to the next,
+            such games can neither be recorded nor saved
+        """
+        self._setup(name, days, money, rng, record, persistent_market)
+        self._start_day()
+
+    @classmethod
+    def _resume(
+        cls, name: str, days: int, money: int, rng: GameRNG, day: int
+    ) -> "Game":
+        """Return game set on `day` without starting it, for dopewars.savegame.
+
+        Unlike the constructor this rolls no event, so nothing happens to the
+        player; `current_day` is left for the caller to rebuild.
+        :param name: player name
+        :param days: number of turns
+        :param money: starting money
+        :param rng: random streams of the saved game
+        :param day: day number the game was saved on
+        """
+        game = cls.__new__(cls)
+        game._setup(name, days, money, rng, False, False)
+        game.current_day_num = day
+        game.rng.start_turn(day)
+        return game
+
+    def _setup(
+        self,
+        name: str,
+        days: int,
+        money: int,
+        rng: Optional[GameRNG],
+        record: bool,
+        persistent_market: bool,
+    ) -> None:
+        """Set up every part of a game before its first day, see __init__."""
+        if days < 1:
+            raise ValueError("Game must last at least one day")
+        if record and persistent_market:
+            raise ValueError("Games with a persistent market cannot be recorded")
+        self.days = days
+        self.rng = rng or GameRNG()
+        self.player = Player(name, money, self.rng)
+        self.cities: Dict[str, City] = generate_cities()
+        self.current_city: City = self.cities["Miami"]
+        self._city_index = {name: index for index, name in enumerate(self.cities)}
+        if persistent_market:
+            self.market = PersistentMarket(self.rng.market_key, len(self.cities))
+        else:
+            self.market = CounterMarket(self.rng.market_key, cities=len(self.cities))
+        self._history: PriceHistory = None
+        self._unrecorded: List[tuple] = []  # Markets seen, not yet in history
+        self.current_day_num: int = 0
+        self.current_day: Day = None
+        self.over: bool = False
+        self.busted: bool = False
+        self.log: ActionLog = None
+        if record:
+            self.log = ActionLog(name, days, money, self.rng.seed, self.rng.game)
+        self._banked = 0  # Sum of bank balances, as of their last accrual
+        self._funded: Set[Bank] = set()  # Banks holding any money
+        self._settled = 0  # Day every funded bank last accrued on
+        for city in self.cities.values():
+            if city.bank:
+                city.bank.set_clock(self._interest_days)
+                city.bank.set_listener(self._balance_changed)
+
+    def __str__(self) -> str:
+        return f"<Game day {self.current_day_num} in {self.current_city.name}>"
+
+    def _interest_days(self) -> int:
+        """Return days of interest owed by banks, one for every day started."""
+        return self.current_day_num
+
+    def _balance_changed(self, bank: Bank, old: int, new: int) -> None:
+        """Keep the sum of bank balances, and which banks hold money."""
+        self._banked += new - old
+        if new:
+            self._funded.add(bank)
+        else:
+            self._funded.discard(bank)
+
+    def _start_day(self) -> None:
+        """Generate the next day in the current city, banks accrue a day."""
+        self._tick()
+        self.current_day = self.make_day()
+        self._happened(self.current_day.event, self.current_day.end_game)
+
+    def _tick(self) -> None:
+        """Move the clock and the persistent market on to the next day."""
+        self.current_day_num += 1
+        if self.persistent_market:
+            self.market.advance(self.current_day_num)
+        self.rng.start_turn(self.current_day_num)
+
+    def _happened(self, event: Optional[Event], end_game: bool) -> None:
+        """Log today's `event`, end the game if it did."""
+        if self.log is not None:
+            self.log.events.append(NO_EVENT if event is None else event)
+        if end_game:
+            self.busted = True
+            self._end_game()
+
+    def make_day(self, roll_event: bool = True) -> Day:
+        """Return today's Day in the current city.
+
+        :param roll_event: roll for today's event, False to rebuild a day
+            whose event already happened, e.g. when resuming a saved game
+        """
+        city = self._city_index[self.current_city.name]
+        market = partial(self._observe, self.current_day_num, city)
+        return Day(self.current_city, self.player, market, self.rng, roll_event)
+
+    def _observe(self, day: int, city: int) -> Market:
+        """Return market of `city` on `day`, recording it in history."""
+        market = self.market.day(day, city)
+        self._unrecorded.append((day, city, market))
+        if len(self._unrecorded) == HISTORY_CAPACITY:
+            self._record_history()
+        return market
+
+    @property
+    def history(self) -> PriceHistory:
+        """Return history of every market seen so far."""
+        self._record_history()
+        return self._history
+
+    def _record_history(self) -> None:
+        """Record markets seen since the history was last read.
+
+        Markets are only queued as they are seen, and recorded in bulk when
+        the history is read, or HISTORY_CAPACITY of them are queued.
+        """
+        if self._history is None:
+            self._history = PriceHistory(len(self.cities))
+        for day, city, market in self._unrecorded:
+            self._history.record(day, city, *market)
+        self._unrecorded.clear()
+
+    def _record(self, action: Action, first: int = 0, second: int = 0) -> None:
+        """Append action to log, if recording."""
+        if self.log is not None:
+            self.log.append(action, first, second)
+
+    def _end_game(self) -> None:
+        """Mark game as over, record final score."""
+        self.over = True
+        if self.log is not None:
+            self.log.score = self.score
+
+    def _check_playing(self) -> None:
+        """Raise RuntimeError if game is already over."""
+        if self.over:
+            raise RuntimeError("Game over")
+
+    @property
+    def score(self) -> int:
+        """Return amount of money owned by player, including bank balances.
+
+        Banks report every change of their balance, so this is a sum of two
+        running totals; only banks holding money accrue interest, once a day.
+        """
+        if self._settled != self.current_day_num:
+            for bank in tuple(self._funded):
+                bank.accrue()
+            self._settled = self.current_day_num
+        return self.player.money + self._banked
+
+    @property
+    def persistent_market(self) -> bool:
+        """Return whether markets carry over from one turn to the next."""
+        return isinstance(self.market, PersistentMarket)
+
+    def prices(self, city: str, day: int = None) -> List[int]:
+        """Return prices of every drug in `city`, in ID order.
+
+        Any day can be queried, including future ones, without affecting
+        the game.  Quantities bought or sold today are not reflected.
+        Persistent markets only know today's prices, see PersistentMarket.
+        :param city: city name
+        :param day: day number, defaults to today
+        """
+        day = self.current_day_num if day is None else day
+        return self.market.day(day, self._city_index[city])[1]
+
+    def destinations(self) -> List[City]:
+        """Return cities the player can move to."""
+        return [city for city in self.cities.values() if city is not self.current_city]
+
+    def buy(self, drug: Union[int, str], quantity: int) -> int:
+        """Buy `quantity` of `drug` in the current city.
+
+        :param drug: drug ID or name
+        :param quantity: amount to buy
+        :return: total cost
+        """
+        self._check_playing()
+        drug = drug_id(drug)
+        cost = quantity * self.current_day.get_price(drug)
+        self.current_day.buy(drug, quantity)
+        if self.persistent_market:
+            city = self._city_index[self.current_city.name]
+            self.market.take(city, drug, quantity)
+        self._record(Action.BUY, drug, quantity)
+        return cost
+
+    def sell(self, drug: Union[int, str], quantity: int) -> int:
+        """Sell `quantity` of `drug` in the current city.
+
+        :param drug: drug ID or name
+        :param quantity: amount to sell
+        :return: proceeds of the sale
+        """
+        self._check_playing()
+        drug = drug_id(drug)
+        proceeds = quantity * self.current_day.get_price(drug)
+        self.current_day.sell(drug, quantity)
+        self._record(Action.SELL, drug, quantity)
+        return proceeds
+
+    def deposit(self, amount: int) -> int:
+        """Move `amount` of cash into the current city's bank.
+
+        :param amount: int > 0
+        :return: new bank balance
+        """
+        self._check_playing()
+        bank = self.current_city.bank
+        if bank is None:
+            raise RuntimeError(f"There is no bank in {self.current_city.name}")
+        if amount <= 0:
+            raise RuntimeError("Amount must be greater than zero")
+        if amount > self.player.money:
+            raise RuntimeError("Insufficient funds")
+        balance = bank.balance
+        msg = bank.deposit(amount)
+        if bank.balance == balance:
+            raise RuntimeError(msg)
+        self.player.money -= amount
+        self._record(Action.DEPOSIT, 0, amount)
+        return bank.balance
+
+    def withdraw(self, amount: int) -> int:
+        """Move `amount` from the current city's bank into cash.
+
+        :param amount: int > 0
+        :return: new bank balance
+        """
+        self._check_playing()
+        bank = self.current_city.bank
+        if bank is None:
+            raise RuntimeError(f"There is no bank in {self.current_city.name}")
+        if amount <= 0:
+            raise RuntimeError("Amount must be greater than zero")
+        if not bank.withdraw(amount):
+            raise RuntimeError("Insufficient funds")
+        self.player.money += amount
+        self._record(Action.WITHDRAW, 0, amount)
+        return bank.balance
+
+    def buy_weapon(self, name: str) -> Weapon:
+        """Buy weapon called `name` from the current city's store.
+
+        :param name: weapon name
+        :return: the purchased weapon
+        """
+        self._check_playing()
+        store = self.current_city.store
+        if store is None:
+            raise RuntimeError(f"There is no store in {self.current_city.name}")
+        for weapon in store.inventory:
+            if weapon.name == name:
+                self.player.weapon = weapon
+                self._record(Action.WEAPON, WEAPONS.index(type(weapon)))
+                return weapon
+        raise RuntimeError(f"{store} doesn't sell {name}")
+
+    def move(self, city: str) -> Day:
+        """Travel to `city`, ending the current turn.
+
+        :param city: destination name
+        :return: the new day, or None if that was the last turn
+        """
+        self._check_playing()
+        destination = self.cities.get(city)
+        if destination is None:
+            raise RuntimeError(f"Unknown city: {city}")
+        if destination is self.current_city:
+            raise RuntimeError(f"Already in {city}")
+        self.current_city = destination
+        self._record(Action.MOVE, self._city_index[city])
+        return self._next_day()
+
+    def end_turn(self) -> Day:
+        """End the current turn, starting the next day in the current city.
+
+        :return: the new day, or None if that was the last turn
+        """
+        self._check_playing()
+        self._record(Action.END_TURN)
+        return self._next_day()
+
+    def skip(self, days: int) -> Day:
+        """End `days` turns in a row without doing anything, staying put.
+
+        Same as calling end_turn `days` times, stopping early if the game
+        ends.  Days skipped over are never built: only their events are
+        rolled and persistent markets advanced, while banks catch up with
+        the clock lazily.  Only the day landed on is a full Day.
+        :param days: number of turns to end
+        :return: the new day, or None if the game ended
+        """
+        if days < 1:
+            raise ValueError("Must skip at least one day")
+        self._check_playing()
+        for _ in range(min(days - 1, self.days - self.current_day_num)):
+            self._record(Action.END_TURN)
+            self._tick()
+            event, _, end_game = roll_event(self.player, self.rng)
+            self._happened(event, end_game)
+            if self.over:
+                return None
+        return self.end_turn()
+
+    def _next_day(self) -> Day:
+        """Start the next day, or end the game after the last one."""
+        if self.current_day_num >= self.days:
+            self._end_game()
+            return None
+        self._start_day()
+        return self.current_day
@@ -0,0 +1,78 @@
+"""Contain random events that can happen at the start of a day.
+
+Events are declared in EVENTS: how many chances in EVENT_DRAW each has of
+happening on any given day, and what it does to the player.  The table is
+compiled once into EVENT_TABLE, the outcome of every possible draw, so
+rolling a day's event is one random draw and one lookup, however many
+events there are.  Which weapons defeat which events is declared by the
+weapons, see Weapon.defeats.
+"""
+from enum import IntEnum
+from typing import Callable, NamedTuple, Optional, Sequence, Tuple
+
+
+class Event(IntEnum):
+    """Random event, indexes per-event tables such as Weapon.defeats."""
+
+    ROBBER = 0
+    CORRUPT_COP = 1
+    GOOD_COP = 2
+
+
+EVENT_NAMES = ("robber", "corrupt cop", "good cop")  # Indexed by Event
+EVENT_DRAW = 450  # Possible outcomes of a day's draw
+
+Effect = Callable[..., Tuple[Optional[str], bool]]
+
+
+class EventSpec(NamedTuple):
+    """Describe a random event.
+
+    effect takes the Player, and returns the event's text, or None if
+    nothing happened, and whether the game is over.
+    """
+
+    event: Event
+    weight: int  # Chances in EVENT_DRAW of happening on any given day
+    effect: Effect
+
+
+def _robber(player) -> Tuple[Optional[str], bool]:
+    """Take 5-15% of the player's money."""
+    return player.steal_money(), False
+
+
+def _corrupt_cop(player) -> Tuple[Optional[str], bool]:
+    """Take a quarter of one of the player's drugs."""
+    return f"A corrupt cop stopped you!\n{player.steal_drugs()}", False
+
+
+def _good_cop(player) -> Tuple[Optional[str], bool]:
+    """End the game of a player holding any drugs."""
+    if player.inv:
+        return "The ultimate boy scout cop got you, game over!", True
+    return None, False
+
+
+EVENTS: Tuple[EventSpec, ...] = (  # Indexed by Event
+    EventSpec(Event.ROBBER, 50, _robber),  # 1 in 9
+    EventSpec(Event.CORRUPT_COP, 30, _corrupt_cop),  # 1 in 15
+    EventSpec(Event.GOOD_COP, 3, _good_cop),  # 1 in 150
+)
+
+
+def compile_events(
+    specs: Sequence[EventSpec] = EVENTS, draw: int = EVENT_DRAW
+) -> Tuple[Optional[EventSpec], ...]:
+    """Return the event every draw in range(`draw`) rolls, None for no event.
+
+    :param specs: events
+    :param draw: possible outcomes of a draw
+    """
+    table = [spec for spec in specs for _ in range(spec.weight)]
+    if len(table) > draw:
+        raise ValueError(f"Event weights add up to more than {draw}")
+    return tuple(table) + (None,) * (draw - len(table))
+
+
+EVENT_TABLE = compile_events()
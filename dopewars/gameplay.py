@@ -1,68 +1,117 @@
-"""Contains gameplay implementation."""
+"""Contains gameplay implementation.
+
+The menus form a state machine: every menu is a generator that yields
+prompts, receives the player's answers, and returns the next menu to run.
+Gameplay.session drives the menus from a single loop, so the stack depth
+stays constant however many actions or games a session goes through.
+
+Menus needing the score file or the disk yield a Blocking call instead of
+a prompt, and are sent its result: the terminal calls it in place, the game
+server in a worker thread, so that other sessions are not held up.
+"""
 import os
+from functools import partial
 from string import ascii_letters as alpha
+from typing import Callable, Collection, Generator, Iterable, List, Tuple, Union
 
-from dopewars.cities import City
-from dopewars.day import Day
-from dopewars.player import Player
-from dopewars.scores import Scores
+from dopewars.engine import STARTING_MONEY, Game
+from dopewars.metrics import Metrics
+from dopewars.render import Renderer
+from dopewars.rng import GameRNG
+from dopewars.scores import DEFAULT_FILE, Scores
 from dopewars.utilities import fmt_money
 
-STARTING_MONEY = 500
+
+class Blocking(partial):
+    """Blocking I/O a session yields, to be sent its result, see session."""
+
+
+Prompt = Union[str, Blocking]
+Menu = Generator[Prompt, object, Callable]  # Yields prompts, returns next menu
 
 
 class Gameplay:
-    """Contain gameplay implementation.
+    """Contain terminal frontend.
 
-    Instantiates all the other objects required to play the game:
-    draws menus; accepts and validates user input; transforms user
-    input into data manipulation
+    Draws menus; accepts and validates user input; transforms user
+    input into calls on a headless dopewars.engine.Game
     """
 
     menu_width = 40
 
-    def __init__(self, days: int = 30) -> None:
+    def __init__(
+        self,
+        days: int = 30,
+        score_file: str = DEFAULT_FILE,
+        renderer: Renderer = None,
+        scores: Scores = None,
+        log_dir: str = None,
+        metrics: Metrics = None,
+        seed: int = None,
+    ) -> None:
+        """
+        :param days: default number of turns
+        :param score_file: where to store scores, see dopewars.scores.Scores
+        :param renderer: where to draw menus, defaults to the terminal
+        :param scores: score store shared with other sessions, `score_file`
+            is opened whenever scores are needed if omitted
+        :param log_dir: record games, saving their action logs here
+        :param metrics: instrument the renderer and every game played
+        :param seed: master seed of every game played, the nth game of the
+            session being game n of its GameRNG, random if omitted
+        """
         self.days = days
-        self.player = None
-        self.cities: dict[str:City] = None
-        self.current_city: City = None
-        self.current_day_num: int = None
-        self.current_day: Day = None
+        self.renderer = renderer or Renderer()
+        self.game: Game = None
         self.name: str = None
-        self.score = None
-        self._score_file = "scores.csv"
-        self.start_menu()
+        self._score_file = score_file
+        self._scores = scores
+        self._log_dir = log_dir
+        self._metrics = metrics
+        self._seed = seed
+        self._games = 0  # Games started this session
+        if metrics is not None:
+            metrics.instrument_renderer(self.renderer)
 
     def __str__(self) -> str:
-        return f"<Gameplay {self.current_day} in {self.current_city}>"
+        return f"<Gameplay {self.game}>"
 
-    def _generate_cities(self) -> None:
-        """Generate cities.
+    @property
+    def player(self):
+        """Return current game's player."""
+        return self.game.player
 
-        Called by Gameplay.run
-        """
-        self.cities = {
-            "Miami": City.miami(),
-            "NYC": City.nyc(),
-            "Atlanta": City.atlanta(),
-            "Chicago": City.chicago(),
-            "LA": City.los_angeles(),
-            "Seattle": City.seattle(),
-            "Washington D.C.": City.washington(),
-        }
-        self.current_city = self.cities["Miami"]
+    @property
+    def current_city(self):
+        """Return city the player is in."""
+        return self.game.current_city
 
-    @staticmethod
-    def clear() -> None:
+    @property
+    def current_day(self):
+        """Return current game's day."""
+        return self.game.current_day
+
+    def offerings(self) -> List[str]:
+        """Return lines of today's offerings, compared to average prices."""
+        day = self.current_day
+        day.drugs()  # Today's prices count towards the averages
+        return day.offerings(self.game.history.averages())
+
+    def scores(self) -> Scores:
+        """Return score store, opening the score file unless one is shared."""
+        if self._scores is None:
+            return Scores(self._score_file)
+        self._scores.refresh()  # Other sessions may have saved scores
+        return self._scores
+
+    def clear(self) -> None:
         """Clear the screen."""
-        os.system("cls" if os.name == "nt" else "clear")
-        print("\n" * 100)
+        self.renderer.clear()
 
-    @staticmethod
-    def logo() -> None:
+    def logo(self) -> None:
         """Print this totally awesome ASCII Logo."""
 
-        print(
+        self.renderer.print(
             """
     ▓█████▄  ▒█████   ██▓███  ▓█████     █     █░ ▄▄▄       ██▀███    ██████ 
     ▒██▀ ██▌▒██▒  ██▒▓██░  ██▒▓█   ▀    ▓█░ █ ░█░▒████▄    ▓██ ▒ ██▒▒██    ▒ 
@@ -80,303 +129,322 @@ class Gameplay:
         """Draw main menu."""
         self.clear()
         self.logo()
-        print("Remember 10th grade math?  Neither do I, because of this game.\n")
-        print("1) New Game")
-        print("2) Display High Scores")
-        print("3) Quit")
+        self.renderer.print(
+            "Remember 10th grade math?  Neither do I, because of this game.\n"
+        )
+        self.renderer.print("1) New Game")
+        self.renderer.print("2) Display High Scores")
+        self.renderer.print("3) Quit")
 
-    def start_menu(self) -> None:
-        """Handle user interaction for main menu."""
+    def run(self, menu: Callable = None, answers: Iterable[str] = None) -> None:
+        """Run session on the terminal until the player quits.
+
+        :param menu: first menu, defaults to the start menu
+        :param answers: scripted answers to read instead of the terminal,
+            the session simply stops once they run out
+        """
+        session = self.session(menu)
+        read, send = input, session.send
+        if answers is not None:
+            read = partial(next, iter(answers), None)
+        if self._metrics is not None:
+            read = self._metrics.timed(read, self._metrics.input)
+            send = self._metrics.timed(send, self._metrics.logic)
+        try:
+            prompt = next(session)
+            while True:
+                self.renderer.flush(prompt)
+                answer = read()
+                if answer is None:  # End of scripted answers
+                    break
+                self.renderer.echo(answer)
+                prompt = send(answer)
+                while isinstance(prompt, Blocking):
+                    prompt = send(prompt())
+        except StopIteration:
+            pass
 
-        def check_alpha() -> bool:
-            """Ensure that only ascii letters are in name."""
-            for char in name:
-                if char not in alpha:
-                    return False
-            return True
+    def session(self, menu: Callable = None) -> Generator[Prompt, object, None]:
+        """Run menus until the player quits.
 
-        self.main_menu()
-        valid_answers = ("1", "2", "3")
+        Yields prompts and expects to be sent the player's answer to each,
+        or a Blocking call, expecting to be sent what it returns.
+        :param menu: first menu, defaults to the start menu
+        """
+        menu = menu or self.start_menu
+        while menu is not None:
+            menu = yield from menu()
+
+    def resume(self, game: Game) -> Callable:
+        """Take over a game in progress, return the menu continuing it.
+
+        :param game: e.g. a game loaded with dopewars.savegame.load
+        """
+        self._play(game)
+        self.name = game.player.name
+        self.days = game.days
+        return self.game_over_menu if game.over else self.play_menu
+
+    def _play(self, game: Game) -> None:
+        """Make `game` the current game, instrumenting it if metrics are on."""
+        if self._metrics is not None:
+            self._metrics.instrument_game(game)
+        self.game = game
+
+    @staticmethod
+    def _choose(prompt: str, valid: Collection[str]) -> Generator[str, str, str]:
+        """Ask `prompt` until the answer is one of `valid`, return answer."""
         while True:
-            answer = input("What would you like to do: ")
-            if answer in valid_answers:
-                break
+            answer = yield prompt
+            if answer in valid:
+                return answer
+
+    def start_menu(self) -> Menu:
+        """Handle user interaction for main menu."""
+        self.main_menu()
+        answer = yield from self._choose("What would you like to do: ", "123")
         if answer == "1":
-            while True:
-                ans = input("How many turns: ")
-                try:
-                    self.days = int(ans)
-                    while True:
-                        name = input("Name: ")
-                        if not check_alpha():
-                            print("Letters only please")
-                            continue
-                        else:
-                            self.name = name
-                            break
-                    self.run()
-                except ValueError:
-                    continue
+            return self.new_game_menu
         elif answer == "2":
-            self.clear()
-            s = Scores()
-            s.print()
-            input()
-            self.start_menu()
-        elif answer == "3":
-            quit(0)
-
-    def play_menu(self) -> None:
+            return self.high_scores_menu
+        return None
+
+    def new_game_menu(self) -> Menu:
+        """Ask for number of turns and player name, start new game."""
+        while True:
+            try:
+                self.days = int((yield "How many turns: "))
+                if self.days >= 1:
+                    break
+            except ValueError:
+                continue
+        while True:
+            name = yield "Name: "
+            if all(char in alpha for char in name):
+                break
+            self.renderer.print("Letters only please")
+        self.name = name
+        self.clear()
+        record = self._log_dir is not None
+        rng = GameRNG(self._seed, self._games)
+        self._games += 1
+        self._play(Game(self.name, self.days, STARTING_MONEY, rng, record))
+        if self.game.over:
+            return self.game_over_menu
+        return self.play_menu
+
+    def high_scores_menu(self) -> Menu:
+        """Print high scores."""
+        self.clear()
+        lines = yield Blocking(lambda: self.scores().lines())
+        self.renderer.print(*lines)
+        yield ""
+        return self.start_menu
+
+    def play_menu(self) -> Menu:
         """Draw the play menu.
 
-        This can be repeatedly called by Gameplay.sell_menu
-        and Gameplay.buy_menu in order for the player to go back and forth between
-        the menus without ending that turn.
+        Gameplay.sell_menu, Gameplay.buy_menu and the others return here,
+        so that the player can go back and forth between the menus without
+        ending that turn.
         """
         event = self.current_day.event_text
         if event:
             self.clear()
-            input(event)
+            yield event
             self.current_day.event_text = None
         self.clear()
-        print("=" * Gameplay.menu_width)
-        print(f"Day {self.current_day_num}")
-        print(self.current_city.name)
-        print(fmt_money(self.player.money))
-        print("=" * Gameplay.menu_width)
-        self.player.print_inv()
-        print("=" * Gameplay.menu_width)
-        self.current_day.print_offerings()
-        print("=" * Gameplay.menu_width)
-        print("1) Buy")
-        print("2) Sell")
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(f"Day {self.game.current_day_num}")
+        self.renderer.print(self.current_city.name)
+        self.renderer.print(fmt_money(self.player.money))
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(*self.player.inv_lines())
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(*self.offerings())
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print("1) Buy")
+        self.renderer.print("2) Sell")
+        choices = {"1": self.buy_menu, "2": self.sell_menu}
         if self.current_city.bank:
-            valid = "1", "2", "3", "4"
-            print(f"3) Visit {self.current_city.bank} Bank")
-            print("4) Move")
+            self.renderer.print(f"3) Visit {self.current_city.bank} Bank")
+            choices["3"] = self.bank_menu
         elif self.current_city.store:
-            valid = "1", "2", "3", "4"
-            print(f"3) Visit {self.current_city.store}")
-            print("4) Move")
-        else:
-            valid = "1", "2", "3"
-            print("3) Move")
-        print("=" * Gameplay.menu_width)
-        while True:
-            choice = input("What do you want to do: ")
-            if choice in valid:
-                break
-        if choice == "1":
-            self.buy_menu()
-        elif choice == "2":
-            self.sell_menu()
-        elif (
-            choice == "3" and not self.current_city.bank and not self.current_city.store
-        ):
-            self.move_menu()
-        elif choice == "3" and self.current_city.bank and not self.current_city.store:
-            self.bank_menu()
-        elif choice == "3" and self.current_city.store and not self.current_city.bank:
-            self.store_menu()
-        elif choice == "4" and (self.current_city.bank or self.current_city.store):
-            self.move_menu()
-        else:
-            input(f"{choice} {self.current_city.store}")
-
-    def sell_menu(self) -> None:
+            self.renderer.print(f"3) Visit {self.current_city.store}")
+            choices["3"] = self.store_menu
+        self.renderer.print(f"{len(choices) + 1}) Move")
+        choices[str(len(choices) + 1)] = self.move_menu
+        self.renderer.print("=" * Gameplay.menu_width)
+        choice = yield from self._choose("What do you want to do: ", choices)
+        return choices[choice]
+
+    def sell_menu(self) -> Menu:
         """Draw sell menu, handle player input."""
         if not self.player.inv:
-            input("You have nothing to sell.")
-            return self.play_menu()
+            yield "You have nothing to sell."
+            return self.play_menu
         choices = {}
-        for index, (key, value) in enumerate(self.player.inv.items()):
+        for index, (name, quantity) in enumerate(self.player.inv.items()):
             index += 1
-            price = self.current_day.get_price(key)
-            print(f"{index}) {value.name} | ${price} | {value.quantity}")
-            choices[str(index)] = value.name, price
+            price = self.current_day.get_price(name)
+            self.renderer.print(f"{index}) {name} | ${price} | {quantity}")
+            choices[str(index)] = name
         choices["c"] = "cancel"
-        while True:
-            choice = input("Sell which (c to cancel): ")
-            if choice in choices:
-                break
+        choice = yield from self._choose("Sell which (c to cancel): ", choices)
         if choice == "c":
-            return self.play_menu()
-        name, price = choices[choice]
+            return self.play_menu
         while True:
-            amount = input("How many (c to cancel): ")
+            amount = yield "How many (c to cancel): "
             if amount == "c":
-                return self.play_menu()
+                break
             try:
-                amount = int(amount)
-                self.current_day.sell(name, amount)
+                self.game.sell(choices[choice], int(amount))
                 break
             except ValueError:
                 continue
             except RuntimeError as e:
-                print(str(e))
-        return self.play_menu()
+                self.renderer.print(str(e))
+        return self.play_menu
 
-    def buy_menu(self) -> None:
+    def buy_menu(self) -> Menu:
         """Draw buy menu, handle player input."""
         self.clear()
-        print("=" * Gameplay.menu_width)
-        self.current_day.print_offerings()
-        print("=" * Gameplay.menu_width)
-        print(fmt_money(self.player.money))
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(*self.offerings())
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(fmt_money(self.player.money))
         drugs = self.current_day.get_drugs()
         choices = {}
         for index, drug in enumerate(drugs):
             choices[str(index + 1)] = drug
         choices["c"] = "cancel"
-        while True:
-            choice = input("Which do you want to buy (c to cancel): ")
-            if choice in choices:
-                break
+        prompt = "Which do you want to buy (c to cancel): "
+        choice = yield from self._choose(prompt, choices)
         if choice == "c":
-            return self.play_menu()
+            return self.play_menu
         while True:
+            amount = yield "How many (c to cancel): "
+            if amount == "c":
+                break
             try:
-                amount = input("How many (c to cancel): ")
-                if amount == "c":
-                    return self.play_menu()
-                amount = int(amount)
-                self.current_day.buy(choices[choice], amount)
+                self.game.buy(choices[choice], int(amount))
                 break
             except ValueError:
                 continue
             except RuntimeError as e:
-                print(str(e))
-        return self.play_menu()
+                self.renderer.print(str(e))
+        return self.play_menu
 
-    def bank_menu(self) -> None:
+    def bank_menu(self) -> Menu:
         """Draw the bank interaction menu."""
         self.clear()
-        print("=" * Gameplay.menu_width)
-        print(f"Welcome to {self.current_city.bank.name}")
-        print(f"Cash: {fmt_money(self.player.money)}")
-        print(f"Bank balance: {fmt_money(self.current_city.bank.balance)}")
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print(f"Welcome to {self.current_city.bank.name}")
+        self.renderer.print(f"Cash: {fmt_money(self.player.money)}")
+        self.renderer.print(
+            f"Bank balance: {fmt_money(self.current_city.bank.balance)}"
+        )
         choices = {"1": "Deposit", "2": "Withdraw", "3": "Go back"}
         for key, value in choices.items():
-            print(f"{key}) {value}")
-        while True:
-            choice = input("What do you want to do: ")
-            if choice in choices:
-                break
+            self.renderer.print(f"{key}) {value}")
+        choice = yield from self._choose("What do you want to do: ", choices)
         if choice == "1":
             while True:
-                amount = input("Amount to deposit: ")
                 try:
-                    amount = int(amount)
-                    if amount > self.player.money:
-                        input("Insufficient Funds")
-                        return self.bank_menu()
-                    msg = self.current_city.bank.deposit(amount)
-                    input(msg)
-                    if 'Balance' in msg:
-                        self.player.money -= amount
-                    return self.bank_menu()
+                    amount = int((yield "Amount to deposit: "))
+                    balance = self.game.deposit(amount)
+                    yield f"Balance: {fmt_money(balance)}"
+                    break
                 except ValueError:
                     continue
+                except RuntimeError as e:
+                    yield str(e)
+                    break
         elif choice == "2":
             while True:
-                amount = input("How much to withdraw (c to cancel): ")
+                amount = yield "How much to withdraw (c to cancel): "
                 if amount == "c":
-                    return self.bank_menu()
+                    break
                 try:
                     amount = int(amount)
-                    withdraw = self.current_city.bank.withdraw(amount)
-                    print(f"Withdrew ${withdraw}")
-                    self.player.money += withdraw
-                    return self.bank_menu()
+                    self.game.withdraw(amount)
+                    self.renderer.print(f"Withdrew {fmt_money(amount)}")
+                    break
                 except ValueError:
                     continue
+                except RuntimeError as e:
+                    yield str(e)
+                    break
         elif choice == "3":
-            return self.play_menu()
+            return self.play_menu
+        return self.bank_menu
 
-    def store_menu(self) -> None:
+    def store_menu(self) -> Menu:
         """Draw the store menu."""
         self.clear()
-        print("=" * Gameplay.menu_width)
-        print("Here are the offerings")
+        self.renderer.print("=" * Gameplay.menu_width)
+        self.renderer.print("Here are the offerings")
         choices = {}
         for index, weapon in enumerate(self.current_city.store.inventory):
             index += 1
             choices[str(index)] = weapon
-            print(f"{index}) | {weapon.name} | {weapon.price}")
+            self.renderer.print(f"{index}) | {weapon.name} | {weapon.price}")
         choices["c"] = None
-        while True:
-            choice = input("What do you want to buy (c to cancel): ")
-            if choice in choices:
-                break
+        prompt = "What do you want to buy (c to cancel): "
+        choice = yield from self._choose(prompt, choices)
         if choice == "c":
-            return self.play_menu()
+            return self.play_menu
         try:
-            weapon = choices[choice]
-            self.player.weapon = weapon
+            self.game.buy_weapon(choices[choice].name)
         except RuntimeError as e:
-            input(e)
-        return self.play_menu()
+            yield str(e)
+        return self.play_menu
 
-    def move_menu(self) -> None:
+    def move_menu(self) -> Menu:
         """Draw move menu, handle player input.
 
         This ends this day's turn.
         """
-        available_cities = [
-            city for name, city in self.cities.items() if self.current_city != city
-        ]
+        available_cities = self.game.destinations()
         self.clear()
-        print("=" * Gameplay.menu_width)
+        self.renderer.print("=" * Gameplay.menu_width)
         choices = {}
         for index, city in enumerate(available_cities):
             index += 1
-            print(f"{index}) {city.name}")
+            self.renderer.print(f"{index}) {city.name}")
             choices[str(index)] = city
-        while True:
-            choice = input("Destination: ")
-            if choice in choices:
-                break
-        self.current_city = choices[choice]
-
-    def _final_score(self) -> int:
-        """Return amount of money owned by player."""
-        s = self.player.money
-        for _, city in self.cities.items():
-            if city.bank:
-                s += city.bank.balance
-        return s
-
-    def _calc_interest(self) -> None:
-        """Calculate interest for all banks."""
-        for _, city in self.cities.items():
-            if city.bank:
-                city.bank.calc_interest()
-
-    def _print_scores(self) -> None:
+        choice = yield from self._choose("Destination: ", choices)
+        self.game.move(choices[choice].name)
+        if self.game.over:
+            return self.game_over_menu
+        return self.play_menu
+
+    def game_over_menu(self) -> Menu:
         """Print score from current game, as well as high scores."""
+        if self.game.busted:
+            yield self.current_day.event_text
         self.clear()
-        score = self._final_score()
+        score = self.game.score
         score_text = f"Final score: {fmt_money(score)}"
-        print(score_text)
-        s = Scores()
+        self.renderer.print(score_text)
+        rank, total, lines = yield Blocking(self._store, score)
+        self.renderer.print(f"You placed #{rank:,} of {total:,} {self.days}-turn games")
+        self.renderer.print(*lines)
+        yield ""
+        return self.start_menu
+
+    def _store(self, score: int) -> Tuple[int, int, List[str]]:
+        """Save finished game's score and action log, blocking.
+
+        :param score: final score
+        :return: rank of the score, number of scores it ranks among, and
+            lines of high scores
+        """
+        if self.game.log is not None:
+            file = f"{self.name}-{self.game.rng.seed:x}-{self.game.rng.game}.dwlog"
+            self.game.log.save(os.path.join(self._log_dir, file))
+        s = self.scores()
         s.add((score, self.player.name, self.days))
         s.save()
-        s.print()
-        input()
-
-    def run(self) -> None:
-        """Start and run game."""
-        self.clear()
-        self.player = Player(self.name, STARTING_MONEY)
-        self._generate_cities()
-        for n in range(1, self.days + 1):
-            self._calc_interest()
-            self.current_day_num = n
-            day = Day(self.current_city, self.player)
-            self.current_day = day
-            if day.end_game:
-                input(day.event_text)
-                break
-            self.play_menu()
-        self._print_scores()
-        return self.start_menu()
+        rank, total = s.rank(score, self.days)
+        return rank, total, s.lines()
@@ -0,0 +1,155 @@
+"""Contain bounded price history with rolling statistics.
+
+A PriceHistory records every market the player sees: the day, and every
+drug's price, quantity and surge in that city.  The last `capacity`
+observations of each city are kept in fixed-size ring buffers, and running
+statistics of every (city, drug) pair are updated in O(1) per observation:
+Welford mean and variance, lowest and highest price, and the last surge
+seen.  Statistics cover every observation ever made, buffers only the most
+recent ones, so memory stays bounded however long a game lasts.
+"""
+import math
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+from dopewars.drugs import CATALOG
+
+HISTORY_CAPACITY = 64  # Observations kept per city
+
+
+class Quote(NamedTuple):
+    """Hold one recorded quote of a drug."""
+
+    day: int
+    price: int
+    quantity: int
+    surge: int
+
+
+class PriceStats(NamedTuple):
+    """Hold statistics of every price seen for a drug in a city."""
+
+    count: int
+    mean: float
+    std: float
+    low: int
+    high: int
+    last_surge: int  # Surge code, -1 if never seen
+
+
+class PriceHistory:
+    """Record markets as they are seen, per city and drug.
+
+    A city's market is recorded for every drug at once, so observations are
+    counted per city.  Ring buffers hold references to recorded markets, not
+    copies, and statistics are plain lists, so recording a day costs a few
+    microseconds and creating a history next to nothing.
+    """
+
+    def __init__(
+        self,
+        cities: int,
+        drugs: int = len(CATALOG),
+        capacity: int = HISTORY_CAPACITY,
+    ) -> None:
+        """
+        :param cities: number of cities
+        :param drugs: number of drugs
+        :param capacity: observations kept per city
+        """
+        self.capacity = capacity
+        self._drugs = drugs
+        self._buffers: List[list] = [[] for _ in range(cities)]
+        self._count = [0] * cities  # Observations of every city
+        self._mean = [[0.0] * drugs for _ in range(cities)]
+        self._m2 = [[0.0] * drugs for _ in range(cities)]  # Squared deviations
+        self._low = [[0] * drugs for _ in range(cities)]
+        self._high = [[0] * drugs for _ in range(cities)]
+        self._last_surge = [[-1] * drugs for _ in range(cities)]
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {sum(self._count)} observations"
+
+    def record(
+        self,
+        day: int,
+        city: int,
+        surges: Sequence[int],
+        prices: Sequence[int],
+        quantities: Sequence[int],
+    ) -> None:
+        """Record the market of `city` on `day`.
+
+        Sequences are kept as they are, and must not be modified afterwards.
+        :param day: day number
+        :param city: city index
+        :param surges: surge code of every drug
+        :param prices: price of every drug
+        :param quantities: quantity of every drug
+        """
+        buffer = self._buffers[city]
+        count = self._count[city] = self._count[city] + 1
+        if len(buffer) < self.capacity:
+            buffer.append((day, surges, prices, quantities))
+        else:
+            buffer[(count - 1) % self.capacity] = (day, surges, prices, quantities)
+        self._last_surge[city] = surges
+
+        mean, m2 = self._mean[city], self._m2[city]
+        low, high = self._low[city], self._high[city]
+        if count == 1:
+            low[:], high[:] = prices, prices
+        for drug, price in enumerate(prices):
+            delta = price - mean[drug]
+            mean[drug] += delta / count
+            m2[drug] += delta * (price - mean[drug])
+            if price < low[drug]:
+                low[drug] = price
+            elif price > high[drug]:
+                high[drug] = price
+
+    def stats(self, city: int, drug: int) -> PriceStats:
+        """Return statistics of every price of `drug` seen in `city`."""
+        count = self._count[city]
+        if not count:
+            return PriceStats(0, 0.0, 0.0, 0, 0, -1)
+        return PriceStats(
+            count,
+            self._mean[city][drug],
+            math.sqrt(self._m2[city][drug] / max(count - 1, 1)),
+            self._low[city][drug],
+            self._high[city][drug],
+            self._last_surge[city][drug],
+        )
+
+    def counts(self) -> np.ndarray:
+        """Return number of observations of every city."""
+        return np.array(self._count)
+
+    def means(self) -> np.ndarray:
+        """Return mean price of every drug in every city, 0 if never seen."""
+        return np.array(self._mean)
+
+    def variances(self) -> np.ndarray:
+        """Return sample variance of every drug's price in every city.
+
+        0 in cities seen fewer than twice.
+        """
+        return np.array(self._m2) / np.maximum(self.counts() - 1, 1)[:, None]
+
+    def averages(self) -> List[float]:
+        """Return mean price of every drug over every city, NaN if never seen."""
+        counts = self.counts()
+        if not counts.any():
+            return [math.nan] * self._drugs
+        return list((self.means() * counts[:, None]).sum(axis=0) / counts.sum())
+
+    def recent(self, city: int, drug: int) -> List[Quote]:
+        """Return quotes of `drug` in `city` still kept, oldest first."""
+        buffer = self._buffers[city]
+        start = self._count[city] % len(buffer) if buffer else 0
+        return [
+            Quote(day, prices[drug], quantities[drug], surges[drug])
+            for day, surges, prices, quantities in buffer[start:] + buffer[:start]
+        ]
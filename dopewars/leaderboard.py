@@ -0,0 +1,188 @@
+"""Contain an in-memory leaderboard with instant rank queries.
+
+A Leaderboard indexes every score ever saved, overall and per number of
+turns, so that a finishing player can be told where they placed however
+many scores there are, not only whether they made the top five.
+
+RankIndex is the order-statistic structure underneath: a sorted list split
+into buckets of about LOAD items, with a Fenwick tree over bucket lengths.
+Finding an item's bucket and counting the items before it are both
+O(log n); inserting into a bucket moves at most 2 * LOAD references, which
+is a single memmove.
+"""
+from bisect import bisect_left, insort
+from itertools import chain, islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+Score = Tuple[int, str, int]  # Final score, player name, number of turns
+
+LOAD = 512  # Items per bucket, buckets are split beyond twice as many
+
+
+class RankIndex:
+    """Hold a sorted multiset, answering how many items precede any value."""
+
+    def __init__(self, items: Iterable = (), load: int = LOAD) -> None:
+        """
+        :param items: initial items, in any order
+        :param load: items per bucket
+        """
+        items = sorted(items)
+        self._load = load
+        self._len = len(items)
+        self._buckets = [items[i : i + load] for i in range(0, len(items), load)]
+        self._maxes = [bucket[-1] for bucket in self._buckets]
+        self._tree: List[int] = []
+        self._build()
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self._len} items"
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator:
+        return chain.from_iterable(self._buckets)
+
+    def _build(self) -> None:
+        """Rebuild Fenwick tree of bucket lengths in O(buckets)."""
+        tree = [0] + [len(bucket) for bucket in self._buckets]
+        for index in range(1, len(tree)):
+            parent = index + (index & -index)
+            if parent < len(tree):
+                tree[parent] += tree[index]
+        self._tree = tree
+
+    def _before(self, bucket: int) -> int:
+        """Return number of items in buckets before `bucket`."""
+        total, tree = 0, self._tree
+        while bucket:
+            total += tree[bucket]
+            bucket &= bucket - 1
+        return total
+
+    def add(self, item) -> None:
+        """Insert `item`, after any equal items."""
+        self._len += 1
+        if not self._buckets:
+            self._buckets.append([item])
+            self._maxes.append(item)
+            self._build()
+            return
+        index = min(bisect_left(self._maxes, item), len(self._buckets) - 1)
+        bucket = self._buckets[index]
+        insort(bucket, item)
+        self._maxes[index] = bucket[-1]
+        if len(bucket) > 2 * self._load:
+            half = bucket[self._load :]
+            del bucket[self._load :]
+            self._buckets.insert(index + 1, half)
+            self._maxes[index : index + 1] = [bucket[-1], half[-1]]
+            self._build()  # Once every LOAD inserts at most
+            return
+        tree, node = self._tree, index + 1
+        while node < len(tree):
+            tree[node] += 1
+            node += node & -node
+
+    def bisect_left(self, item) -> int:
+        """Return number of items less than `item`."""
+        index = bisect_left(self._maxes, item)
+        if index == len(self._buckets):
+            return self._len
+        return self._before(index) + bisect_left(self._buckets[index], item)
+
+    def head(self, n: int) -> list:
+        """Return the `n` smallest items, smallest first."""
+        return list(islice(iter(self), n))
+
+
+def _entry(score: Score) -> tuple:
+    """Return index entry of `score`, entries sort best score first."""
+    points, name, turns = score
+    return -points, name, turns
+
+
+def _score(entry: tuple) -> Score:
+    """Return score of index `entry`, see _entry."""
+    points, name, turns = entry
+    return -points, name, turns
+
+
+class Leaderboard:
+    """Rank scores overall, per number of turns and per player.
+
+    Ranks are competition ranks: tied scores share a rank, the one of the
+    first of them.
+    """
+
+    def __init__(self, scores: Iterable[Score] = ()) -> None:
+        """
+        :param scores: scores to start with
+        """
+        scores = list(scores)
+        brackets: Dict[int, List[tuple]] = {}
+        self._best: Dict[str, Score] = {}
+        for score in scores:
+            brackets.setdefault(score[2], []).append(_entry(score))
+            self._keep_best(score)
+        self._all = RankIndex(map(_entry, scores))
+        self._brackets = {turns: RankIndex(e) for turns, e in brackets.items()}
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {len(self._all)} scores"
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def _keep_best(self, score: Score) -> None:
+        """Record `score` if it is its player's best."""
+        best = self._best.get(score[1])
+        if best is None or score[0] > best[0]:
+            self._best[score[1]] = score
+
+    def _index(self, turns: Optional[int]) -> RankIndex:
+        """Return index of every score, or of games `turns` long."""
+        if turns is None:
+            return self._all
+        return self._brackets.get(turns) or RankIndex()
+
+    def add(self, score: Score) -> None:
+        """Add a score.
+
+        :param score: final score, player name, number of turns
+        """
+        entry = _entry(score)
+        self._all.add(entry)
+        if score[2] in self._brackets:
+            self._brackets[score[2]].add(entry)
+        else:
+            self._brackets[score[2]] = RankIndex([entry])
+        self._keep_best(score)
+
+    def count(self, turns: int = None) -> int:
+        """Return number of scores.
+
+        :param turns: only count scores of games this many turns long
+        """
+        return len(self._index(turns))
+
+    def rank(self, points: int, turns: int = None) -> int:
+        """Return rank `points` has or would have, 1 for the best score.
+
+        :param points: final score
+        :param turns: rank among games this many turns long only
+        """
+        return self._index(turns).bisect_left((-points,)) + 1
+
+    def top(self, n: int, turns: int = None) -> List[Score]:
+        """Return the `n` best scores, best first.
+
+        :param n: number of scores
+        :param turns: only return scores of games this many turns long
+        """
+        return [_score(entry) for entry in self._index(turns).head(n)]
+
+    def best(self, name: str) -> Optional[Score]:
+        """Return best score of player `name`, None if they have none."""
+        return self._best.get(name)
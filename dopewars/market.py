@@ -0,0 +1,396 @@
+"""Contain vectorized market generation.
+
+MarketGenerator generates surges, prices and quantities for every drug in
+every city for one or more turns in a single batched call, following the
+same rules as Drug._calc_surge, Drug._calc_price and Drug._calc_quantity.
+
+CounterMarket follows the same rules, but every quote is a pure function of
+(key, day, city, drug) computed with a counter-based generator, so any
+city's market on any day can be produced on demand without generating the
+days before it.  Told the number of cities, it computes the markets of
+every city for CHUNK days in one vectorized block the first time one of
+them is asked for, as a game looks at most of them sooner or later.
+
+PersistentMarket builds on CounterMarket's draws, but every city's market
+carries state over from one turn to the next: a mean-reverting price level,
+and supply depleted by purchases.
+"""
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from dopewars.drugs import CATALOG, DrugSpec, Surge
+from dopewars.rng import GOLDEN, MASK, MIX1, MIX2, UNIT, hash64
+
+
+class MarketBlock(NamedTuple):
+    """Hold generated market arrays, each shaped (turns, cities, drugs)."""
+
+    surge: np.ndarray
+    price: np.ndarray
+    quantity: np.ndarray
+
+
+class MarketGenerator:
+    """Generate markets for a fixed list of drugs."""
+
+    def __init__(self, catalog: Sequence[DrugSpec] = CATALOG) -> None:
+        """
+        :param catalog: drugs on offer, in ID order
+        """
+        self.specs = tuple(catalog)
+        self.names = tuple(spec.name for spec in catalog)
+        self.base_price = np.array([s.base_price for s in catalog], dtype=np.int64)
+        self.jitter = np.array([s.jitter for s in catalog], dtype=np.int64)
+        self._floor = (0.15 * self.base_price).astype(np.int64)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}"
+
+    def generate(
+        self, rng: np.random.Generator, turns: int = 1, cities: int = 1
+    ) -> MarketBlock:
+        """Generate markets for `turns` turns in `cities` cities.
+
+        :param rng: numpy random generator
+        :param turns: number of turns
+        :param cities: number of cities
+        :return: MarketBlock of arrays shaped (turns, cities, drugs), surges
+            are Surge codes
+        """
+        shape = (turns, cities, len(self.names))
+        chance = rng.integers(1, 101, size=shape)
+        surge = np.zeros(shape, dtype=np.int8)
+        surge[chance > 80] = Surge.HI
+        surge[(chance > 60) & (chance <= 80)] = Surge.LO
+        hi = surge == Surge.HI
+        lo = surge == Surge.LO
+
+        # 1.5-3x as much on a hi surge, 0.33-0.67x as much on a lo surge
+        base = np.broadcast_to(self.base_price, shape).copy()
+        base[hi] = base[hi] * rng.integers(15, 31, size=hi.sum()) // 10
+        base[lo] = base[lo] * rng.integers(33, 68, size=lo.sum()) // 100
+        price = base + rng.integers(-self.jitter, self.jitter + 1, size=shape)
+        np.maximum(price, self._floor, out=price)  # Price floor is 15% of base
+
+        quantity = rng.integers(5, 101, size=shape)
+        quantity[hi] = np.maximum(quantity[hi] // 3, 8)
+        quantity[lo] *= 3
+        return MarketBlock(surge, price, quantity)
+
+
+FIELD = 21  # Bits per packed draw
+FIELD_MASK = (1 << FIELD) - 1
+DRAW_BITS, DRUG_BITS, CITY_BITS = 1, 12, 8
+NONE, HI, LO = int(Surge.NONE), int(Surge.HI), int(Surge.LO)  # Plain int codes
+
+CHUNK = 32  # Days of markets a CounterMarket computes at once
+CACHED_CHUNKS = 4  # Chunks a CounterMarket keeps
+
+PERSISTENCE = 0.5  # Share of a persistent market's price level kept per turn
+REPLENISH = 0.5  # Share of a persistent market's missing supply restocked
+
+
+def _counter(day: int, city: int, drug: int) -> int:
+    """Return counter of the first hash for `drug` in `city` on `day`.
+
+    Every drug gets two hashes: the first packs three 21-bit draws (surge
+    chance, surge multiplier and quantity), the second is the price jitter.
+    """
+    return (((day << CITY_BITS) | city) << DRUG_BITS | drug) << DRAW_BITS
+
+
+def _hashes(key, counters: np.ndarray) -> np.ndarray:
+    """Return hash64 of every uint64 in `counters`, wrapping modulo 2**64.
+
+    :param key: stream key, or uint64 array of keys broadcasting with counters
+    """
+    z = np.asarray(key, dtype=np.uint64) + (counters + np.uint64(1)) * np.uint64(GOLDEN)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(MIX1)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(MIX2)
+    return z ^ (z >> np.uint64(31))
+
+
+class CounterMarket:
+    """Compute markets on demand as a pure function of (key, day, city, drug).
+
+    Each quote hashes its own counters, so quotes are O(1) and independent of
+    which other quotes were computed, and in which order.  quote, day and
+    block all return the same numbers for the same coordinates.
+    """
+
+    def __init__(
+        self, key: int, catalog: Sequence[DrugSpec] = CATALOG, cities: int = None
+    ) -> None:
+        """
+        :param key: 64-bit market key, see GameRNG.market_key
+        :param catalog: drugs on offer, in ID order
+        :param cities: number of cities, to compute and keep the markets of
+            every city CHUNK days at a time, see day
+        """
+        self.key = key & MASK
+        self.specs = tuple(catalog)
+        self._cities = cities
+        self._chunks: Dict[int, MarketBlock] = {}  # Keyed by day // CHUNK
+        self._base = np.array([s.base_price for s in catalog], dtype=np.int64)
+        self._jitter = np.array([s.jitter for s in catalog], dtype=np.int64)
+        self._floor = (0.15 * self._base).astype(np.int64)
+        drugs = np.arange(len(catalog), dtype=np.uint64)[:, None]
+        draws = np.arange(1 << DRAW_BITS, dtype=np.uint64)
+        self._draws = (drugs << np.uint64(DRAW_BITS)) | draws  # (drugs, hashes)
+        self._ids = range(len(catalog))
+        # Base price, jitter, jitter span and price floor of every drug
+        self._rules = [
+            (s.base_price, s.jitter, 2 * s.jitter + 1, int(0.15 * s.base_price))
+            for s in catalog
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.key:#x}"
+
+    def quote(self, day: int, city: int, drug: int) -> Tuple[int, int, int]:
+        """Return surge, price and quantity of one drug.
+
+        :param day: day number
+        :param city: city index
+        :param drug: drug ID
+        """
+        return self._quotes(day, city, [drug])[0]
+
+    def day(self, day: int, city: int) -> Tuple[List[int], List[int], List[int]]:
+        """Return surges, prices and quantities of every drug, in ID order.
+
+        Markets of cities beyond those given at creation are quoted on
+        their own.
+        :param day: day number
+        :param city: city index
+        """
+        if self._cities is None or city >= self._cities:
+            quotes = self._quotes(day, city, self._ids)
+            return tuple(map(list, zip(*quotes)))
+        chunk, index = divmod(day, CHUNK)
+        block = self._chunks.get(chunk)
+        if block is None:
+            if len(self._chunks) == CACHED_CHUNKS:
+                del self._chunks[next(iter(self._chunks))]  # Oldest
+            start = chunk * CHUNK
+            block = self.block(range(start, start + CHUNK), range(self._cities))
+            self._chunks[chunk] = block
+        return tuple(column[index, city].tolist() for column in block)
+
+    def _quotes(
+        self, day: int, city: int, drugs: Sequence[int]
+    ) -> List[Tuple[int, int, int]]:
+        """Return surge, price and quantity of each of `drugs`.
+
+        Scalar twin of block, pure Python is faster for a single day.
+        """
+        key = self.key
+        quotes = []
+        for drug in drugs:
+            counter = _counter(day, city, drug)
+            packed = hash64(key, counter)
+            base, jitter, span, floor = self._rules[drug]
+            chance = 1 + ((packed & FIELD_MASK) * 100 >> FIELD)
+            multiplier = packed >> FIELD & FIELD_MASK
+            quantity = 5 + ((packed >> 2 * FIELD & FIELD_MASK) * 96 >> FIELD)
+            if chance > 80:
+                surge = HI
+                base = base * (15 + (multiplier * 16 >> FIELD)) // 10
+                quantity = max(quantity // 3, 8)
+            elif chance > 60:
+                surge = LO
+                base = base * (33 + (multiplier * 35 >> FIELD)) // 100
+                quantity *= 3
+            else:
+                surge = NONE
+            uniform = (hash64(key, counter + 1) >> 11) * UNIT
+            price = max(base + int(uniform * span) - jitter, floor)
+            quotes.append((surge, price, quantity))
+        return quotes
+
+    def block(self, days: Sequence[int], cities: Sequence[int]) -> MarketBlock:
+        """Return markets of every drug for each of `days` in each of `cities`.
+
+        :param days: day numbers
+        :param cities: city indexes
+        :return: MarketBlock of arrays shaped (days, cities, drugs)
+        """
+        days = np.asarray(days, dtype=np.uint64)[:, None, None, None]
+        cities = np.asarray(cities, dtype=np.uint64)[None, :, None, None]
+        return self._block(self.key, days, cities)
+
+    def games(
+        self, keys: Sequence[int], days: Sequence[int], cities: Sequence[int]
+    ) -> MarketBlock:
+        """Return markets of every drug for many games, each on its own day.
+
+        The key given at creation is ignored, game n's market is the one
+        CounterMarket(keys[n]) quotes on days[n] in cities[n].
+        :param keys: 64-bit market key of every game
+        :param days: day number of every game
+        :param cities: city index of every game
+        :return: MarketBlock of arrays shaped (games, drugs)
+        """
+        keys = np.asarray(keys, dtype=np.uint64)[:, None, None]
+        days = np.asarray(days, dtype=np.uint64)[:, None, None]
+        cities = np.asarray(cities, dtype=np.uint64)[:, None, None]
+        return self._block(keys, days, cities)
+
+    def _block(self, key, days: np.ndarray, cities: np.ndarray) -> MarketBlock:
+        """Return markets of every drug, see block.
+
+        :param key: market key, or uint64 array of keys broadcasting with
+            days and cities
+        :param days: uint64 day numbers, drugs and hashes on the last two axes
+        :param cities: uint64 city indexes, shaped like days
+        """
+        surge, base, jitter, quantity = self.draws(key, days, cities)
+        price = np.maximum(base + jitter, self._floor)  # Floor is 15% of base
+        return MarketBlock(surge, price, supply(quantity, surge))
+
+    def draws(
+        self, key, days: np.ndarray, cities: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return the draws markets are made of, see _block's parameters.
+
+        :return: surge codes, base prices multiplied by the surge, price
+            jitter, and quantities before the surge's effect, see supply
+        """
+        shift = np.uint64(DRUG_BITS + DRAW_BITS)
+        offset = ((days << np.uint64(CITY_BITS)) | cities) << shift
+        hashes = _hashes(key, offset | self._draws)
+        packed, jitter = hashes[..., 0], hashes[..., 1]
+
+        def field(index: int, *spans: int) -> Tuple[np.ndarray, ...]:
+            """Return draw number `index` of `packed`, scaled to [0, span)."""
+            bits = packed >> np.uint64(index * FIELD) & np.uint64(FIELD_MASK)
+            return tuple(
+                (bits * np.uint64(span) >> np.uint64(FIELD)).astype(np.int64)
+                for span in spans
+            )
+
+        chance = 1 + field(0, 100)[0]
+        hi = chance > 80
+        lo = (chance > 60) & ~hi
+        surge = np.where(hi, HI, np.where(lo, LO, NONE))
+
+        # 1.5-3x as much on a hi surge, 0.33-0.67x as much on a lo surge, as
+        # percentages: base * x // 10 is base * 10x // 100 exactly
+        above, below = field(1, 16, 35)
+        percent = np.where(hi, 150 + 10 * above, np.where(lo, 33 + below, 100))
+        base = self._base * percent // 100
+        uniform = (jitter >> np.uint64(11)) * UNIT
+        jitter = (uniform * (2 * self._jitter + 1)).astype(np.int64) - self._jitter
+        return surge.astype(np.int8), base, jitter, 5 + field(2, 96)[0]
+
+
+def supply(quantity: np.ndarray, surge: np.ndarray) -> np.ndarray:
+    """Return quantities on offer given `surge`, see Drug._calc_quantity.
+
+    :param quantity: quantities drawn from 5-100
+    :param surge: Surge codes
+    """
+    quantity = np.where(surge == HI, np.maximum(quantity // 3, 8), quantity)
+    return np.where(surge == LO, quantity * 3, quantity)
+
+
+class PersistentMarket:
+    """Carry every city's market over from one turn to the next.
+
+    Quotes follow the same rules as CounterMarket's, drawn from the same
+    counters, with two kinds of memory:
+
+    * Every (city, drug) has a price level, the log of its price relative
+      to the base price.  Each turn the level decays towards 0 by
+      `persistence` and the day's surge multiplier is added to it, so surges
+      fade out over a few turns instead of vanishing overnight.  Levels
+      at least those of the mildest surges a draw can make are reported as
+      surges, and prices are rounded to the nearest dollar, so without
+      persistence quotes are exactly those of CounterMarket.
+    * Supply is depleted by purchases, see take, and replenishes towards the
+      day's quantity by `replenish` of the difference every turn.
+
+    All cities and drugs advance together in one vectorized step per turn,
+    see advance.  Only the current day's quotes are known.
+    """
+
+    def __init__(
+        self,
+        key: int,
+        cities: int,
+        catalog: Sequence[DrugSpec] = CATALOG,
+        persistence: float = PERSISTENCE,
+        replenish: float = REPLENISH,
+    ) -> None:
+        """
+        :param key: 64-bit market key, see GameRNG.market_key
+        :param cities: number of cities
+        :param catalog: drugs on offer, in ID order
+        :param persistence: share of the price level kept every turn
+        :param replenish: share of missing supply restocked every turn
+        """
+        self.counter = CounterMarket(key, catalog)
+        self.key = self.counter.key
+        self.persistence = persistence
+        self.replenish = replenish
+        self._cities = np.arange(cities, dtype=np.uint64)[:, None, None]
+        # Levels of the mildest hi and lo surges, see CounterMarket.draws
+        base = self.counter._base
+        self._hi = np.log(base * 15 // 10 / base)
+        self._lo = np.log(base * 67 // 100 / base)
+        shape = (cities, len(catalog))
+        self.today = 0
+        self.level = np.zeros(shape)
+        self.surge = np.zeros(shape, dtype=np.int8)
+        self.price = np.zeros(shape, dtype=np.int64)
+        self.quantity = np.zeros(shape, dtype=np.int64)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.key:#x} day {self.today}"
+
+    def advance(self, day: int) -> None:
+        """Move every city's market on to `day`.
+
+        :param day: day number, the turn after the current one
+        """
+        counter, base = self.counter, self.counter._base
+        days = np.full_like(self._cities, day)
+        _, surged, jitter, quantity = counter.draws(counter.key, days, self._cities)
+        self.level *= self.persistence
+        self.level += np.log(surged / base)
+        self.surge[...] = np.where(
+            self.level >= self._hi,
+            HI,
+            np.where(self.level <= self._lo, LO, NONE),
+        )
+        target = supply(quantity, self.surge)
+        if self.today:
+            missing = target - self.quantity
+            self.quantity += np.ceil(self.replenish * missing).astype(np.int64)
+        else:
+            self.quantity[...] = target
+        price = np.rint(base * np.exp(self.level)).astype(np.int64) + jitter
+        np.maximum(price, counter._floor, out=self.price)
+        self.today = day
+
+    def day(self, day: int, city: int) -> Tuple[List[int], List[int], List[int]]:
+        """Return surges, prices and quantities of every drug, in ID order.
+
+        :param day: day number, must be the current day
+        :param city: city index
+        """
+        if day != self.today:
+            raise ValueError("A persistent market only knows today's quotes")
+        return (
+            self.surge[city].tolist(),
+            self.price[city].tolist(),
+            self.quantity[city].tolist(),
+        )
+
+    def take(self, city: int, drug: int, quantity: int) -> None:
+        """Deplete supply of `drug` in `city` by `quantity` bought."""
+        self.quantity[city, drug] -= quantity
+
+
+MARKET = MarketGenerator()
@@ -0,0 +1,264 @@
+"""Contain optional game metrics.
+
+Metrics instruments individual games, renderers and input functions by
+wrapping their methods on the instance, so the classes themselves carry no
+instrumentation at all: with metrics off nothing is measured and nothing
+costs anything, with metrics on each instrumented call pays for one extra
+function call.  Counters and timings can be exported in the Prometheus text
+format (for node_exporter's textfile collector) or as JSON, on demand or
+periodically as turns go by.
+
+    python start.py play --metrics /tmp/dopewars.prom
+    python start.py serve --metrics /tmp/dopewars.json
+"""
+import json
+import os
+import tempfile
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Tuple
+
+from dopewars.events import EVENT_NAMES
+
+# Upper bounds of histogram buckets, in seconds
+BUCKETS = (1e-5, 1e-4, 1e-3, 0.01, 0.1, 1.0, 10.0, 100.0, 1000.0)
+DUMP_INTERVAL = 10.0  # Seconds between periodic dumps
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Counter:
+    """Count occurrences of something."""
+
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, amount: int = 1) -> None:
+        """Increment counter by `amount`."""
+        self.value += amount
+
+
+class Histogram:
+    """Count durations into buckets, keeping their sum."""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float) -> None:
+        """Record a duration."""
+        self.sum += seconds
+        self.count += 1
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+
+
+def _labels(labels: Labels) -> str:
+    """Return labels in Prometheus syntax."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    """Hold counters and timings of one or many game sessions.
+
+    Timings:
+        turn: from a Day's creation until the turn ends with a move
+        render: writing frames to the terminal or socket
+        logic: running menus and the game on the player's input
+        input: waiting for the player
+    """
+
+    def __init__(self, file: str = None, interval: float = DUMP_INTERVAL) -> None:
+        """
+        :param file: dump metrics here periodically, see Metrics.dump
+        :param interval: minimum seconds between periodic dumps
+        """
+        self.file = file
+        self.interval = interval
+        self._next_dump = time.monotonic() + interval
+        self._help: Dict[str, Tuple[str, str]] = {}  # Name: (type, help)
+        self._metrics: Dict[str, Dict[Labels, object]] = {}
+        self.turn = self.histogram("dopewars_turn_seconds", "Turn latency")
+        self.render = self.histogram("dopewars_render_seconds", "Time rendering")
+        self.logic = self.histogram("dopewars_logic_seconds", "Time in game logic")
+        self.input = self.histogram("dopewars_input_seconds", "Time awaiting input")
+        self.trades = {
+            side: self.counter("dopewars_trades_total", "Trades", side=side)
+            for side in ("buy", "sell")
+        }
+        self.bank = {
+            kind: self.counter("dopewars_bank_total", "Bank transactions", type=kind)
+            for kind in ("deposit", "withdraw")
+        }
+        self.events = [
+            self.counter("dopewars_events_total", "Events fired", event=name)
+            for name in EVENT_NAMES
+        ]
+        self.weapon_saves = [
+            self.counter("dopewars_weapon_saves_total", "Weapon saves", event=name)
+            for name in EVENT_NAMES
+        ]
+        self.games = {
+            reason: self.counter("dopewars_games_total", "Games over", end=reason)
+            for reason in ("finished", "busted")
+        }
+
+    def _register(self, kind: str, name: str, help_: str, labels: dict, metric):
+        """Return metric `name` with `labels`, creating it as `metric`."""
+        self._help.setdefault(name, (kind, help_))
+        key = tuple(sorted(labels.items()))
+        return self._metrics.setdefault(name, {}).setdefault(key, metric)
+
+    def counter(self, name: str, help_: str, **labels: str) -> Counter:
+        """Return counter `name` with `labels`, creating it if needed."""
+        return self._register("counter", name, help_, labels, Counter())
+
+    def histogram(self, name: str, help_: str, **labels: str) -> Histogram:
+        """Return histogram `name` with `labels`, creating it if needed."""
+        return self._register("histogram", name, help_, labels, Histogram())
+
+    @staticmethod
+    def timed(function: Callable, histogram: Histogram) -> Callable:
+        """Return `function` wrapped to record how long each call takes."""
+
+        @wraps(function)
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return timed
+
+    @staticmethod
+    def timed_async(function: Callable, histogram: Histogram) -> Callable:
+        """Return coroutine `function` wrapped to record how long calls take."""
+
+        @wraps(function)
+        async def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return await function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return timed
+
+    def instrument_renderer(self, renderer) -> None:
+        """Time `renderer`'s writes."""
+        renderer.flush = self.timed(renderer.flush, self.render)
+
+    def instrument_game(self, game) -> None:
+        """Count trades, bank transactions, events and turn latency of `game`."""
+
+        def count(method: Callable, counter: Counter) -> Callable:
+            @wraps(method)
+            def counted(*args, **kwargs):
+                result = method(*args, **kwargs)
+                counter.inc()
+                return result
+
+            return counted
+
+        game.buy = count(game.buy, self.trades["buy"])
+        game.sell = count(game.sell, self.trades["sell"])
+        game.deposit = count(game.deposit, self.bank["deposit"])
+        game.withdraw = count(game.withdraw, self.bank["withdraw"])
+        start_day, end_game = game._start_day, game._end_game
+        turn_started = [time.perf_counter()]
+        if game.current_day.event is not None:
+            self.events[game.current_day.event].inc()
+
+        @wraps(start_day)
+        def _start_day() -> None:
+            self.turn.observe(time.perf_counter() - turn_started[0])
+            weapon = game.player.weapon
+            start_day()
+            turn_started[0] = time.perf_counter()
+            event = game.current_day.event
+            if event is not None:
+                self.events[event].inc()
+                if weapon is not None and game.player.weapon is None:
+                    self.weapon_saves[event].inc()  # Weapon spent defeating it
+            if self.file is not None and time.monotonic() >= self._next_dump:
+                self.dump()
+
+        @wraps(end_game)
+        def _end_game() -> None:
+            if not game.busted:
+                self.turn.observe(time.perf_counter() - turn_started[0])
+            self.games["busted" if game.busted else "finished"].inc()
+            end_game()
+
+        game._start_day = _start_day
+        game._end_game = _end_game
+
+    def prometheus(self) -> str:
+        """Return metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, series in self._metrics.items():
+            kind, help_ = self._help[name]
+            lines.append(f"# HELP {name} {help_}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series.items():
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {metric.value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, metric.counts):
+                    cumulative += count
+                    bucket = _labels(labels + (("le", repr(bound)),))
+                    lines.append(f"{name}_bucket{bucket} {cumulative}")
+                bucket = _labels(labels + (("le", "+Inf"),))
+                lines.append(f"{name}_bucket{bucket} {metric.count}")
+                lines.append(f"{name}_sum{_labels(labels)} {metric.sum}")
+                lines.append(f"{name}_count{_labels(labels)} {metric.count}")
+        return "\n".join(lines) + "\n"
+
+    def as_dict(self) -> Dict[str, List[dict]]:
+        """Return metrics as JSON serializable data."""
+        data = {}
+        for name, series in self._metrics.items():
+            data[name] = []
+            for labels, metric in series.items():
+                sample = {"labels": dict(labels)}
+                if isinstance(metric, Counter):
+                    sample["value"] = metric.value
+                else:
+                    sample.update(count=metric.count, sum=metric.sum)
+                    sample["buckets"] = dict(zip(map(repr, BUCKETS), metric.counts))
+                data[name].append(sample)
+        return data
+
+    def dump(self, file: str = None) -> None:
+        """Atomically write metrics to `file`.
+
+        Files ending in .json get JSON, anything else the Prometheus format.
+        :param file: destination, defaults to the file given at creation
+        """
+        file = file or self.file
+        self._next_dump = time.monotonic() + self.interval
+        if file.endswith(".json"):
+            text = json.dumps({"time": time.time(), "metrics": self.as_dict()})
+        else:
+            text = self.prometheus()
+        directory = os.path.dirname(os.path.abspath(file))
+        fd, temp = tempfile.mkstemp(prefix=".metrics-", dir=directory)
+        try:
+            with os.fdopen(fd, "w") as out:
+                out.write(text)
+            os.chmod(temp, 0o644)
+            os.replace(temp, file)
+        except BaseException:
+            os.unlink(temp)
+            raise
@@ -1,9 +1,10 @@
 """
 Contains Player definition
 """
-from random import choice, randint
+from typing import List, Union
 
-from dopewars.drugs import Drug, InventoryDrug
+from dopewars.drugs import Drug, Inventory, drug_id
+from dopewars.rng import GameRNG
 from dopewars.weapons import Weapon
 
 
@@ -12,10 +13,18 @@ class Player:
     Defines how the player works, contains money and inventory
     """
 
-    def __init__(self, name: str, money: int) -> None:
+    __slots__ = ("name", "rng", "_money", "inv", "_weapon")
+
+    def __init__(self, name: str, money: int, rng: GameRNG = None) -> None:
+        """
+        :param name: player name
+        :param money: starting money
+        :param rng: game's random streams, a fresh unseeded one if omitted
+        """
         self.name = name
+        self.rng = rng or GameRNG()
         self._money = money
-        self.inv: dict[str:InventoryDrug] = {}
+        self.inv = Inventory()
         self._weapon: Weapon = None
 
     def __str__(self):
@@ -69,39 +78,45 @@ class Player:
         price = quantity * drug.price
         if self._money < price:
             raise RuntimeError("Insufficient funds")
-        purchase = InventoryDrug(drug.name, quantity)
+        if drug.id is None:
+            raise RuntimeError("Drug not found")
         drug.quantity -= quantity
-        if self.inv.get(drug.name) is None:
-            self.inv[drug.name] = purchase
-        else:
-            self.inv[drug.name] += purchase
+        self.inv.add(drug.id, quantity)
         self._money -= price
 
-    def sell(self, drug_name: str, quantity: int, price: int) -> None:
+    def sell(self, drug: Union[int, str], quantity: int, price: int) -> None:
         """Implement drug sale interface.
 
-        :param drug_name:
+        :param drug: drug ID or name
         :param quantity:
         :param price:
         :return:
         """
-        if self.inv.get(drug_name) is None:
-            raise RuntimeError("Drug not found")  # Shouldn't be needed?
-        self._money += self.inv[drug_name].sell(quantity, price)
-        if self.inv[drug_name].quantity == 0:
-            del self.inv[drug_name]
+        drug = drug_id(drug)
+        if not self.inv.quantity(drug):
+            raise RuntimeError("Drug not found")
+        if quantity <= 0 or price < 0:
+            raise RuntimeError("Sale price and quantities must be greater than zero")
+        self.inv.remove(drug, quantity)
+        self._money += quantity * price
 
     def print_inv(self) -> None:
         """Print styled contents of inventory."""
+        print("\n".join(self.inv_lines()))
+
+    def inv_lines(self) -> List[str]:
+        """Return lines of styled contents of inventory."""
+        lines = []
         if self.weapon:
-            print(f"Weapon: {self.weapon}")
-            print("-" * 36)
-        print("Inventory")
+            lines.append(f"Weapon: {self.weapon}")
+            lines.append("-" * 36)
+        lines.append("Inventory")
         if not self.inv:
-            print("You have no product.")
+            lines.append("You have no product.")
         else:
-            for key, value in self.inv.items():
-                print(f"{key}: {value.quantity}")
+            for name, quantity in self.inv.items():
+                lines.append(f"{name}: {quantity}")
+        return lines
 
     def steal_money(self) -> str:
         """Steal money from player.
@@ -109,7 +124,7 @@ class Player:
         When called, randomly removes 5-15% of money
         :return string describing what was removed.
         """
-        amount = int(randint(5, 15) / 100 * self._money)
+        amount = int(self.rng.theft.randint(5, 15) / 100 * self._money)
         if amount == 0:
             return "A thief tried to steal from you, but you are flat broke!"
         self._money -= amount
@@ -124,7 +139,7 @@ class Player:
         """
         if not self.inv:
             return "Nothing to take!"
-        name, drug = choice(list(self.inv.items()))
-        quantity = max(1, int(drug.quantity / 4))
+        name, held = self.rng.theft.choice(list(self.inv.items()))
+        quantity = max(1, int(held / 4))
         self.sell(name, quantity, price=0)
         return f"{quantity} of {name} were confiscated!"
@@ -0,0 +1,97 @@
+"""Contain frame-buffered terminal renderer.
+
+Screens are built line by line into a buffer and written to the terminal
+in a single write, using ANSI escape sequences instead of spawning a
+`clear` subprocess.  Optionally only the lines that changed since the
+previous screen are redrawn.
+"""
+import os
+import sys
+from typing import List, TextIO
+
+HOME = "\x1b[H"
+CLEAR_SCREEN = "\x1b[2J"
+CLEAR_LINE = "\x1b[K"
+CLEAR_BELOW = "\x1b[J"
+
+
+def move_to(row: int) -> str:
+    """Return escape sequence moving the cursor to the start of `row`.
+
+    :param row: zero based row
+    """
+    return f"\x1b[{row + 1};1H"
+
+
+class Renderer:
+    """Buffer screens and emit each one in a single write.
+
+    Lines added since the last clear form the current frame.  flush writes
+    whatever the terminal hasn't seen yet followed by a prompt; echo records
+    the player's answer, which the terminal displays after the prompt.
+    """
+
+    def __init__(self, stream: TextIO = None, diff: bool = False) -> None:
+        """
+        :param stream: where to write frames, defaults to sys.stdout
+        :param diff: only redraw lines that changed since the previous screen
+        """
+        if os.name == "nt":
+            os.system("")  # Enables escape sequences in Windows consoles
+        self._stream = stream or sys.stdout
+        self._diff = diff
+        self._frame: List[str] = []
+        self._screen: List[str] = []  # Lines currently on the terminal
+        self._written = 0  # Lines of the frame already on the terminal
+        self._new_screen = True
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}"
+
+    def clear(self) -> None:
+        """Start a new screen."""
+        if not self._new_screen:
+            self._screen = self._frame
+        self._frame = []
+        self._written = 0
+        self._new_screen = True
+
+    def print(self, *lines: str) -> None:
+        """Add lines to the current frame, splitting on newlines."""
+        for line in lines:
+            self._frame.extend(str(line).split("\n"))
+
+    def _redraw(self) -> List[str]:
+        """Return chunks drawing the whole frame over the previous screen."""
+        if not self._diff or not self._screen:
+            return [HOME, CLEAR_SCREEN, "\n".join(self._frame)]
+        chunks = []
+        last = max(len(self._frame) - 1, 0)
+        for row, line in enumerate(self._frame[:last]):
+            if row >= len(self._screen) or self._screen[row] != line:
+                chunks.extend((move_to(row), line, CLEAR_LINE))
+        # Redraw the last line after clearing leftovers of a longer screen
+        chunks.extend((move_to(last), CLEAR_BELOW, "\n".join(self._frame[last:])))
+        return chunks
+
+    def flush(self, prompt: str = "") -> None:
+        """Write pending lines and `prompt` in one go.
+
+        :param prompt: text to leave the cursor after
+        """
+        if self._new_screen:
+            chunks = self._redraw()
+            self._new_screen = False
+        else:
+            chunks = ["\n".join(self._frame[self._written :])]
+        if self._frame and self._written < len(self._frame):
+            chunks.append("\n")
+        chunks.append(prompt)
+        self._frame.append(prompt)
+        self._written = len(self._frame)
+        self._stream.write("".join(chunks))
+        self._stream.flush()
+
+    def echo(self, answer: str) -> None:
+        """Record `answer`, as the terminal echoed it after the prompt."""
+        self._frame[-1] += answer
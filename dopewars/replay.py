@@ -0,0 +1,129 @@
+"""Contain headless replay of recorded games.
+
+A Replay plays an ActionLog back on a fresh Game built from the log's seed,
+with no input or output, so thousands of logs replay in seconds.  While
+playing forward it keeps a save game every few turns, so that seeking to
+any turn only replays the turns since the nearest checkpoint.
+
+    python start.py replay bob.dwlog --turn 12
+"""
+from typing import Dict, List, Tuple
+
+from dopewars import savegame
+from dopewars.actions import NO_EVENT, Action, ActionLog
+from dopewars.engine import Game
+from dopewars.rng import GameRNG
+from dopewars.weapons import WEAPONS
+
+CHECKPOINT_EVERY = 8  # Turns between checkpoints
+
+
+def apply(game: Game, action: Action, first: int, second: int) -> None:
+    """Apply one logged action to `game`.
+
+    :param game: game to act on
+    :param action: action code
+    :param first: first argument, see Action
+    :param second: second argument, see Action
+    """
+    if action == Action.BUY:
+        game.buy(first, second)
+    elif action == Action.SELL:
+        game.sell(first, second)
+    elif action == Action.DEPOSIT:
+        game.deposit(second)
+    elif action == Action.WITHDRAW:
+        game.withdraw(second)
+    elif action == Action.WEAPON:
+        game.buy_weapon(WEAPONS[first]().name)
+    elif action == Action.MOVE:
+        game.move(list(game.cities)[first])
+    else:
+        game.end_turn()
+
+
+class Replay:
+    """Play back an ActionLog, seeking to any turn."""
+
+    def __init__(self, log: ActionLog, checkpoint_every: int = CHECKPOINT_EVERY):
+        """
+        :param log: recorded game
+        :param checkpoint_every: turns between checkpoints
+        """
+        self.log = log
+        self._actions = list(log)
+        self._starts = log.turn_starts()
+        self._every = checkpoint_every
+        self._checkpoints: Dict[int, bytes] = {}  # Turn: save game
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.log}"
+
+    @property
+    def turns(self) -> int:
+        """Return number of turns started in the recorded game."""
+        return len(self.log.events)
+
+    def new_game(self) -> Game:
+        """Return the recorded game as it was at the start of turn one."""
+        log = self.log
+        return Game(log.name, log.days, log.money, GameRNG(log.seed, log.game))
+
+    def seek(self, turn: int) -> Game:
+        """Return the recorded game at the start of `turn`.
+
+        :param turn: turn number, from 1 to Replay.turns
+        """
+        if not 1 <= turn <= self.turns:
+            raise ValueError(f"Turn must be between 1 and {self.turns}")
+        start = max((t for t in self._checkpoints if t <= turn), default=1)
+        if start == 1:
+            game = self.new_game()
+        else:
+            game = savegame.loads(self._checkpoints[start])
+        for turn in range(start, turn):
+            self._play(game, turn)
+        return game
+
+    def run(self) -> Game:
+        """Return the recorded game after replaying every action."""
+        return self.replay()[0]
+
+    def replay(self) -> Tuple[Game, List[int]]:
+        """Replay every action from turn one.
+
+        :return: the finished game, and the event code of every turn,
+            NO_EVENT for turns without one
+        """
+        game = self.new_game()
+        events = []
+        for turn in range(1, self.turns + 1):
+            event = game.current_day.event
+            events.append(NO_EVENT if event is None else event)
+            self._play(game, turn)
+        return game, events
+
+    def _play(self, game: Game, turn: int) -> None:
+        """Apply every action of `turn`, checkpointing the next turn."""
+        starts = self._starts
+        stop = starts[turn] if turn < len(starts) else None
+        for action in self._actions[starts[turn - 1] : stop]:
+            apply(game, *action)
+        if (turn + 1) % self._every == 0 and turn + 1 not in self._checkpoints:
+            self._checkpoints[turn + 1] = savegame.dumps(game)
+
+    def verify(self) -> List[str]:
+        """Replay the whole log, return how it differs from the recording."""
+        try:
+            game, events = self.replay()
+        except RuntimeError as e:
+            return [f"Replay failed: {e}"]
+        problems = []
+        recorded = list(self.log.events)
+        if events != recorded:
+            differ = [t for t, (a, b) in enumerate(zip(events, recorded)) if a != b]
+            turn = differ[0] if differ else min(len(events), len(recorded))
+            problems.append(f"Events differ from turn {turn + 1}")
+        if self.log.score is not None and game.score != self.log.score:
+            problems.append(f"Final score {game.score} differs from {self.log.score}")
+        return problems
@@ -0,0 +1,155 @@
+"""Contain per-game random number streams.
+
+Every game owns a GameRNG, derived from a master seed and the game's
+index with numpy's SeedSequence.  Each subsystem (market, events, theft,
+and the strategy playing the game) draws from its own independent stream,
+so games are reproducible no matter how many run side by side, or in
+which order.
+
+The streams that shape a game (market, events and theft) are counter-based:
+every draw is a hash of the stream's key and a counter, and each turn starts
+at its own counter.  A game's random state is therefore fully described by
+its seed, index and day number.
+"""
+import random
+
+import numpy as np
+
+MARKET = 0
+EVENTS = 1
+THEFT = 2
+STRATEGY = 3
+
+MASK = (1 << 64) - 1
+GOLDEN = 0x9E3779B97F4A7C15  # SplitMix64 counter increment
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+UNIT = 2.0 ** -53
+TURN_BITS = 32  # Draws available to a stream in a single turn
+
+
+def hash64(key: int, counter: int) -> int:
+    """Return SplitMix64 output number `counter` of stream `key`."""
+    z = (key + (counter + 1) * GOLDEN) & MASK
+    z = ((z ^ (z >> 30)) * MIX1) & MASK
+    z = ((z ^ (z >> 27)) * MIX2) & MASK
+    return z ^ (z >> 31)
+
+
+def _python_stream(seed: np.random.SeedSequence) -> random.Random:
+    """Return random.Random seeded with 256 bits from `seed`."""
+    return random.Random(int.from_bytes(seed.generate_state(8).tobytes(), "little"))
+
+
+def _key(seed: np.random.SeedSequence) -> int:
+    """Return 64-bit stream key from `seed`."""
+    return int(seed.generate_state(1, np.uint64)[0])
+
+
+def stream_key(seed: int, game: int, subsystem: int) -> int:
+    """Return 64-bit key of a counter-based stream of a game, see GameRNG.
+
+    :param seed: master seed
+    :param game: index of game
+    :param subsystem: MARKET, EVENTS or THEFT
+    """
+    return _key(np.random.SeedSequence(seed, spawn_key=(game, subsystem)))
+
+
+class CounterRandom(random.Random):
+    """random.Random drawing 64-bit words from hash64.
+
+    seek jumps to the start of any turn in O(1), draws made during a turn
+    depend only on the key, the turn and the draws before them that turn.
+    """
+
+    def __init__(self, key: int) -> None:
+        """
+        :param key: 64-bit stream key
+        """
+        self.key = 0
+        self.counter = 0
+        super().__init__(key)
+
+    def seed(self, a: int = 0, version: int = 2) -> None:
+        """Restart stream keyed `a` at turn zero."""
+        self.key = a & MASK
+        self.counter = 0
+        self.gauss_next = None
+
+    def seek(self, turn: int) -> None:
+        """Move to the first draw of `turn`."""
+        self.counter = turn << TURN_BITS
+        self.gauss_next = None
+
+    def getstate(self) -> tuple:
+        """Return key and position of stream."""
+        return self.key, self.counter, self.gauss_next
+
+    def setstate(self, state: tuple) -> None:
+        """Restore stream from `state`, see getstate."""
+        self.key, self.counter, self.gauss_next = state
+
+    def _next(self) -> int:
+        """Return next 64-bit word."""
+        self.counter += 1
+        return hash64(self.key, self.counter - 1)
+
+    def random(self) -> float:
+        """Return float in [0, 1)."""
+        return (self._next() >> 11) * UNIT
+
+    def getrandbits(self, k: int) -> int:
+        """Return int with `k` random bits."""
+        if 0 < k <= 64:  # One word, as for every draw a game makes
+            self.counter += 1
+            return hash64(self.key, self.counter - 1) & ((1 << k) - 1)
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self._next() << shift
+        return bits & ((1 << k) - 1)
+
+
+class GameRNG:
+    """Hold the independent random streams of a single game.
+
+    market: numpy Generator used for batched market generation, created on
+        first use as games quote their markets from market_key
+    market_key: 64-bit key of the game's CounterMarket
+    events: CounterRandom used to roll events
+    theft: CounterRandom used to pick what robbers and cops take
+    strategy: random.Random for automated players, so that their choices
+        never disturb the game's own streams
+    """
+
+    def __init__(self, seed: int = None, game: int = 0) -> None:
+        """
+        :param seed: master seed, random if omitted
+        :param game: index of game, each index gets its own streams
+        """
+        self.seed: int = np.random.SeedSequence(seed).entropy
+        self.game = game
+        self.market_key = stream_key(self.seed, game, MARKET)
+        self._market: np.random.Generator = None
+        self.events = CounterRandom(stream_key(self.seed, game, EVENTS))
+        self.theft = CounterRandom(stream_key(self.seed, game, THEFT))
+        self.strategy = _python_stream(self._stream(STRATEGY))
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self.seed}:{self.game}"
+
+    def _stream(self, subsystem: int) -> np.random.SeedSequence:
+        """Return seed sequence of `subsystem` of this game."""
+        return np.random.SeedSequence(self.seed, spawn_key=(self.game, subsystem))
+
+    @property
+    def market(self) -> np.random.Generator:
+        """Return numpy Generator used for batched market generation."""
+        if self._market is None:
+            self._market = np.random.Generator(np.random.PCG64(self._stream(MARKET)))
+        return self._market
+
+    def start_turn(self, turn: int) -> None:
+        """Move the game's event and theft streams to the start of `turn`."""
+        self.events.seek(turn)
+        self.theft.seek(turn)
@@ -0,0 +1,180 @@
+"""Contain compact binary save games.
+
+A save holds everything needed to resume a game where it was left: the
+seed and index of its GameRNG, the turn counter and city, the player, every
+bank account, and the state of the current day.  Markets and random streams
+are pure functions of the seed and day, so no generator state is stored.
+
+All integers are little-endian.  Money and balances have no upper bound,
+so they are stored with a length prefix: H byte count, then the signed
+integer's bytes, see dopewars.utilities.pack_int.  Lengths of names, texts
+and the action log are stored the same way.  Layout of version 3:
+
+    header   4s magic, B version, B seed length, seed bytes
+    game     I game index, I days, I day number, B city, B flags,
+             B weapon, name length, name bytes
+    player   money, I quantity of every drug in catalog order
+    banks    balance, B opened, for every city with a bank, in city order
+    day      b event, B flags, H event text length, event text bytes,
+             I quantity of every drug if the day's market was materialized
+    log      length, then the game's ActionLog if it is recorded, see
+             dopewars.actions; length 0 if it is not
+"""
+import os
+import struct
+import tempfile
+
+from dopewars.actions import ActionLog
+from dopewars.drugs import CATALOG
+from dopewars.engine import Game
+from dopewars.events import EVENT_NAMES, Event
+from dopewars.rng import GameRNG
+from dopewars.utilities import pack_int, unpack_int
+from dopewars.weapons import WEAPONS
+
+MAGIC = b"DWSG"
+VERSION = 3  # 2: money and balances of any size, 3: action log, name length
+DEFAULT_FILE = "/app/data/savegame.dat"
+
+OVER, BUSTED = 1, 2  # Game flags
+END_GAME, MARKET, EVENT_TEXT = 1, 2, 4  # Day flags
+
+HEADER = struct.Struct("<4sBB")
+GAME = struct.Struct("<IIIBBB")
+BANK = struct.Struct("<B")
+DAY = struct.Struct("<bBH")
+QUANTITIES = struct.Struct(f"<{len(CATALOG)}I")
+
+
+def dumps(game: Game) -> bytes:
+    """Return `game` packed into bytes.
+
+    :param game: game to save
+    """
+    if game.persistent_market:
+        raise ValueError("Games with a persistent market cannot be saved")
+    seed = game.rng.seed.to_bytes((game.rng.seed.bit_length() + 7) // 8, "little")
+    name = game.player.name.encode()
+    city = list(game.cities).index(game.current_city.name)
+    flags = game.over * OVER | game.busted * BUSTED
+    weapon = WEAPONS.index(type(game.player.weapon) if game.player.weapon else None)
+    inventory = game.player.inv
+    chunks = [
+        HEADER.pack(MAGIC, VERSION, len(seed)),
+        seed,
+        GAME.pack(
+            game.rng.game,
+            game.days,
+            game.current_day_num,
+            city,
+            flags,
+            weapon,
+        ),
+        pack_int(len(name)),
+        name,
+        pack_int(game.player.money),
+        QUANTITIES.pack(*map(inventory.quantity, range(len(CATALOG)))),
+    ]
+    for bank in (city.bank for city in game.cities.values() if city.bank):
+        chunks.append(pack_int(bank.balance))
+        chunks.append(BANK.pack(bank.opened))
+
+    day = game.current_day
+    text = (day.event_text or "").encode()
+    flags = day.end_game * END_GAME | day.materialized * MARKET
+    flags |= (day.event_text is not None) * EVENT_TEXT
+    event = -1 if day.event is None else day.event
+    chunks.append(DAY.pack(event, flags, len(text)))
+    chunks.append(text)
+    if day.materialized:
+        chunks.append(QUANTITIES.pack(*(drug.quantity for drug in day.drugs())))
+    log = b"" if game.log is None else game.log.dumps()
+    chunks.append(pack_int(len(log)))
+    chunks.append(log)
+    return b"".join(chunks)
+
+
+def loads(data: bytes) -> Game:
+    """Return game unpacked from `data`, see dumps.
+
+    :param data: saved game
+    """
+    magic, version, seed_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not a saved game")
+    if version != VERSION:
+        raise ValueError(f"Unsupported save game version: {version}")
+    offset = HEADER.size
+    seed = int.from_bytes(data[offset : offset + seed_length], "little")
+    offset += seed_length
+    index, days, day_num, city, flags, weapon = GAME.unpack_from(data, offset)
+    name_length, offset = unpack_int(data, offset + GAME.size)
+    name = data[offset : offset + name_length].decode()
+    offset += name_length
+    money, offset = unpack_int(data, offset)
+    quantities = QUANTITIES.unpack_from(data, offset)
+    offset += QUANTITIES.size
+
+    game = Game._resume(name, days, money, GameRNG(seed, index), day_num)
+    player = game.player
+    for drug, quantity in enumerate(quantities):
+        if quantity:
+            player.inv.add(drug, quantity)
+    if WEAPONS[weapon]:
+        weapon = WEAPONS[weapon]()
+        player.money += weapon.price  # Buying it below takes the price back
+        player.weapon = weapon
+    for bank in (city.bank for city in game.cities.values() if city.bank):
+        balance, offset = unpack_int(data, offset)
+        (opened,) = BANK.unpack_from(data, offset)
+        bank.restore(balance, bool(opened))
+        offset += BANK.size
+
+    game.current_city = list(game.cities.values())[city]
+    game.over = bool(flags & OVER)
+    game.busted = bool(flags & BUSTED)
+    day = game.current_day = game.make_day(roll_event=False)
+    event, flags, text_length = DAY.unpack_from(data, offset)
+    offset += DAY.size
+    if event >= 0:
+        day.event = Event(event)
+        day.event_name = EVENT_NAMES[event]
+    day.end_game = bool(flags & END_GAME)
+    if flags & EVENT_TEXT:
+        day.event_text = data[offset : offset + text_length].decode()
+    offset += text_length
+    if flags & MARKET:
+        for drug, quantity in zip(day.drugs(), QUANTITIES.unpack_from(data, offset)):
+            drug.quantity = quantity
+        offset += QUANTITIES.size
+    log_length, offset = unpack_int(data, offset)
+    if log_length:
+        game.log = ActionLog.loads(data[offset : offset + log_length])
+    return game
+
+
+def save(game: Game, file: str = DEFAULT_FILE) -> None:
+    """Atomically write `game` to `file`.
+
+    :param game: game to save
+    :param file: save file
+    """
+    directory = os.path.dirname(os.path.abspath(file))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp = tempfile.mkstemp(prefix=".savegame-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(dumps(game))
+        os.replace(temp, file)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+def load(file: str = DEFAULT_FILE) -> Game:
+    """Return game saved in `file`.
+
+    :param file: save file
+    """
+    with open(file, "rb") as saved:
+        return loads(saved.read())
@@ -1,68 +1,465 @@
 """
-Holds Scores class
+Holds Scores class and its storage backends
 """
 import csv
-from typing import List, Tuple
+import os
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+from dopewars.leaderboard import Leaderboard, Score
 from dopewars.utilities import fmt_money
 
+DEFAULT_FILE = "/app/data/scores.db"
+LEGACY_FILE = "/app/scores.csv"
+SQLITE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+TOP = 5
+
+
+class CSVBackend:
+    """Store the top scores in a space-delimited file.
+
+    Safe for many concurrent writers on one host: additions are merged into
+    the current file contents while holding an advisory lock on a sibling
+    `.lock` file, then written to a temporary file that atomically replaces
+    the original.  Readers never see a partially written file.  As the file
+    is replaced, writers sharing it between containers must share the
+    directory it lives in, not only the file.
+    """
+
+    def __init__(self, file: str, keep: int = TOP) -> None:
+        """
+        :param file: score file
+        :param keep: number of scores kept, None to keep all
+        """
+        self._file = file
+        self._keep = keep
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self._file}"
+
+    def _read(self) -> List[Score]:
+        """Read and convert file to machine-usable data."""
+        try:
+            with open(self._file, "r", newline="") as file:
+                reader = csv.reader(file, delimiter=" ", quotechar="|")
+                return [(int(row[0]), row[1], int(row[2])) for row in reader]
+        except FileNotFoundError:
+            return []
+
+    @contextmanager
+    def _lock(self):
+        """Hold an exclusive advisory lock on the score file's lock file."""
+        fd = os.open(f"{self._file}.lock", os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the lock
+
+    def _write(self, scores: List[Score]) -> None:
+        """Atomically replace file with `scores`."""
+        directory = os.path.dirname(os.path.abspath(self._file))
+        fd, temp = tempfile.mkstemp(prefix=".scores-", dir=directory)
+        try:
+            with os.fdopen(fd, "w", newline="") as file:
+                writer = csv.writer(file, delimiter=" ", quotechar="|")
+                writer.writerows(scores)
+                file.flush()
+                os.fsync(file.fileno())
+            os.chmod(temp, 0o644)
+            os.replace(temp, self._file)
+        except BaseException:
+            os.unlink(temp)
+            raise
+
+    def _stored(self, turns: Optional[int]) -> List[Score]:
+        """Return stored scores, of games `turns` long only if given."""
+        scores = self._read()
+        if turns is None:
+            return scores
+        return [score for score in scores if score[2] == turns]
+
+    def top(self, n: int = TOP, turns: int = None) -> List[Score]:
+        """Return the `n` best scores, best first.
+
+        :param n: number of scores
+        :param turns: only return scores of games this many turns long
+        """
+        scores = self._stored(turns)
+        return sorted(scores, key=lambda item: item[0], reverse=True)[:n]
+
+    def rank(self, points: int, turns: int = None) -> int:
+        """Return rank `points` has or would have, 1 for the best score.
+
+        :param points: final score
+        :param turns: rank among games this many turns long only
+        """
+        return sum(score[0] > points for score in self._stored(turns)) + 1
+
+    def count(self, turns: int = None) -> int:
+        """Return number of stored scores.
+
+        :param turns: only count scores of games this many turns long
+        """
+        return len(self._stored(turns))
+
+    def all(self) -> List[Score]:
+        """Return every stored score, in no particular order."""
+        return self._read()
+
+    def since(self, token) -> Tuple[object, List[Score], bool]:
+        """Return what changed in the file since `token` was returned.
+
+        :param token: token of a previous call, None for every score
+        :return: new token, every stored score if the file changed, and
+            True as they replace earlier ones
+        """
+        try:
+            stat = os.stat(self._file)
+            current = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            current = None
+        if token is not None and current == token:
+            return token, [], False
+        return current, self._read(), True
+
+    def add(self, scores: List[Score]) -> None:
+        """Merge `scores` into file.
+
+        :param scores: new scores
+        """
+        if not scores:
+            return
+        with self._lock():
+            merged = sorted(
+                self._read() + scores, key=lambda item: item[0], reverse=True
+            )
+            self._write(merged[: self._keep])
+
+
+MAX_INTEGER = 2 ** 63 - 1  # Largest SQLite INTEGER
+
+
+def _big(score: int) -> Optional[str]:
+    """Return sortable text of a score too large for SQLite, else None.
+
+    Digits are prefixed with their count, so that the text of larger scores
+    sorts after that of smaller ones.
+    """
+    if score <= MAX_INTEGER:
+        return None
+    digits = str(score)
+    return f"{len(digits):05d}{digits}"
+
+
+def _row_score(row: tuple) -> Score:
+    """Return score of a (score, big, name, turns) row, see _big."""
+    score, big, name, turns = row
+    return (score if big is None else int(big[5:])), name, turns
+
+
+class SQLiteBackend:
+    """Store every score in an SQLite database.
+
+    Scores are indexed on score and on turn count, so inserts are O(log n)
+    and top-N queries read only the rows they return.  Scores from a legacy
+    CSV file are imported the first time the database is opened.
+
+    Scores beyond SQLite's 64-bit INTEGER are stored as MAX_INTEGER, with
+    their exact value in the sortable `big` column, see _big.
+    """
+
+    _schema = """
+        CREATE TABLE IF NOT EXISTS scores (
+            id INTEGER PRIMARY KEY,
+            score INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            turns INTEGER NOT NULL,
+            big TEXT
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+    """
+    _indexes = """
+        DROP INDEX IF EXISTS scores_by_score;
+        DROP INDEX IF EXISTS scores_by_turns;
+        CREATE INDEX IF NOT EXISTS scores_by_rank ON scores (score DESC, big DESC);
+        CREATE INDEX IF NOT EXISTS scores_by_turns_rank
+            ON scores (turns, score DESC, big DESC);
+    """
+
+    def __init__(self, file: str, legacy_csv: str = None) -> None:
+        """
+        :param file: database path
+        :param legacy_csv: CSV file to migrate scores from, defaults to
+            `file` with a .csv extension
+        """
+        self._file = file
+        if legacy_csv is None:
+            legacy_csv = os.path.splitext(file)[0] + ".csv"
+        directory = os.path.dirname(file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Opened in one thread, may be used in another, e.g. by GameServer
+        self._db = sqlite3.connect(file, timeout=30, check_same_thread=False)
+        with self._db:
+            self._db.executescript(self._schema)
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(scores)")]
+            if "big" not in columns:  # Created before scores could overflow
+                self._db.execute("ALTER TABLE scores ADD COLUMN big TEXT")
+            self._db.executescript(self._indexes)
+        self._migrate(legacy_csv)
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {self._file}"
+
+    def _migrate(self, legacy_csv: str) -> None:
+        """Import scores from `legacy_csv` once, recording it in meta table."""
+        if not os.path.exists(legacy_csv):
+            return
+        key = f"migrated:{os.path.abspath(legacy_csv)}"
+        with self._db:
+            inserted = self._db.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES (?, '1')", (key,)
+            )
+            if inserted.rowcount:
+                self._insert(CSVBackend(legacy_csv)._read())
+
+    def _insert(self, scores: List[Score]) -> None:
+        """Insert `scores`, caller handles the transaction."""
+        self._db.executemany(
+            "INSERT INTO scores (score, big, name, turns) VALUES (?, ?, ?, ?)",
+            [
+                (min(score, MAX_INTEGER), _big(score), name, turns)
+                for score, name, turns in scores
+            ],
+        )
+
+    def top(self, n: int = TOP, turns: int = None) -> List[Score]:
+        """Return the `n` best scores, best first.
+
+        :param n: number of scores
+        :param turns: only return scores of games this many turns long
+        """
+        if turns is None:
+            rows = self._db.execute(
+                "SELECT score, big, name, turns FROM scores "
+                "ORDER BY score DESC, big DESC LIMIT ?",
+                (n,),
+            )
+        else:
+            rows = self._db.execute(
+                "SELECT score, big, name, turns FROM scores WHERE turns = ? "
+                "ORDER BY score DESC, big DESC LIMIT ?",
+                (turns, n),
+            )
+        return list(map(_row_score, rows))
+
+    def add(self, scores: List[Score]) -> None:
+        """Insert `scores`.
+
+        :param scores: new scores
+        """
+        with self._db:
+            self._insert(scores)
+
+    def all(self) -> List[Score]:
+        """Return every stored score, in no particular order."""
+        rows = self._db.execute("SELECT score, big, name, turns FROM scores")
+        return list(map(_row_score, rows))
+
+    def since(self, token: Optional[int]) -> Tuple[int, List[Score], bool]:
+        """Return scores inserted since `token` was returned.
+
+        Scores are never deleted and row ids only grow, so only rows past
+        the last one seen are read.
+        :param token: token of a previous call, None for every score
+        :return: new token, scores inserted since, and whether they are
+            every stored score
+        """
+        rows = self._db.execute(
+            "SELECT id, score, big, name, turns FROM scores WHERE id > ? ORDER BY id",
+            (-1 if token is None else token,),
+        ).fetchall()
+        last = rows[-1][0] if rows else token
+        return last, [_row_score(row[1:]) for row in rows], token is None
+
+    def rank(self, points: int, turns: int = None) -> int:
+        """Return rank `points` has or would have, 1 for the best score.
+
+        Counts the better scores on the rank index, see _big for why
+        scores equal to MAX_INTEGER are compared on `big`.
+        :param points: final score
+        :param turns: rank among games this many turns long only
+        """
+        score, big = min(points, MAX_INTEGER), _big(points) or ""
+        where = "" if turns is None else "turns = ? AND "
+        params = () if turns is None else (turns,)
+        better = self._db.execute(
+            f"SELECT (SELECT COUNT(*) FROM scores WHERE {where}score > ?)"
+            f" + (SELECT COUNT(*) FROM scores WHERE {where}score = ? AND big > ?)",
+            params + (score,) + params + (score, big),
+        )
+        return better.fetchone()[0] + 1
+
+    def count(self, turns: int = None) -> int:
+        """Return number of stored scores.
+
+        :param turns: only count scores of games this many turns long
+        """
+        if turns is None:
+            rows = self._db.execute("SELECT COUNT(*) FROM scores")
+        else:
+            rows = self._db.execute(
+                "SELECT COUNT(*) FROM scores WHERE turns = ?", (turns,)
+            )
+        return rows.fetchone()[0]
+
+    def close(self) -> None:
+        """Close database connection."""
+        self._db.close()
+
+
+# Leaderboard of every file loaded, and the token of its backend's last read
+_LEADERBOARDS: Dict[str, Tuple[Leaderboard, object]] = {}
+
 
 class Scores:
     """Manage storage and retrieval of scores.
 
     Given that this is run as a docker container, relies
-    on a volume being supplied to the `docker run` command
+    on a volume being supplied to the `docker run` command.
+    Files ending in .db, .sqlite or .sqlite3 are stored with SQLiteBackend,
+    anything else with CSVBackend.
+
+    Queries are answered by the backend, from the SQLite rank indexes,
+    until the file's Leaderboard is needed, e.g. by best or load.  Every
+    stored score is then loaded into it once, and it is kept in memory for
+    every later Scores of the same file, which answer rank and top from it
+    too.  Scores stored since, by this process or any other, are merged in
+    whenever a Scores is created, refreshed or saved: SQLiteBackend reads
+    only the rows inserted since, CSVBackend rereads the file if it
+    changed.  CSVBackend only stores the top five, so only those are
+    ranked.
     """
 
-    def __init__(self, file: str = "/app/scores.csv") -> None:
-        self._file = file
-        self.list: List[Tuple[int, str, int]] = None
-        self._read()
+    def __init__(self, file: str = DEFAULT_FILE, backend=None) -> None:
+        """
+        :param file: score file
+        :param backend: storage backend, chosen from `file` if omitted
+        """
+        if backend is None:
+            if file.endswith(SQLITE_EXTENSIONS):
+                legacy = LEGACY_FILE if file == DEFAULT_FILE else None
+                backend = SQLiteBackend(file, legacy)
+            else:
+                backend = CSVBackend(file)
+        self._backend = backend
+        self._key = os.path.abspath(file)
+        self._new: List[Score] = []
+        self.list: List[Score] = None
+        self.refresh()
 
     def __str__(self) -> str:
         return f"{self.__class__.__name__}"
 
+    @property
+    def loaded(self) -> bool:
+        """Return whether the file's leaderboard is in memory."""
+        return self._key in _LEADERBOARDS
+
+    @property
+    def board(self) -> Leaderboard:
+        """Return leaderboard of every score stored in the file, see load."""
+        if not self.loaded:
+            self.load()
+        return _LEADERBOARDS[self._key][0]
+
+    def load(self) -> None:
+        """Load or merge every score stored in the file into its leaderboard."""
+        board, token = _LEADERBOARDS.get(self._key, (None, None))
+        token, scores, complete = self._backend.since(token)
+        if board is None or complete:
+            board = Leaderboard(scores)
+        else:
+            for score in scores:
+                board.add(score)
+        _LEADERBOARDS[self._key] = board, token
+
     def save(self) -> None:
-        """Sort list, write top five scores to disk."""
-        self._sort()
-        with open(self._file, "w", newline="") as file:
-            writer = csv.writer(file, delimiter=" ", quotechar="|")
-            for score in self.list:
-                writer.writerow(score)
+        """Store scores added since last save, refresh top five."""
+        self._backend.add(self._new)
+        self._new = []
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Merge scores stored since the last refresh, refresh top five."""
+        if self.loaded:
+            self.load()
+        self._read()
 
     def _read(self) -> None:
-        """Read and convert file to machine-usable data."""
-        try:
-            with open(self._file, "r", newline="") as file:
-                reader = csv.reader(file, delimiter=" ", quotechar="|")
-                self.list = [tuple((int(row[0]), row[1], row[2])) for row in reader]
-        except FileNotFoundError:
-            self.list = []
+        """Read top five scores."""
+        self.list = self.top(TOP)
+
+    def rank(self, score: int, turns: int = None) -> Tuple[int, int]:
+        """Return rank of saved `score` and number of scores it ranks among.
+
+        :param score: final score
+        :param turns: rank among games this many turns long only
+        """
+        source = self.board if self.loaded else self._backend
+        return source.rank(score, turns), source.count(turns)
+
+    def top(self, n: int = TOP, turns: int = None) -> List[Score]:
+        """Return the `n` best saved scores, best first.
+
+        :param n: number of scores
+        :param turns: only return scores of games this many turns long
+        """
+        return (self.board if self.loaded else self._backend).top(n, turns)
+
+    def best(self, name: str) -> Optional[Score]:
+        """Return best saved score of player `name`, None if they have none."""
+        return self.board.best(name)
 
     def _sort(self) -> None:
         """Sort and trim list."""
         self.list.sort(key=lambda item: item[0], reverse=True)
-        if len(self.list) > 5:
-            self.list = self.list[:5]
+        if len(self.list) > TOP:
+            self.list = self.list[:TOP]
 
-    def add(self, score: Tuple[int, str, int]) -> None:
+    def add(self, score: Score) -> None:
         """Add score to Scores.list, keeping it sorted.
 
         :param score: Final score, player name, number of turns
         """
+        self._new.append(score)
         self.list.append(score)
         self._sort()
 
     def print(self) -> None:
         """Print styled high scores."""
-        print("=" * 40)  # 36 is standard width for menu
+        print("\n".join(self.lines()))
+
+    def lines(self) -> List[str]:
+        """Return lines of styled high scores."""
+        lines = ["=" * 40]  # 36 is standard width for menu
         if self.list:
-            print("High scores\t\t\tTurns")
+            lines.append("High scores\t\t\tTurns")
             for item in self.list:
                 score, name, turns = item
                 name_score = f"{name}: {fmt_money(score)}"
                 tabs = "\t" if len(name_score) >= 24 else "\t\t"
-                print(f"{name_score}{tabs}{turns}")
-            print("=" * 40)
+                lines.append(f"{name_score}{tabs}{turns}")
+            lines.append("=" * 40)
         else:
-            print("No high scores!")
+            lines.append("No high scores!")
+        return lines
@@ -0,0 +1,231 @@
+"""Contain asyncio game server.
+
+Hosts many line-oriented sessions (telnet or netcat) in a single process.
+Every connection drives its own Gameplay.session, fed one line at a time,
+and all sessions share one score store.  As sessions are plain generators,
+an idle player costs only their game's memory, not a process or a thread.
+Saving scores and action logs runs on a single worker thread instead, so
+that the disk never holds up the event loop, and the score store is only
+ever used by one thread at a time.
+
+    python start.py serve --port 2323
+    nc localhost 2323
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque
+
+import numpy as np
+
+from dopewars.gameplay import Blocking, Gameplay
+from dopewars.metrics import Metrics
+from dopewars.render import Renderer
+from dopewars.scores import DEFAULT_FILE, Scores
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+IDLE_TIMEOUT = 15 * 60  # Seconds a session may wait for input
+LINE_LIMIT = 1024  # Longest accepted line, in bytes
+BACKLOG = 1024  # Connections waiting to be accepted
+
+
+def rss() -> int:
+    """Return resident memory of this process in bytes, 0 if unknown."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * PAGE_SIZE
+    except OSError:
+        return 0
+
+
+class _SocketStream:
+    """Adapt a StreamWriter to the text stream a Renderer writes to."""
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self._writer = writer
+
+    def write(self, text: str) -> None:
+        """Queue `text`, with network line endings."""
+        self._writer.write(text.replace("\n", "\r\n").encode())
+
+    def flush(self) -> None:
+        """Do nothing, the session drains the writer after every prompt."""
+
+
+class ServerStats:
+    """Track sessions, memory and the time taken to answer each line.
+
+    Memory per session is the growth of the process's resident memory since
+    the server started, divided by the number of open sessions.
+    """
+
+    def __init__(self, samples: int = 10_000) -> None:
+        """
+        :param samples: number of most recent latencies kept
+        """
+        self.active = 0
+        self.peak = 0
+        self.served = 0
+        self.lines = 0
+        self.latencies: Deque[float] = deque(maxlen=samples)
+        self._baseline = rss()
+
+    def __str__(self) -> str:
+        memory = rss()
+        lines = [
+            f"Sessions: {self.active} open, {self.peak} peak, {self.served} served",
+            f"Memory: {memory / 2 ** 20:.1f} MiB",
+        ]
+        if self.active and memory:
+            per_session = (memory - self._baseline) / self.active
+            lines[-1] += f", {per_session / 1024:.1f} KiB per session"
+        if self.latencies:
+            p50, p99 = np.quantile(self.latencies, (0.5, 0.99)) * 1000
+            lines.append(
+                f"Latency: p50 {p50:.3f}ms p99 {p99:.3f}ms over {self.lines} lines"
+            )
+        return "\n".join(lines)
+
+    def opened(self) -> None:
+        """Record a new session."""
+        self.active += 1
+        self.served += 1
+        self.peak = max(self.peak, self.active)
+
+    def closed(self) -> None:
+        """Record the end of a session."""
+        self.active -= 1
+
+    def answered(self, seconds: float) -> None:
+        """Record the time taken to process a line and draw the next prompt."""
+        self.lines += 1
+        self.latencies.append(seconds)
+
+
+class GameServer:
+    """Serve a Gameplay session to every connection."""
+
+    def __init__(
+        self,
+        score_file: str = DEFAULT_FILE,
+        days: int = 30,
+        idle_timeout: float = IDLE_TIMEOUT,
+        log_dir: str = None,
+        metrics: Metrics = None,
+    ) -> None:
+        """
+        :param score_file: score store shared by every session
+        :param days: default number of turns
+        :param idle_timeout: seconds to wait for a line before disconnecting
+        :param log_dir: record games, saving their action logs here
+        :param metrics: instrument every session
+        """
+        self.scores = Scores(score_file)
+        self.days = days
+        self.idle_timeout = idle_timeout
+        self.log_dir = log_dir
+        self.metrics = metrics
+        self.stats = ServerStats()
+        self.io = ThreadPoolExecutor(1)  # Runs every session's Blocking calls
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__}"
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Run one session over a connection until the player quits or leaves."""
+        renderer = Renderer(_SocketStream(writer))
+        gameplay = Gameplay(
+            self.days,
+            renderer=renderer,
+            scores=self.scores,
+            log_dir=self.log_dir,
+            metrics=self.metrics,
+        )
+        session = gameplay.session()
+        readline, send = reader.readline, session.send
+        if self.metrics is not None:
+            readline = self.metrics.timed_async(readline, self.metrics.input)
+            send = self.metrics.timed(send, self.metrics.logic)
+        loop = asyncio.get_event_loop()
+        self.stats.opened()
+        try:
+            prompt = next(session)
+            while True:
+                while isinstance(prompt, Blocking):
+                    prompt = send(await loop.run_in_executor(self.io, prompt))
+                renderer.flush(prompt)
+                await writer.drain()
+                try:
+                    line = await asyncio.wait_for(readline(), self.idle_timeout)
+                except ValueError:
+                    break  # Sent a line longer than LINE_LIMIT
+                if not line:
+                    break  # Player disconnected
+                started = time.perf_counter()
+                answer = line.decode(errors="replace").strip()
+                renderer.echo(answer)
+                prompt = send(answer)
+                self.stats.answered(time.perf_counter() - started)
+        except StopIteration:
+            writer.write(b"Goodbye!\r\n")
+        except (asyncio.TimeoutError, ConnectionError):
+            pass  # Idle or dropped
+        finally:
+            session.close()
+            self.stats.closed()
+            writer.close()
+
+    async def start(self, host: str = None, port: int = 0) -> asyncio.AbstractServer:
+        """Start listening on `host`:`port`, return the asyncio server.
+
+        :param host: interface to bind, all of them if omitted
+        :param port: TCP port, 0 to pick a free one
+        """
+        return await asyncio.start_server(
+            self.handle, host, port, limit=LINE_LIMIT, backlog=BACKLOG
+        )
+
+    async def report(self, every: float) -> None:
+        """Print stats every `every` seconds, forever."""
+        while True:
+            await asyncio.sleep(every)
+            print(self.stats, flush=True)
+
+
+def serve(
+    port: int,
+    host: str = None,
+    score_file: str = DEFAULT_FILE,
+    report: float = 60,
+    log_dir: str = None,
+    metrics: Metrics = None,
+) -> None:
+    """Serve games until interrupted, printing stats periodically.
+
+    :param port: TCP port
+    :param host: interface to bind, all of them if omitted
+    :param score_file: score store shared by every session
+    :param report: seconds between stats reports, 0 to disable
+    :param log_dir: record games, saving their action logs here
+    :param metrics: instrument every session, dumping metrics on the way out
+    """
+    game_server = GameServer(score_file, log_dir=log_dir, metrics=metrics)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(game_server.start(host, port))
+    for sock in server.sockets:
+        print("Listening on {}:{}".format(*sock.getsockname()[:2]), flush=True)
+    if report:
+        loop.create_task(game_server.report(report))
+    try:
+        loop.run_forever()
+    finally:
+        server.close()
+        game_server.io.shutdown()
+        print(game_server.stats)
+        if metrics is not None and metrics.file:
+            metrics.dump()
+        loop.close()
@@ -0,0 +1,186 @@
+"""Contain Monte Carlo simulation runner.
+
+Plays complete games with an automated strategy, spread over a process
+pool.  Game n of a run always uses GameRNG(seed, n), so results do not
+depend on the number of workers.
+"""
+import importlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, NamedTuple, Tuple, Union
+
+import numpy as np
+
+from dopewars.engine import STARTING_MONEY, Game
+from dopewars.rng import GameRNG
+from dopewars.strategies import STRATEGIES
+from dopewars.utilities import fmt_money
+
+Strategy = Callable[[Game], None]
+
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+Z95 = 1.959963984540054  # Standard normal quantile of 97.5%
+
+
+def half_width(samples: np.ndarray) -> np.ndarray:
+    """Return half widths of 95% confidence intervals of means along axis -1.
+
+    :param samples: Python ints, statistics are computed in float
+    """
+    games = samples.shape[-1]
+    if games < 2:
+        return np.full(samples.shape[:-1], np.inf)
+    return Z95 * samples.astype(float).std(axis=-1, ddof=1) / np.sqrt(games)
+
+
+def load_strategy(spec: Union[str, Strategy]) -> Strategy:
+    """Return strategy named `spec`.
+
+    :param spec: a built-in strategy name, `module:function`, or a callable
+    """
+    if callable(spec):
+        return spec
+    if spec in STRATEGIES:
+        return STRATEGIES[spec]
+    module, _, name = spec.partition(":")
+    if not name:
+        raise ValueError(f"Unknown strategy: {spec}")
+    return getattr(importlib.import_module(module), name)
+
+
+def play_game(
+    strategy: Strategy, seed: int, game: int, days: int = 30, money: int = None
+) -> Game:
+    """Play one game to the end with `strategy`.
+
+    :param strategy: strategy callable
+    :param seed: master seed
+    :param game: game index
+    :param days: number of turns
+    :param money: starting money, defaults to STARTING_MONEY
+    :return: the finished game
+    """
+    money = STARTING_MONEY if money is None else money
+    g = Game(f"bot{game}", days, money, GameRNG(seed, game))
+    while not g.over:
+        turn = g.current_day_num
+        strategy(g)
+        if not g.over and g.current_day_num == turn:
+            raise RuntimeError(f"{strategy.__name__} did not end its turn")
+    return g
+
+
+def _play_chunk(args: tuple) -> List[Tuple[int, bool]]:
+    """Play games `start` to `stop`, return their scores and bust flags."""
+    spec, seed, start, stop, days, money = args
+    strategy = load_strategy(spec)
+    results = []
+    for game in range(start, stop):
+        g = play_game(strategy, seed, game, days, money)
+        results.append((g.score, g.busted))
+    return results
+
+
+def play_chunks(tasks: List[tuple], workers: int = None) -> List[Tuple[int, bool]]:
+    """Play chunks of games, return their scores and bust flags in order.
+
+    :param tasks: (strategy, seed, start, stop, days, money) of every chunk,
+        strategies must be names or picklable callables unless workers is 1
+    :param workers: number of processes, None for one per CPU,
+        1 to play in this process
+    """
+    if workers == 1:
+        chunks = list(map(_play_chunk, tasks))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            chunks = list(pool.map(_play_chunk, tasks))
+    return [result for chunk_results in chunks for result in chunk_results]
+
+
+class SimulationReport(NamedTuple):
+    """Hold results of a simulation run."""
+
+    seed: int
+    seconds: float
+    scores: np.ndarray  # Python ints, as scores may not fit in 64 bits
+    busted: np.ndarray
+
+    @property
+    def games(self) -> int:
+        """Return number of games played."""
+        return len(self.scores)
+
+    @property
+    def throughput(self) -> float:
+        """Return games played per second."""
+        return self.games / self.seconds if self.seconds else float("inf")
+
+    @property
+    def mean(self) -> float:
+        """Return mean final score."""
+        return sum(self.scores.tolist()) / self.games
+
+    @property
+    def interval(self) -> float:
+        """Return half width of the mean score's 95% confidence interval."""
+        return float(half_width(self.scores))
+
+    @property
+    def bust_rate(self) -> float:
+        """Return fraction of games ended by the good cop."""
+        return float(self.busted.mean())
+
+    def quantiles(self, q=QUANTILES) -> List[int]:
+        """Return final score quantiles.
+
+        :param q: quantiles to compute, between 0 and 1
+        """
+        scores = self.scores.astype(float)
+        return [int(value) for value in np.quantile(scores, q)]
+
+    def __str__(self) -> str:
+        lines = [
+            f"Games: {self.games} in {self.seconds:.2f}s "
+            f"({self.throughput:,.0f} games/sec), seed {self.seed}",
+            f"Mean score: {fmt_money(int(self.mean))} "
+            f"±{fmt_money(int(self.interval))}",
+            f"Bust rate: {self.bust_rate:.2%}",
+        ]
+        for q, value in zip(QUANTILES, self.quantiles()):
+            lines.append(f"p{int(q * 100):<2} score: {fmt_money(value)}")
+        return "\n".join(lines)
+
+
+def simulate(
+    games: int,
+    strategy: Union[str, Strategy] = "bargain",
+    seed: int = None,
+    days: int = 30,
+    money: int = None,
+    workers: int = None,
+    chunk: int = 1000,
+) -> SimulationReport:
+    """Play `games` games with `strategy` and summarize the results.
+
+    :param games: number of games to play
+    :param strategy: strategy name or callable, see load_strategy
+    :param seed: master seed, random if omitted
+    :param days: number of turns per game
+    :param money: starting money, defaults to STARTING_MONEY
+    :param workers: number of processes, None for one per CPU,
+        1 to play in this process
+    :param chunk: number of games handed to a worker at once
+    """
+    if games < 1:
+        raise ValueError("Simulation must play at least one game")
+    seed = np.random.SeedSequence(seed).entropy
+    tasks = [
+        (strategy, seed, start, min(start + chunk, games), days, money)
+        for start in range(0, games, chunk)
+    ]
+    started = time.perf_counter()
+    results = play_chunks(tasks, workers)
+    seconds = time.perf_counter() - started
+    scores = np.array([score for score, _ in results], dtype=object)
+    busted = np.array([bust for _, bust in results], dtype=bool)
+    return SimulationReport(seed, seconds, scores, busted)
@@ -0,0 +1,374 @@
+"""Contain a dynamic programming solver for expected-score-maximizing play.
+
+Every rule shaping a game follows a known distribution: prices and
+quantities follow Drug's surge, price and quantity rules, events follow
+dopewars.events.EVENTS, banks pay fixed interest and weapons defeat fixed
+events.  The solver works backwards from the last day, computing the best
+expected score reachable from every state, and plays the policy reaching it.
+
+To solve a 30 day game in seconds, the state space is discretized and
+reduced:
+
+* A state is (days left, city, weapon, wealth), with wealth on a log grid.
+* Wealth counts drugs held at today's market price, as keeping a drug is
+  worth as much as selling it and buying it back.  Tomorrow, a drug is
+  expected to fetch its mean price, enumerated exactly from the rules.
+* Buying fills the drugs worth most for their price first, up to supply,
+  which is optimal for values linear in units.  Expectations over markets
+  average a fixed set of market scenarios drawn from CounterMarket.
+* Money travels with the player, banked overnight when staying in a city
+  whose bank accepts it.  Robbers take their mean share of unbanked cash,
+  corrupt cops a quarter of the drugs held, and a good cop ends the game.
+* The destination and weapon are chosen before the market is seen, and
+  drugs are bought after seeing it.
+
+Markets are identically distributed every day, so values are cached by days
+left, and solving a 30 day game also solves every shorter one.
+
+Values are therefore estimates, not exact expectations: at 30 days the
+solver predicts about 20% more than its policy scores in simulation, e.g.
+$32.6M against a mean of $26.7M over 50 games.
+
+    python start.py solve --days 30 --verify 1000
+"""
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from dopewars.drugs import CATALOG, DrugSpec
+from dopewars.engine import STARTING_MONEY, Game, generate_cities
+from dopewars.events import EVENT_DRAW, EVENTS, Event
+from dopewars.market import CounterMarket
+from dopewars.weapons import WEAPONS
+
+SCENARIOS = 64  # Markets averaged over every day
+STEPS_PER_DECADE = 6  # Points of the wealth grid per power of ten
+MAX_WEALTH = 10 ** 13
+THEFT = 0.10  # Mean share of unbanked cash a robber takes
+SEIZURE = 0.25  # Share of drugs a corrupt cop takes
+SCENARIO_KEY = 0x50E7  # Market key of the scenarios
+
+# Chance of every event on any day, indexed by Event
+EVENT_CHANCES = tuple(spec.weight / EVENT_DRAW for spec in EVENTS)
+
+
+def price_distribution(spec: DrugSpec) -> Tuple[np.ndarray, np.ndarray]:
+    """Return every possible price of a drug, ascending, and its probability.
+
+    Follows Drug._calc_surge and Drug._calc_price: no surge 60% of the time,
+    a hi surge multiplying the base price by 1.5-3 or a lo surge by
+    0.33-0.67 20% of the time each, then a uniform jitter, then a floor.
+    :param spec: catalog entry
+    """
+    base, jitter = spec.base_price, spec.jitter
+    bases = np.concatenate(
+        ([base], base * np.arange(15, 31) // 10, base * np.arange(33, 68) // 100)
+    )
+    weights = np.concatenate(([0.6], np.full(16, 0.2 / 16), np.full(35, 0.2 / 35)))
+    mass = np.bincount(bases, weights, minlength=bases.max() + 2 * jitter + 1)
+    # Jitter spreads each base price evenly over base +- jitter
+    spread = np.cumsum(np.concatenate((mass, np.zeros(2 * jitter + 1))))
+    spread[2 * jitter + 1 :] -= spread[: -2 * jitter - 1].copy()
+    spread /= 2 * jitter + 1
+    prices = np.arange(len(spread)) - jitter
+    floor = int(0.15 * base)
+    spread[prices == floor] += spread[prices < floor].sum()
+    keep = (prices >= floor) & (spread > 1e-15)
+    return prices[keep].astype(float), spread[keep] / spread[keep].sum()
+
+
+class Solver:
+    """Solve games for the policy maximizing expected score, and play it.
+
+    values[r] holds the expected final score of every (city, weapon, wealth)
+    on the morning of a day with r days left, today included.
+    """
+
+    def __init__(
+        self,
+        scenarios: int = SCENARIOS,
+        steps: int = STEPS_PER_DECADE,
+        catalog: Sequence[DrugSpec] = CATALOG,
+    ) -> None:
+        """
+        :param scenarios: markets averaged over every day
+        :param steps: wealth grid points per power of ten
+        :param catalog: drugs on offer, in ID order
+        """
+        self.steps = steps
+        decades = int(np.log10(MAX_WEALTH))
+        powers = np.arange(decades * steps + 1) / steps
+        self.grid = np.concatenate(([0.0], 10 ** powers))
+        self.cities = list(generate_cities().values())
+        self._city_index = {city.name: c for c, city in enumerate(self.cities)}
+        distributions = map(price_distribution, catalog)
+        self.mean = np.array([prices @ probs for prices, probs in distributions])
+        market = CounterMarket(SCENARIO_KEY, catalog).block(range(scenarios), [0])
+        self._prices = market.price[:, 0].astype(float)  # (scenarios, drugs)
+        self._supply = market.quantity[:, 0].astype(float)
+
+        # Growth class of cash overnight: carried, or banked at each rate
+        rates = sorted({c.bank.interest_rate for c in self.cities if c.bank})
+        robbed = EVENT_CHANCES[Event.ROBBER] * THEFT
+        self.growth = np.array([1 - robbed] + [1 + rate for rate in rates])
+        self._class = np.array(
+            [
+                rates.index(c.bank.interest_rate) + 1 if c.bank else 0
+                for c in self.cities
+            ]
+        )
+        self._minimum = np.array(
+            [c.bank.min_deposit if c.bank else np.inf for c in self.cities]
+        )
+        # Weapon choices of every city: keep the weapon held, or buy one
+        choices = max(len(c.store.inventory) if c.store else 0 for c in self.cities)
+        self._cost = np.full((len(self.cities), choices + 1), np.inf)
+        self._bought = np.full((len(self.cities), choices + 1), -1)  # -1 keeps
+        self._cost[:, 0] = 0
+        for c, city in enumerate(self.cities):
+            for choice, weapon in enumerate(city.store.inventory if city.store else ()):
+                self._cost[c, choice + 1] = weapon.price
+                self._bought[c, choice + 1] = WEAPONS.index(type(weapon))
+        self._defeats = np.array(
+            [(False,) * len(Event)] + [weapon.defeats for weapon in WEAPONS[1:]]
+        )
+        shape = (len(self.cities), len(WEAPONS), len(self.grid))
+        self.values: List[np.ndarray] = [np.broadcast_to(self.grid, shape)]
+
+    def __str__(self) -> str:
+        return f"{self.__class__.__name__} {len(self.values) - 1} days"
+
+    def ratio(self, prices: np.ndarray) -> np.ndarray:
+        """Return what drugs bought at `prices` are expected to fetch tomorrow.
+
+        Per unit of money spent, net of what corrupt cops seize.
+        """
+        return (1 - EVENT_CHANCES[Event.CORRUPT_COP] * SEIZURE) * self.mean / prices
+
+    def solve(self, days: int) -> None:
+        """Compute values of every horizon up to `days`, keeping those cached."""
+        while len(self.values) <= days:
+            if len(self.values) == 1:
+                self.values.append(self.values[0])  # Sell everything, leave
+            else:
+                self.values.append(self._solve_day(len(self.values)))
+
+    def _solve_day(self, days_left: int) -> np.ndarray:
+        """Return values of the morning with `days_left` days left."""
+        n_cities = len(self.cities)
+        after = self.values[days_left - 1]
+        costs = np.unique(self._cost[np.isfinite(self._cost)])
+
+        # Value of every night, axes: whether the player stayed put, city
+        # slept in, weapon held, weapon cost paid, wealth, scenario
+        stay = np.arange(2)[:, None, None, None, None, None]
+        dest = np.arange(n_cities)[None, :, None, None, None, None]
+        armed = np.arange(len(WEAPONS))[None, None, :, None, None, None]
+        cash = self.grid[:, None] - costs[:, None, None]
+        can_bank = (stay == 1) & (self._class[dest] > 0)
+        klass = np.where(can_bank & (cash >= self._minimum[dest]), self._class[dest], 0)
+        spent, lot = self._fill(cash)
+        left = cash - np.choose(klass, spent)
+        banked = can_bank & (left >= self._minimum[dest])
+        lot = np.choose(klass, lot)
+        trade = self._night(after, dest, armed, left, lot, banked, klass)
+        banked = can_bank & (cash >= self._minimum[dest])
+        idle = self._night(after, dest, armed, cash, 0.0, banked, klass)
+        night = np.maximum(trade, idle).mean(axis=-1)
+        night[..., cash[..., 0] < 0] = -np.inf
+
+        # Best night of every morning, axes: city, weapon, destination, choice
+        city = np.arange(n_cities)[:, None, None, None]
+        weapon = np.arange(len(WEAPONS))[None, :, None, None]
+        dest = np.arange(n_cities)[None, None, :, None]
+        cost = self._cost[:, None, None, :]
+        bought = self._bought[:, None, None, :]
+        choices = night[
+            (dest == city).astype(int),
+            dest,
+            np.where(bought < 0, weapon, bought),
+            np.minimum(np.searchsorted(costs, cost), len(costs) - 1),
+        ]
+        choices[np.broadcast_to(~np.isfinite(cost), choices.shape[:-1])] = -np.inf
+        return choices.max(axis=(2, 3))
+
+    def _fill(self, cash: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Spend `cash` on every scenario's best value for money first.
+
+        :param cash: budgets, scenarios on the last axis
+        :return: money spent and tomorrow's worth of the drugs bought, for
+            every growth class of cash, stacked on a new first axis
+        """
+        cash = np.where(np.isfinite(cash), np.maximum(cash, 0), 0)
+        shape = np.broadcast(cash, self._prices[:, 0]).shape
+        spent = np.zeros((len(self.growth),) + shape)
+        lot = np.zeros_like(spent)
+        ratio = self.ratio(self._prices)
+        order = np.argsort(-ratio, axis=1)
+        ratio = np.take_along_axis(ratio, order, 1)
+        prices = np.take_along_axis(self._prices, order, 1)
+        supply = np.take_along_axis(self._supply, order, 1)
+        mean = self.mean[order]
+        for q, growth in enumerate(self.growth):
+            budget = cash
+            for drug in range(prices.shape[1]):
+                worth_it = ratio[:, drug] > growth
+                units = np.minimum(supply[:, drug], budget // prices[:, drug])
+                units = np.where(worth_it, units, 0)
+                budget = budget - units * prices[:, drug]
+                lot[q] += units * mean[:, drug]
+            spent[q] = cash - budget
+        return spent, lot
+
+    def _locate(self, wealth) -> Tuple[np.ndarray, np.ndarray]:
+        """Return grid segment of `wealth`, and how far along it wealth is."""
+        wealth = np.maximum(wealth, 0)
+        position = np.where(
+            wealth < 1, wealth, 1 + np.log10(np.maximum(wealth, 1)) * self.steps
+        )
+        index = np.minimum(position.astype(int), len(self.grid) - 2)
+        low, high = self.grid[index], self.grid[index + 1]
+        return index, (wealth - low) / (high - low)
+
+    @staticmethod
+    def _lookup(table: np.ndarray, dest, weapon, located) -> np.ndarray:
+        """Return table[dest, weapon] interpolated at a located wealth."""
+        index, fraction = located
+        below = table[dest, weapon, index]
+        return below + fraction * (table[dest, weapon, index + 1] - below)
+
+    def _value(self, table: np.ndarray, dest, weapon, wealth) -> np.ndarray:
+        """Return table[dest, weapon] at `wealth`, interpolated on the grid."""
+        return self._lookup(table, dest, weapon, self._locate(wealth))
+
+    def _night(self, after, dest, weapon, cash, lot, banked, klass) -> np.ndarray:
+        """Return expected value of the next morning.
+
+        :param after: values of the next morning
+        :param dest: city the player sleeps in
+        :param weapon: weapon code held overnight
+        :param cash: money held
+        :param lot: next morning's worth of drugs held
+        :param banked: whether cash is banked overnight
+        :param klass: growth class of banked cash
+        """
+        grown = np.where(banked, cash * self.growth[klass], cash)
+        safe = self._locate(grown + lot)
+        robbed = self._locate(np.where(banked, grown, cash * (1 - THEFT)) + lot)
+        seized = self._locate(grown + (1 - SEIZURE) * lot)
+        robber, corrupt_cop, good_cop = EVENT_CHANCES
+        defeats = self._defeats[weapon]
+        unarmed = self._lookup(after, dest, 0, safe)
+        value = (1 - sum(EVENT_CHANCES)) * self._lookup(after, dest, weapon, safe)
+        value += robber * np.where(
+            defeats[..., Event.ROBBER],
+            unarmed,
+            self._lookup(after, dest, weapon, robbed),
+        )
+        value += corrupt_cop * np.where(
+            defeats[..., Event.CORRUPT_COP],
+            unarmed,
+            self._lookup(after, dest, weapon, seized),
+        )
+        busted = np.where(
+            np.asarray(lot) > 0, grown, self._value(after, dest, weapon, grown)
+        )
+        value += good_cop * np.where(defeats[..., Event.GOOD_COP], unarmed, busted)
+        return value
+
+    def expected_score(self, days: int = 30, money: int = STARTING_MONEY) -> float:
+        """Return expected final score of a new game played optimally.
+
+        :param days: number of turns
+        :param money: starting money
+        """
+        self.solve(days)
+        start = self._city_index["Miami"]
+        robbed = self._value(self.values[days], start, 0, money * (1 - THEFT))
+        calm = self._value(self.values[days], start, 0, money)
+        robber = EVENT_CHANCES[Event.ROBBER]
+        return float(robber * robbed + (1 - robber) * calm)
+
+    def act(self, game: Game) -> None:
+        """Play one turn of `game` following the solved policy.
+
+        Weighs every destination and weapon like the solver, against the
+        day's actual market: drugs held are kept when they would be bought
+        at today's price, anything else held is sold, and the best value
+        for money is bought.  Everything that can be banked is.
+        """
+        days_left = game.days - game.current_day_num + 1
+        self.solve(days_left)
+        player, city = game.player, game.current_city
+        if days_left == 1:
+            for drug, quantity in list(player.inv.items()):
+                game.sell(drug, quantity)
+            game.end_turn()
+            return
+        if city.bank and city.bank.balance:
+            game.withdraw(city.bank.balance)
+
+        c = self._city_index[city.name]
+        weapon = WEAPONS.index(type(player.weapon) if player.weapon else None)
+        drugs = game.current_day.drugs()
+        held = np.array([player.inv.quantity(drug.id) for drug in drugs])
+        prices = np.array([drug.price for drug in drugs], dtype=float)
+        ratio = self.ratio(prices)
+        order = np.argsort(-ratio)
+        after = self.values[days_left - 1]
+        best, plan = -np.inf, None
+        for dest in range(len(self.cities)):
+            stays = dest == c and city.bank is not None
+            minimum = 0 if not stays or city.bank.opened else city.bank.min_deposit
+            for choice, cost in enumerate(self._cost[c]):
+                if not np.isfinite(cost):
+                    continue
+                armed = self._bought[c, choice]
+                armed = weapon if armed < 0 else armed
+                worth = player.money - cost + prices @ held
+                klass = self._class[c] if stays and worth >= minimum else 0
+                kept = np.where(ratio > self.growth[klass], held, 0)
+                left = worth - prices @ kept
+                if left < 0:
+                    continue
+                bought = np.zeros_like(held)
+                for d in order:
+                    if ratio[d] <= self.growth[klass]:
+                        break
+                    bought[d] = min(drugs[d].quantity, left // prices[d])
+                    left -= bought[d] * prices[d]
+                plans = [(kept, bought, left)]
+                if kept.any() or bought.any():
+                    plans.append((0 * held, 0 * held, worth))  # Sell everything
+                for kept, bought, cash in plans:
+                    banked = stays and cash >= minimum
+                    lot = self.mean @ (kept + bought)
+                    value = self._night(after, dest, armed, cash, lot, banked, klass)
+                    if value > best:
+                        best, plan = value, (dest, choice, kept, bought, banked)
+
+        dest, choice, kept, bought, banked = plan
+        for drug in np.flatnonzero(held - kept):
+            game.sell(int(drug), int(held[drug] - kept[drug]))
+        if self._bought[c, choice] >= 0:
+            game.buy_weapon(city.store.inventory[choice - 1].name)
+        for drug in np.flatnonzero(bought):
+            game.buy(int(drug), int(bought[drug]))
+        if banked and player.money:
+            game.deposit(player.money)
+        if dest == c:
+            game.end_turn()
+        else:
+            game.move(self.cities[dest].name)
+
+
+@lru_cache(maxsize=None)
+def solver() -> Solver:
+    """Return this process's shared Solver."""
+    return Solver()
+
+
+def perfect_player(game: Game) -> None:
+    """Play the solver's expected-score-maximizing policy, see Solver.act."""
+    solver().act(game)
@@ -0,0 +1,75 @@
+"""Contain built-in strategies for automated play.
+
+A strategy is a callable taking a dopewars.engine.Game.  It is called once
+per turn, may trade, bank and buy weapons, and must end its turn by calling
+Game.move.  Randomness should come from `game.rng.strategy`.  Strategies run
+in worker processes, so they must be importable module-level functions.
+"""
+from typing import Union
+
+from dopewars.drugs import CATALOG, NAMES
+from dopewars.engine import Game
+from dopewars.solver import perfect_player
+
+BASE_PRICES = {spec.name: spec.base_price for spec in CATALOG}
+_BASES = [spec.base_price for spec in CATALOG]  # Indexed by drug ID
+
+
+def _sell_all(game: Game) -> None:
+    """Sell every drug in inventory."""
+    for name, quantity in list(game.player.inv.items()):
+        game.sell(name, quantity)
+
+
+def _buy_max(game: Game, drug: Union[int, str]) -> None:
+    """Buy as much of `drug`, an ID or name, as money and supply allow."""
+    day = game.current_day
+    amount = min(game.player.money // day.get_price(drug), day.get_quantity(drug))
+    if amount > 0:
+        game.buy(drug, amount)
+
+
+def _move_randomly(game: Game) -> None:
+    """Move to a random destination."""
+    game.move(game.rng.strategy.choice(game.destinations()).name)
+
+
+def wander(game: Game) -> None:
+    """Never trade, only move around."""
+    _move_randomly(game)
+
+
+def random_trader(game: Game) -> None:
+    """Sell everything, then spend all cash on a random drug."""
+    _sell_all(game)
+    _buy_max(game, game.rng.strategy.choice(NAMES))
+    _move_randomly(game)
+
+
+def bargain_hunter(game: Game) -> None:
+    """Sell above base price, buy whatever is cheapest relative to base price.
+
+    Buys a Glock when passing through a store with cash to spare.
+    """
+    day = game.current_day
+    for name, held in list(game.player.inv.items()):
+        if day.get_price(name) > BASE_PRICES[name] or game.current_day_num == game.days:
+            game.sell(name, held)
+    store = game.current_city.store
+    if store and game.player.weapon is None and game.player.money > 5000:
+        if any(weapon.name == "Glock" for weapon in store.inventory):
+            game.buy_weapon("Glock")
+    if game.current_day_num < game.days:
+        ratios = [price / base for price, base in zip(day.prices(), _BASES)]
+        cheapest = min(ratios)
+        if cheapest < 1:
+            _buy_max(game, ratios.index(cheapest))
+    _move_randomly(game)
+
+
+STRATEGIES = {
+    "wander": wander,
+    "random": random_trader,
+    "bargain": bargain_hunter,
+    "perfect": perfect_player,
+}
@@ -0,0 +1,142 @@
+"""Contain tournament runner ranking strategies against each other.
+
+Every strategy plays the same games: game n of a tournament always uses
+GameRNG(seed, n), so every strategy sees the same prices and rolls the same
+events on the same day.  Comparing strategies game by game then removes
+market luck from the comparison, and paired differences have far smaller
+confidence intervals than differences of independent means, so fewer games
+settle which strategy is better.
+"""
+import time
+from typing import List, NamedTuple, Sequence, Tuple, Union
+
+import numpy as np
+
+from dopewars.simulate import Strategy, half_width, play_chunks
+from dopewars.utilities import fmt_money
+
+
+def strategy_name(spec: Union[str, Strategy]) -> str:
+    """Return display name of strategy `spec`, see load_strategy."""
+    return spec if isinstance(spec, str) else spec.__name__
+
+
+class TournamentReport(NamedTuple):
+    """Hold results of a tournament, strategies in the order given."""
+
+    seed: int
+    seconds: float
+    names: Tuple[str, ...]
+    scores: np.ndarray  # Final scores as Python ints, shaped (strategies, games)
+    busted: np.ndarray  # Bust flags, shaped like scores
+
+    @property
+    def games(self) -> int:
+        """Return number of games every strategy played."""
+        return self.scores.shape[1]
+
+    @property
+    def means(self) -> np.ndarray:
+        """Return mean final score of every strategy."""
+        return np.array([sum(row) / self.games for row in self.scores.tolist()])
+
+    def intervals(self) -> np.ndarray:
+        """Return half width of every strategy's 95% confidence interval."""
+        return half_width(self.scores)
+
+    def ranking(self) -> List[int]:
+        """Return strategy indexes, highest mean score first."""
+        return sorted(range(len(self.names)), key=lambda index: -self.means[index])
+
+    def win_rates(self) -> np.ndarray:
+        """Return share of games each strategy scored more than each other.
+
+        Entry (i, j) is strategy i's win rate against strategy j, ties count
+        as half a win.
+        """
+        first, second = self.scores[:, None, :], self.scores[None, :, :]
+        wins = (first > second).astype(float) + 0.5 * (first == second)
+        return wins.mean(axis=2)
+
+    def difference(self, first: int, second: int) -> Tuple[float, float]:
+        """Return mean score difference of two strategies over the same games.
+
+        :param first: strategy index
+        :param second: strategy index
+        :return: mean of first's score minus second's, and half width of its
+            95% confidence interval
+        """
+        paired = self.scores[first] - self.scores[second]
+        return sum(paired.tolist()) / self.games, float(half_width(paired))
+
+    def __str__(self) -> str:
+        ranking = self.ranking()
+        means, intervals = self.means, self.intervals()
+        width = max(len(name) for name in self.names + ("Strategy",))
+        lines = [
+            f"Games: {self.games} per strategy in {self.seconds:.2f}s, "
+            f"seed {self.seed}",
+            f"#  {'Strategy':<{width}}  {'Mean score':>14}  {'95% CI':>12}  Busted",
+        ]
+        for place, index in enumerate(ranking, 1):
+            lines.append(
+                f"{place:<2} {self.names[index]:<{width}}  "
+                f"{fmt_money(int(means[index])):>14}  "
+                f"{'±' + fmt_money(int(intervals[index])):>12}  "
+                f"{self.busted[index].mean():.1%}"
+            )
+        for better, worse in zip(ranking, ranking[1:]):
+            mean, half = self.difference(better, worse)
+            lines.append(
+                f"{self.names[better]} - {self.names[worse]}: "
+                f"{fmt_money(int(mean))} ±{fmt_money(int(half))} on the same games"
+            )
+        lines.append("Win rates, row against column:")
+        lines.append(" " * width + "".join(f"  {self.names[i]:>8.8}" for i in ranking))
+        rates = self.win_rates()
+        for row in ranking:
+            cells = "".join(f"  {rates[row, col]:>8.1%}" for col in ranking)
+            lines.append(f"{self.names[row]:<{width}}{cells}")
+        return "\n".join(lines)
+
+
+def tournament(
+    strategies: Sequence[Union[str, Strategy]],
+    games: int,
+    seed: int = None,
+    days: int = 30,
+    money: int = None,
+    workers: int = None,
+    chunk: int = 1000,
+) -> TournamentReport:
+    """Play `games` games with every strategy, on the same seeds.
+
+    :param strategies: strategy names or callables, see load_strategy
+    :param games: number of games every strategy plays
+    :param seed: master seed, random if omitted
+    :param days: number of turns per game
+    :param money: starting money, defaults to STARTING_MONEY
+    :param workers: number of processes, None for one per CPU,
+        1 to play in this process
+    :param chunk: number of games handed to a worker at once
+    """
+    if games < 1:
+        raise ValueError("Tournament must play at least one game")
+    names = tuple(strategy_name(spec) for spec in strategies)
+    if len(set(names)) != len(names):
+        raise ValueError("Every strategy must have a different name")
+    seed = np.random.SeedSequence(seed).entropy
+    tasks = [
+        (spec, seed, start, min(start + chunk, games), days, money)
+        for spec in strategies
+        for start in range(0, games, chunk)
+    ]
+    started = time.perf_counter()
+    results = play_chunks(tasks, workers)
+    seconds = time.perf_counter() - started
+    scores = np.array([score for score, _ in results], dtype=object)
+    busted = np.array([bust for _, bust in results], dtype=bool)
+    shape = (len(names), games)
+    return TournamentReport(
+        seed, seconds, names, scores.reshape(shape), busted.reshape(shape)
+    )
@@ -1,4 +1,29 @@
 """Contain utility functions."""
+import struct
+from typing import Tuple
+
+INT_LENGTH = struct.Struct("<H")
+
+
+def pack_int(value: int) -> bytes:
+    """Return `value` as length-prefixed little-endian bytes, of any size.
+
+    :param value: signed integer
+    """
+    data = value.to_bytes((value.bit_length() + 8) // 8, "little", signed=True)
+    return INT_LENGTH.pack(len(data)) + data
+
+
+def unpack_int(data: bytes, offset: int = 0) -> Tuple[int, int]:
+    """Return integer packed at `offset` of `data` and offset after it.
+
+    :param data: bytes packed with pack_int
+    :param offset: where the integer starts
+    """
+    (length,) = INT_LENGTH.unpack_from(data, offset)
+    start = offset + INT_LENGTH.size
+    value = int.from_bytes(data[start : start + length], "little", signed=True)
+    return value, start + length
 
 
 def fmt_money(amount: int) -> str:
@@ -11,7 +36,7 @@ def fmt_money(amount: int) -> str:
     if len(string) < 4:
         return f"${string}"
     chunks = []
-    indices = range(3, 100, 3)  # Every 4th character should be a comma
+    indices = range(3, len(string), 3)  # Every 4th character should be a comma
     for index, char in enumerate(reversed(string)):
         if index in indices:
             chunks.append(",")
@@ -1,10 +1,14 @@
 """Contains stores."""
-from typing import List
+from typing import List, Tuple
+
+from dopewars.events import Event
 
 
 class Store:
     """Create place from which to buy items."""
 
+    __slots__ = ("inventory",)
+
     def __init__(self) -> None:
         self.inventory: List[Weapon] = None
 
@@ -13,12 +17,16 @@ class Store:
 
 
 class Walmart(Store):
+    __slots__ = ()
+
     def __init__(self):
         super(Walmart, self).__init__()
         self.inventory = [Gun(), Knife()]
 
 
 class CIA(Store):
+    __slots__ = ()
+
     def __init__(self):
         super(CIA, self).__init__()
         self.inventory = [Blackmail()]
@@ -30,6 +38,16 @@ class Weapon:
     When they protect the player, they are lost.
     """
 
+    __slots__ = ("name", "price")
+
+    defeats: Tuple[bool, ...] = (False, False, False)  # Indexed by Event
+    mask = 0  # Bit `event` set for every event defeated, from defeats
+
+    def __init_subclass__(cls, **kwargs) -> None:
+        """Precompute the bitmask of events the weapon defeats."""
+        super().__init_subclass__(**kwargs)
+        cls.mask = sum(1 << event for event, won in enumerate(cls.defeats) if won)
+
     def __init__(self, name: str, price: int):
         self.name = name
         self.price = price
@@ -47,52 +65,46 @@ class Weapon:
             return self.name != other.name
         return False
 
-    @staticmethod
-    def defeat(opponent: str) -> bool:
-        """Overload this method to implement functionality.
+    def defeat(self, opponent: Event) -> bool:
+        """Return whether weapon protects the player from `opponent`.
 
-        :param opponent:
-        :return:
+        Override Weapon.defeats to implement functionality.
+        :param opponent: Event
         """
-        return False
+        return bool(self.mask >> opponent & 1)
 
 
 class Knife(Weapon):
     """Prevent thieves from stealing money."""
 
+    __slots__ = ()
+
+    defeats = (True, False, False)
+
     def __init__(self):
         super(Knife, self).__init__("Knife", 20)
 
-    @staticmethod
-    def defeat(opponent: str) -> bool:
-        """
-        :param opponent:
-        :return:
-        """
-        return opponent == "robber"
-
 
 class Gun(Weapon):
     """Prevent Corrupt cops from taking drugs and thieves from taking money."""
 
+    __slots__ = ()
+
+    defeats = (True, True, False)
+
     def __init__(self):
         super(Gun, self).__init__("Glock", 500)
 
-    @staticmethod
-    def defeat(opponent: str) -> bool:
-        """
-        :param opponent:
-        :return:
-        """
-        return opponent == "robber" or opponent == "corrupt cop"
-
 
 class Blackmail(Weapon):
     """Prevent Good Cops from causing the player to instantly lose."""
 
+    __slots__ = ()
+
+    defeats = (False, False, True)
+
     def __init__(self):
         super(Blackmail, self).__init__("Blackmail", 100_000)
 
-    @staticmethod
-    def defeat(opponent: str) -> bool:
-        return opponent == "good cop"
+
+WEAPONS = (None, Knife, Gun, Blackmail)  # Weapon codes, 0 for no weapon
@@ -2,12 +2,283 @@
 """
 Entry point for game
 """
+import argparse
+import os
+import sys
 
+from dopewars import savegame
 from dopewars.gameplay import Gameplay
+from dopewars.metrics import DUMP_INTERVAL, Metrics
+from dopewars.render import Renderer
+from dopewars.scores import DEFAULT_FILE
+from dopewars.utilities import fmt_money
+
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Dopewars")
+    commands = parser.add_subparsers(dest="command")
+    play = commands.add_parser("play", help="play interactively (default)")
+    play.add_argument(
+        "--diff", action="store_true", help="only redraw lines that changed"
+    )
+    play.add_argument(
+        "--resume", action="store_true", help="continue the saved game"
+    )
+    play.add_argument(
+        "--save-file",
+        default=savegame.DEFAULT_FILE,
+        help="where a game in progress is saved on Ctrl-C",
+    )
+    play.add_argument("--log-dir", help="record action logs of games here")
+    script = commands.add_parser(
+        "script", help="play the terminal menus with answers read from a script"
+    )
+    script.add_argument(
+        "script",
+        nargs="?",
+        default="-",
+        help="file of answers, one per line, - or omitted for stdin",
+    )
+    script.add_argument(
+        "-o", "--output", help="write screens to this file, - for stdout"
+    )
+    script.add_argument("--scores", default=DEFAULT_FILE, help="score file")
+    script.add_argument(
+        "--seed", type=int, default=None, help="master seed, for repeatable runs"
+    )
+    script.add_argument("--log-dir", help="record action logs of games here")
+    sim = commands.add_parser("simulate", help="play games with a bot")
+    sim.add_argument("-n", "--games", type=int, default=10_000)
+    sim.add_argument(
+        "-s",
+        "--strategy",
+        default="bargain",
+        help="built-in strategy name (wander, random, bargain, perfect) "
+        "or module:function",
+    )
+    sim.add_argument("--seed", type=int, default=None)
+    sim.add_argument("--days", type=int, default=30)
+    sim.add_argument("--money", type=int, default=None, help="starting money")
+    sim.add_argument("-w", "--workers", type=int, default=None)
+    tour = commands.add_parser(
+        "tournament", help="rank strategies playing the same games"
+    )
+    tour.add_argument(
+        "strategies",
+        nargs="+",
+        help="built-in strategy names (wander, random, bargain, perfect) "
+        "or module:function",
+    )
+    tour.add_argument("-n", "--games", type=int, default=1000)
+    tour.add_argument("--seed", type=int, default=None)
+    tour.add_argument("--days", type=int, default=30)
+    tour.add_argument("--money", type=int, default=None, help="starting money")
+    tour.add_argument("-w", "--workers", type=int, default=None)
+    solve = commands.add_parser("solve", help="estimate the best expected score")
+    solve.add_argument("--days", type=int, default=30)
+    solve.add_argument("--money", type=int, default=None, help="starting money")
+    solve.add_argument(
+        "--verify",
+        type=int,
+        default=200,
+        help="play this many games with the policy to measure its score, "
+        "0 to only print the solver's estimate",
+    )
+    solve.add_argument("--seed", type=int, default=None)
+    serve = commands.add_parser("serve", help="host games over TCP")
+    serve.add_argument("-p", "--port", type=int, default=2323)
+    serve.add_argument("--host", default=None, help="defaults to all interfaces")
+    serve.add_argument("--scores", default=DEFAULT_FILE, help="score file")
+    serve.add_argument("--log-dir", help="record action logs of games here")
+    serve.add_argument(
+        "--report", type=float, default=60, help="seconds between stats, 0 for none"
+    )
+    replay = commands.add_parser("replay", help="replay recorded action logs")
+    replay.add_argument("logs", nargs="+", help="action log files")
+    replay.add_argument("--turn", type=int, help="show the game at this turn")
+    for command in play, script, serve:
+        command.add_argument(
+            "--metrics",
+            help="dump metrics to this file, as JSON if it ends in .json, "
+            "in the Prometheus text format otherwise",
+        )
+        command.add_argument(
+            "--metrics-interval",
+            type=float,
+            default=DUMP_INTERVAL,
+            help="seconds between metrics dumps",
+        )
+    return parser.parse_args()
+
+
+def metrics(args: argparse.Namespace) -> Metrics:
+    """Return metrics dumping where `args` ask, None if they aren't wanted."""
+    file = getattr(args, "metrics", None)
+    if file is None:
+        return None
+    return Metrics(file, getattr(args, "metrics_interval", DUMP_INTERVAL))
+
+
+def simulate(args: argparse.Namespace) -> None:
+    """Run simulation described by `args` and print the report."""
+    from dopewars.simulate import simulate
+
+    print(
+        simulate(
+            args.games,
+            args.strategy,
+            seed=args.seed,
+            days=args.days,
+            money=args.money,
+            workers=args.workers,
+        )
+    )
+
+
+def tournament(args: argparse.Namespace) -> None:
+    """Run tournament described by `args` and print the ranking."""
+    from dopewars.tournament import tournament
+
+    print(
+        tournament(
+            args.strategies,
+            args.games,
+            seed=args.seed,
+            days=args.days,
+            money=args.money,
+            workers=args.workers,
+        )
+    )
+
+
+def solve(args: argparse.Namespace) -> None:
+    """Solve games described by `args`, print the perfect-play score.
+
+    The reference score is the mean of games played with the solved policy;
+    the solver's own estimate marks holdings to market and overestimates it.
+    """
+    import time
+
+    from dopewars.engine import STARTING_MONEY
+    from dopewars.simulate import simulate
+    from dopewars.solver import SCENARIOS, solver
+
+    money = STARTING_MONEY if args.money is None else args.money
+    started = time.perf_counter()
+    score = solver().expected_score(args.days, money)
+    seconds = time.perf_counter() - started
+    print(f"Solved {args.days} days in {seconds:.1f}s")
+    if args.verify:
+        report = simulate(
+            args.verify, "perfect", seed=args.seed, days=args.days, money=args.money
+        )
+        print(
+            f"Perfect-play score: {fmt_money(int(report.mean))} "
+            f"±{fmt_money(int(report.interval))} over {report.games} games"
+        )
+    print(
+        f"Solver estimate: ~{fmt_money(int(score))}, holdings marked to market, "
+        f"wealth on a log grid and {SCENARIOS} market scenarios"
+    )
+    if args.verify:
+        print(report)
+
+
+def replay(args: argparse.Namespace) -> None:
+    """Verify action logs, or show the game of one at a given turn."""
+    from dopewars.actions import ActionLog
+    from dopewars.replay import Replay
+
+    for file in args.logs:
+        recording = Replay(ActionLog.load(file))
+        if args.turn:
+            game = recording.seek(args.turn)
+            print(f"{file}: {game}, {fmt_money(game.player.money)}")
+            if game.current_day.event_text:
+                print(game.current_day.event_text)
+            print("\n".join(game.player.inv_lines()))
+            print("\n".join(game.current_day.offerings()))
+            continue
+        problems = recording.verify()
+        print(f"{file}: {'; '.join(problems) if problems else 'OK'}")
+
+
+def script(args: argparse.Namespace) -> None:
+    """Play the menus with scripted answers until the player quits or they end.
+
+    Screens are rendered to `args.output`, or discarded.
+    """
+    measured = metrics(args)
+    answers = sys.stdin if args.script == "-" else open(args.script)
+    output = sys.stdout if args.output == "-" else open(args.output or os.devnull, "w")
+    try:
+        gameplay = Gameplay(
+            score_file=args.scores,
+            renderer=Renderer(output),
+            log_dir=args.log_dir,
+            metrics=measured,
+            seed=args.seed,
+        )
+        gameplay.run(answers=(line.rstrip("\r\n") for line in answers))
+    finally:
+        if output is not sys.stdout:
+            output.close()
+        if answers is not sys.stdin:
+            answers.close()
+        if measured is not None:
+            measured.dump()
+
+
+def play(args: argparse.Namespace) -> None:
+    """Play on the terminal, saving a game in progress when interrupted."""
+    diff = getattr(args, "diff", False)
+    file = getattr(args, "save_file", savegame.DEFAULT_FILE)
+    log_dir = getattr(args, "log_dir", None)
+    measured = metrics(args)
+    gameplay = Gameplay(renderer=Renderer(diff=diff), log_dir=log_dir, metrics=measured)
+    menu = None
+    if getattr(args, "resume", False):
+        menu = gameplay.resume(savegame.load(file))
+        os.remove(file)  # A save can only be resumed once
+    try:
+        gameplay.run(menu)
+    except (KeyboardInterrupt, EOFError):
+        if gameplay.game and not gameplay.game.over:
+            savegame.save(gameplay.game, file)
+            print("\nGame saved, continue it with: start.py play --resume")
+        raise
+    finally:
+        if measured is not None:
+            measured.dump()
+
 
 if __name__ == '__main__':
+    arguments = parse_args()
     try:
-        Gameplay()
+        if arguments.command == "simulate":
+            simulate(arguments)
+        elif arguments.command == "tournament":
+            tournament(arguments)
+        elif arguments.command == "solve":
+            solve(arguments)
+        elif arguments.command == "script":
+            script(arguments)
+        elif arguments.command == "serve":
+            from dopewars.server import serve
+
+            serve(
+                arguments.port,
+                arguments.host,
+                arguments.scores,
+                arguments.report,
+                arguments.log_dir,
+                metrics(arguments),
+            )
+        elif arguments.command == "replay":
+            replay(arguments)
+        else:
+            play(arguments)
     except (KeyboardInterrupt, EOFError):
         pass
     finally:
@@ -0,0 +1,22 @@
+"""
+Contains utilities shared by tests
+"""
+
+
+def respond(prompt: str, previous: str, games: list) -> str:
+    """
+    Testing utility, answers prompts so that the player keeps moving,
+    starting a new game whenever one ends, until `games` is empty
+    """
+    if prompt == "What would you like to do: ":
+        return games.pop() if games else "3"
+    if prompt == "How many turns: ":
+        return "50"
+    if prompt == "Name: ":
+        return "Bob"
+    if prompt == "What do you want to do: ":
+        # Move is option 4 in cities with a bank or store, 3 elsewhere
+        return "3" if previous == prompt else "4"
+    if prompt == "Destination: ":
+        return "1"
+    return ""  # Acknowledge events and score screens
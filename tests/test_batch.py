@@ -0,0 +1,108 @@
+"""
+Contains tests for the vectorized batch environment
+"""
+import numpy as np
+from pytest import raises
+
+from dopewars.banks import GoldmanSacks
+from dopewars.batch import BatchAction, BatchEnv
+from dopewars.drugs import CATALOG
+from dopewars.engine import Game
+from dopewars.rng import GameRNG
+
+
+def test_markets_match_games() -> None:
+    """
+    Tests that every game of a batch has the markets of the matching Game
+    """
+    env = BatchEnv(4, seed=7)
+    for episode in range(2):
+        observation = env.reset()
+        action = BatchAction(np.zeros(len(CATALOG)), city=[1, 2, 3, 4])
+        moved, _, _, _ = env.step(action)
+        for n in range(4):
+            game = Game("Bob", rng=GameRNG(7, episode * 4 + n))
+            assert observation.prices[n].tolist() == game.prices("Miami", 1)
+            city = env.city_names[n + 1]
+            assert moved.prices[n].tolist() == game.prices(city, 2)
+
+
+def test_invalid_actions_clipped() -> None:
+    """
+    Tests that impossible trades, deposits and weapons are clipped or skipped
+    """
+    env = BatchEnv(50, seed=3, days=1)
+    start = env.reset()
+    trade = np.full((50, len(CATALOG)), 10 ** 9)
+    trade[:, 0] = -5
+    observation, reward, done, _ = env.step(BatchAction(trade, bank=1000, weapon=3))
+    assert done.all()
+    assert (observation.holdings[:, 0] == 0).all()
+    assert (observation.holdings <= start.quantities).all()
+    assert (observation.money >= 0).all()
+    assert (observation.money < start.prices.min(axis=1)).any()
+    assert (observation.balances == 0).all()  # Below Miami's minimum
+    assert (observation.weapon == 0).all()  # No store in Miami
+    assert (reward == observation.money - start.money).all()
+    env.reset()
+    observation, _, _, _ = env.step(BatchAction(trade * 0, weapon=9))
+    assert (observation.weapon == 0).all()  # Unknown weapon code
+    with raises(ValueError):
+        env.reset()
+        env.step(BatchAction(trade, city=7))
+
+
+def test_banking() -> None:
+    """
+    Tests that deposits above the minimum are banked and accrue interest
+    """
+    env = BatchEnv(20, seed=5, days=2, money=100_000)
+    env.reset()
+    observation, _, _, _ = env.step(
+        BatchAction(np.zeros(len(CATALOG)), bank=60_000, weapon=0)
+    )
+    assert (observation.balances[:, 0] == 62_400).all()
+    _, reward, done, _ = env.step(BatchAction(np.zeros(len(CATALOG)), bank=-1))
+    assert done.all()
+    assert (reward == 0).all()
+
+
+def test_episode() -> None:
+    """
+    Tests that every game ends, and rewards add up to final scores
+    """
+    rng = np.random.default_rng(1)
+    env = BatchEnv(500, seed=1)
+    observation, done = env.reset(), np.zeros(500, dtype=bool)
+    rewards = observation.money.copy()  # After day one's event
+    busted = np.zeros(500, dtype=bool)
+    while not done.all():
+        trade = -observation.holdings
+        trade[np.arange(500), rng.integers(len(CATALOG), size=500)] = 10 ** 9
+        action = BatchAction(trade, city=rng.integers(len(env.city_names), size=500))
+        observation, reward, done, info = env.step(action)
+        rewards += reward
+        busted = info["busted"]
+    assert (observation.day <= 30).all()
+    assert (observation.day[~busted] == 30).all()
+    assert 0 < busted.mean() < 0.5
+    assert (rewards == env.scores).all()
+
+
+def test_exact_interest() -> None:
+    """
+    Tests that interest matches the engine's exact integers beyond 2**53,
+    and that balances too large for int64 raise instead of wrapping
+    """
+    env = BatchEnv(1, seed=5, days=5)
+    env.reset()
+    new_york = env.city_names.index("NYC")
+    env.balances[0, new_york] = 2 ** 59 + 1
+    bank = GoldmanSacks()
+    bank.restore(2 ** 59 + 1, True)
+    bank.calc_interest()
+    env.step(BatchAction(np.zeros(len(CATALOG))))
+    assert env.balances[0, new_york] == bank.balance
+    env.balances[0, new_york] = 2 ** 62
+    with raises(OverflowError):
+        env.step(BatchAction(np.zeros(len(CATALOG))))
@@ -4,9 +4,10 @@ Contains tests for Day
 from pytest import raises
 
 from dopewars.day import Day
-from dopewars.drugs import Drug, InventoryDrug
+from dopewars.drugs import CATALOG, IDS, Drug
+from dopewars.events import EVENT_DRAW, EVENT_TABLE, EVENTS, Event, compile_events
 from dopewars.player import Player
-from dopewars.drugs import Weed
+from dopewars.rng import GameRNG
 from dopewars.weapons import Blackmail, Knife, Gun
 
 
@@ -17,7 +18,7 @@ def test_day_init() -> None:
     p = Player("bob", 5000)
     nyc = Day("NYC", p)
     assert len(nyc._drugs) == 10
-    for _, drug in nyc._drugs.items():
+    for drug in nyc._drugs:
         assert isinstance(drug, Drug)
 
 
@@ -27,9 +28,9 @@ def test_day_buy() -> None:
     """
     bob = Player("Bob", 1)
     day = Day("Miami!", bob)
-    weed = Weed()
+    weed = Drug.from_spec(CATALOG[IDS["Weed"]])
     weed.quantity = 1
-    day._drugs["Weed"] = weed
+    day._drugs[weed.id] = weed
     with raises(RuntimeError):
         day.buy(
             "Weed", 0
@@ -37,10 +38,10 @@ def test_day_buy() -> None:
         day.buy("Weed", -5000)
         day.buy("Weed", 1)  # Same as when you have insufficient funds
     day.player._money = 5000  # Too bad this doesn't work IRL
-    orig_quantity = day._drugs["Weed"].quantity
+    orig_quantity = day._drugs[weed.id].quantity
     day.buy("Weed", 1)
-    assert day.player.inv["Weed"].quantity == 1
-    assert day._drugs["Weed"].quantity + 1 == orig_quantity
+    assert day.player.inv["Weed"] == 1
+    assert day._drugs[weed.id].quantity + 1 == orig_quantity
     with raises(RuntimeError):
         day.buy("Weed", 1)
 
@@ -51,7 +52,7 @@ def test_day_sell() -> None:
     """
     bob = Player("Bob", 500)
     day = Day("Miami", bob)
-    bob.inv["Weed"] = InventoryDrug("Weed", 1)
+    bob.inv["Weed"] = 1
     bob.money = (
         500
     )  # Events happen randomly, this prevents an event from unexpectedly lowering the player's money
@@ -79,3 +80,45 @@ def test_weaponry_usage() -> None:
     Tests
     :return:
     """
+
+
+def test_weapon_defeats() -> None:
+    """
+    Tests which events each weapon protects against
+    """
+    assert Knife().defeat(Event.ROBBER)
+    assert not Knife().defeat(Event.CORRUPT_COP)
+    assert Gun().defeat(Event.ROBBER) and Gun().defeat(Event.CORRUPT_COP)
+    assert not Gun().defeat(Event.GOOD_COP)
+    assert Blackmail().defeat(Event.GOOD_COP)
+    assert not Blackmail().defeat(Event.ROBBER)
+
+
+def test_event_table() -> None:
+    """
+    Tests that the compiled event table keeps every event's odds
+    """
+    assert len(EVENT_TABLE) == EVENT_DRAW
+    for event, spec in zip(Event, EVENTS):
+        assert spec.event == event
+        assert EVENT_TABLE.count(spec) == spec.weight
+    with raises(ValueError):
+        compile_events(draw=50)
+    assert Gun.mask == 0b011 and Blackmail().mask == 0b100
+
+
+def test_event_odds() -> None:
+    """
+    Tests that days roll events about as often as the table says
+    """
+    rng = GameRNG(1)
+    p = Player("Bob", 100000, rng)
+    counts = [0] * len(EVENTS)
+    for turn in range(9000):
+        rng.start_turn(turn)
+        event = Day("test", p).event
+        if event is not None:
+            counts[event] += 1
+    for count, spec in zip(counts, EVENTS):
+        expected = 9000 * spec.weight / EVENT_DRAW
+        assert abs(count - expected) < 4 * expected ** 0.5
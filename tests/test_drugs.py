@@ -3,14 +3,14 @@ Contains Pytest formatted tests for the drug classes
 """
 from pytest import raises
 
-from dopewars.drugs import Drug, InventoryDrug
+from dopewars.drugs import CATALOG, IDS, Drug, Inventory, InventoryDrug, Surge, drug_id
 
 
 def test_drug() -> None:
     """
     Test creation of example drug
     """
-    soma = redo_surge(Drug("Soma", 100, 12), None)
+    soma = redo_surge(Drug("Soma", 100, 12), Surge.NONE)
     assert 112 >= soma.price >= 88  # Due to jitter, price won't be less than 100 +/- 12
     assert "Soma price: " in str(soma)
     with raises(ValueError):
@@ -23,10 +23,10 @@ def test_surge_drug() -> None:
     Example drug, but with surges, this time.
     The values tested for change each time, but are within certain ranges
     """
-    soma = redo_surge(Drug("Soma", 100, 12), "hi")
+    soma = redo_surge(Drug("Soma", 100, 12), Surge.HI)
     assert 33 >= soma.quantity >= 8  #
     assert soma.price > 112
-    soma = redo_surge(Drug("Soma", 100, 12), "lo")
+    soma = redo_surge(Drug("Soma", 100, 12), Surge.LO)
     assert 15 <= soma.quantity <= 300
     assert soma.price <= 79  # the max price is 0.67 * 100 + 12
     assert soma.price >= 15  # the min price is 15% of base price
@@ -80,10 +80,53 @@ def redo_surge(drug: Drug, new_surge_val) -> Drug:
     Testing utility, changes surge value to new_surge_val, used to by-pass
     the random element of Drug._calc_surge
     :param drug: Drug element to be changed
-    :param new_surge_val: None, 'lo' or 'hi' are valid values
+    :param new_surge_val: a Surge
     :return:
     """
     drug._surge = new_surge_val
     drug._calc_price()
     drug._calc_quantity()
     return drug
+
+
+def test_inventory() -> None:
+    """
+    Tests array-backed inventory
+    """
+    inv = Inventory(("Soma", "Weed", "Luuds"))
+    assert not inv
+    assert inv == {}
+    inv.add(1, 5)
+    inv.add(1, 2)
+    inv["Soma"] = 3
+    assert len(inv) == 2
+    assert inv.total == 10
+    assert inv == {"Soma": 3, "Weed": 7}
+    assert list(inv) == ["Soma", "Weed"]
+    assert inv.get("Luuds") == 0
+    with raises(RuntimeError):
+        inv.remove(inv.id("Weed"), 8)
+    inv.remove(inv.id("Weed"), 7)
+    assert "Weed" not in inv
+    assert len(inv) == 1
+    assert inv.total == 3
+    with raises(RuntimeError):
+        inv.id("Coffee")
+    with raises(AttributeError):
+        inv.extra = 1  # Slotted, no per-instance __dict__
+
+
+def test_catalog() -> None:
+    """
+    Tests catalog IDs and lookups
+    """
+    for index, spec in enumerate(CATALOG):
+        assert spec.id == index
+        assert IDS[spec.name] == index
+        assert Drug.from_spec(spec).id == index
+    assert drug_id("Weed") == drug_id(IDS["Weed"]) == IDS["Weed"]
+    assert Drug("Soma", 100, 12).id is None
+    with raises(RuntimeError):
+        drug_id("Soma")
+    with raises(RuntimeError):
+        drug_id(len(CATALOG))
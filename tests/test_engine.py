@@ -0,0 +1,145 @@
+"""
+Contains tests for the headless game engine
+"""
+from pytest import raises
+
+from dopewars.engine import STARTING_MONEY, Game
+from dopewars.rng import GameRNG
+from dopewars.weapons import Knife
+
+
+def test_game_init() -> None:
+    """
+    Tests that a game starts on day one in Miami
+    """
+    game = Game("Bob", days=5, rng=GameRNG(1))
+    assert game.current_day_num == 1
+    assert game.current_city.name == "Miami"
+    assert game.player.money == STARTING_MONEY
+    assert game.score == STARTING_MONEY
+    assert game.current_city not in game.destinations()
+
+
+def test_game_buy_sell() -> None:
+    """
+    Tests trading through the engine
+    """
+    game = Game("Bob", rng=GameRNG(2))
+    game.player.money = 1_000_000
+    drug = game.current_day.get_drugs()["Luuds"]
+    drug.quantity = 10
+    cost = game.buy("Luuds", 2)
+    assert cost == 2 * drug.price
+    assert game.player.money == 1_000_000 - cost
+    assert game.sell("Luuds", 2) == cost
+    assert game.player.money == 1_000_000
+    with raises(RuntimeError):
+        game.sell("Luuds", 1)
+
+
+def test_game_bank() -> None:
+    """
+    Tests deposits and withdrawals through the engine
+    """
+    game = Game("Bob", rng=GameRNG(3))
+    game.current_city = game.cities["Atlanta"]
+    assert game.deposit(100) == 100
+    assert game.player.money == STARTING_MONEY - 100
+    assert game.score == STARTING_MONEY
+    with raises(RuntimeError):
+        game.deposit(STARTING_MONEY)
+    with raises(RuntimeError):
+        game.withdraw(101)
+    with raises(RuntimeError):
+        game.deposit(-5)
+    assert game.withdraw(100) == 0
+    assert game.player.money == STARTING_MONEY
+    game.current_city = game.cities["Miami"]
+    with raises(RuntimeError):
+        game.deposit(100)  # BoA Constrictor needs a larger first deposit
+    game.current_city = game.cities["LA"]
+    with raises(RuntimeError):
+        game.deposit(100)  # No bank in LA
+
+
+def test_game_buy_weapon() -> None:
+    """
+    Tests buying weapons through the engine
+    """
+    game = Game("Bob", rng=GameRNG(5))
+    with raises(RuntimeError):
+        game.buy_weapon("Knife")  # No store in Miami
+    game.current_city = game.cities["LA"]
+    assert game.buy_weapon("Knife") == Knife()
+    assert game.player.money == STARTING_MONEY - Knife().price
+    with raises(RuntimeError):
+        game.buy_weapon("Blackmail")
+
+
+def test_game_full_run() -> None:
+    """
+    Tests that moving every turn ends the game after `days` turns
+    """
+    game = Game("Bob", days=30, rng=GameRNG(6))
+    while not game.over:
+        with raises(RuntimeError):
+            game.move(game.current_city.name)
+        game.move(game.destinations()[0].name)
+    assert game.busted or game.current_day_num == 30
+    with raises(RuntimeError):
+        game.move("NYC")
+
+
+def test_game_skip() -> None:
+    """
+    Tests that skipping days plays out like ending turns one at a time
+    """
+    skipped = Game("Bob", rng=GameRNG(4, 2), record=True)
+    ended = Game("Bob", rng=GameRNG(4, 2), record=True)
+    for game in skipped, ended:
+        game.player.money = 100_000
+        game.move("Atlanta")
+        game.deposit(50_000)
+    assert skipped.skip(10) is skipped.current_day
+    for _ in range(10):
+        ended.end_turn()
+    assert skipped.current_day_num == ended.current_day_num == 12
+    assert skipped.score == ended.score
+    assert skipped.cities["Atlanta"].bank.balance > 50_000
+    assert skipped.log.events == ended.log.events
+    assert skipped.skip(100) is None
+    assert skipped.over and skipped.current_day_num == 30
+    with raises(ValueError):
+        ended.skip(0)
+
+
+def test_game_score() -> None:
+    """
+    Tests that the score follows every deposit, withdrawal and day of interest
+    """
+    game = Game("Bob", rng=GameRNG(4, 3))
+    game.player.money = 2_000_000
+    game.move("NYC")
+    game.deposit(1_500_000)
+    assert game.score == 2_000_000
+    game.move("Atlanta")
+    game.deposit(100_000)
+    game.skip(5)
+    banks = [city.bank for city in game.cities.values() if city.bank]
+    assert game.score == game.player.money + sum(bank.balance for bank in banks)
+    assert game.score > 2_000_000
+    game.withdraw(game.current_city.bank.balance)
+    assert game.score == game.player.money + sum(bank.balance for bank in banks)
+
+
+def test_game_prices() -> None:
+    """
+    Tests that any city's prices can be queried for any day, and match the
+    market once the player gets there
+    """
+    game = Game("Bob", days=5, rng=GameRNG(8))
+    future = game.prices("NYC", day=2)
+    assert game.prices("NYC", day=2) == future
+    game.move("NYC")
+    assert game.prices("NYC") == future
+    assert [drug.price for drug in game.current_day.drugs()] == future
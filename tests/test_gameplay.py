@@ -0,0 +1,53 @@
+"""
+Contains tests for the terminal frontend's menus
+"""
+from io import StringIO
+
+from dopewars.gameplay import Blocking, Gameplay
+from dopewars.render import Renderer
+from dopewars.scores import Scores
+from tests.helpers import respond
+
+
+def test_session_stack_constant(tmpdir) -> None:
+    """
+    Tests that many games and turns don't grow the stack of menus
+    """
+    file = str(tmpdir.join("scores.csv"))
+    gameplay = Gameplay(score_file=file, renderer=Renderer(StringIO()))
+    session = gameplay.session()
+    games = ["1"] * 5
+    prompts = 0
+    previous, prompt = None, next(session)
+    try:
+        while True:
+            answer = respond(prompt, previous, games)
+            previous, prompt = prompt, session.send(answer)
+            while isinstance(prompt, Blocking):
+                prompt = session.send(prompt())
+            prompts += 1
+            depth, frame = 0, session
+            while frame is not None:
+                depth += 1
+                frame = frame.gi_yieldfrom
+            assert depth <= 3  # session, menu, Gameplay._choose
+    except StopIteration:
+        pass
+    assert prompts > 5 * 50
+    assert not games
+    assert len(Scores(file).list) == 5
+
+
+def test_scripted_answers(tmpdir) -> None:
+    """
+    Tests that a script drives the menus and ends the session when it runs out
+    """
+    file = str(tmpdir.join("scores.csv"))
+    output = StringIO()
+    gameplay = Gameplay(score_file=file, renderer=Renderer(output), seed=1)
+    gameplay.run(answers=["1", "1", "Al", "4", "1", "", "3"])
+    assert "Final score: $500" in output.getvalue()
+    assert Scores(file).best("Al") == (500, "Al", 1)
+    gameplay.run(answers=["1", "5", "Bob", "4"])
+    assert gameplay.game.rng.game == 1 and not gameplay.game.over
+    assert output.getvalue().endswith("Destination: ")
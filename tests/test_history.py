@@ -0,0 +1,58 @@
+"""
+Contains tests for price history
+"""
+import math
+
+import numpy as np
+
+from dopewars.engine import Game
+from dopewars.history import PriceHistory
+from dopewars.rng import GameRNG
+
+
+def test_history_stats() -> None:
+    """
+    Tests that rolling statistics match those of every price recorded
+    """
+    rng = np.random.default_rng(1)
+    prices = rng.integers(1, 1000, size=(500, 3))
+    history = PriceHistory(2, drugs=3, capacity=8)
+    for day, row in enumerate(prices.tolist()):
+        history.record(day, 1, [0, 1, 2], row, [5, 6, 7])
+    stats = history.stats(1, 2)
+    assert stats.count == 500
+    assert math.isclose(stats.mean, prices[:, 2].mean())
+    assert math.isclose(stats.std, prices[:, 2].std(ddof=1))
+    assert (stats.low, stats.high) == (prices[:, 2].min(), prices[:, 2].max())
+    assert stats.last_surge == 2
+    assert history.stats(0, 2).count == 0
+    assert np.allclose(history.variances()[1], prices.var(axis=0, ddof=1))
+    assert np.allclose(history.averages(), prices.mean(axis=0))
+
+
+def test_history_bounded() -> None:
+    """
+    Tests that ring buffers keep only the most recent quotes, oldest first
+    """
+    history = PriceHistory(1, drugs=1, capacity=4)
+    assert history.recent(0, 0) == []
+    for day in range(1, 11):
+        history.record(day, 0, [0], [day * 10], [day])
+    recent = history.recent(0, 0)
+    assert [quote.day for quote in recent] == [7, 8, 9, 10]
+    assert recent[-1].price == 100 and recent[-1].quantity == 10
+    assert history.stats(0, 0).count == 10
+
+
+def test_game_history() -> None:
+    """
+    Tests that games record markets the player looks at
+    """
+    game = Game("Bob", rng=GameRNG(2))
+    game.move("NYC")
+    assert not game.history.counts().any()
+    prices = [drug.price for drug in game.current_day.drugs()]
+    assert [quote.price for quote in game.history.recent(1, 0)] == prices[:1]
+    lines = game.current_day.offerings(game.history.averages())
+    assert lines[0].endswith("vs avg |")
+    assert all(line.endswith(" +0%    |") for line in lines[2:])
@@ -0,0 +1,112 @@
+"""
+Contains tests for the leaderboard
+"""
+import os
+from bisect import bisect_left
+
+import numpy as np
+
+from dopewars.leaderboard import Leaderboard, RankIndex
+from dopewars.scores import CSVBackend, Scores, SQLiteBackend
+
+
+def test_rank_index() -> None:
+    """
+    Tests that ranks match those of a sorted list across bucket splits
+    """
+    rng = np.random.default_rng(1)
+    values = rng.integers(0, 500, size=3000).tolist()
+    index = RankIndex(values[:100], load=8)
+    for value in values[100:]:
+        index.add(value)
+    expected = sorted(values)
+    assert list(index) == expected and len(index) == 3000
+    for probe in range(-1, 502, 7):
+        assert index.bisect_left(probe) == bisect_left(expected, probe)
+    assert index.head(3) == expected[:3]
+
+
+def test_leaderboard() -> None:
+    """
+    Tests ranks, top scores per number of turns and best score per player
+    """
+    board = Leaderboard([(500, "al", 30), (900, "bob", 10), (700, "al", 30)])
+    board.add((700, "carl", 30))
+    assert board.rank(700) == 2 and board.rank(701) == 2 and board.rank(1) == 5
+    assert board.rank(700, turns=30) == 1 and board.rank(5, turns=60) == 1
+    assert board.count() == 4 and board.count(30) == 3 and board.count(60) == 0
+    assert board.top(2, turns=30) == [(700, "al", 30), (700, "carl", 30)]
+    assert board.best("al") == (700, "al", 30)
+    assert board.best("dave") is None
+
+
+class CountingBackend(SQLiteBackend):
+    """Count scores read by since."""
+
+    read = 0
+
+    def since(self, token):
+        token, scores, complete = super().since(token)
+        self.read += len(scores)
+        return token, scores, complete
+
+
+def test_scores_load_once(tmpdir) -> None:
+    """
+    Tests that scores are ranked from the database until loaded, and that
+    loaded files are not read again unless they changed
+    """
+    file = str(tmpdir.join("scores.db"))
+    backend = CountingBackend(file)
+    backend.add([(score * 100, "al", 30 - score % 2) for score in range(10)])
+    s = Scores(file, backend=backend)
+    assert s.rank(250) == (8, 10) and s.rank(250, turns=30) == (4, 5)
+    assert s.top(1) == [(900, "al", 29)] and not s.loaded
+    assert backend.read == 0
+    assert s.best("al") == (900, "al", 29) and s.loaded
+    assert backend.read == 10
+    s = Scores(file, backend=backend)
+    assert s.rank(250) == (8, 10) and s.rank(250, turns=30) == (4, 5)
+    assert backend.read == 10
+    backend.add([(1000, "bob", 30)])
+    s = Scores(file, backend=backend)
+    assert s.top(1) == [(1000, "bob", 30)] and backend.read == 11
+    backend.close()
+
+
+def test_sqlite_rank_huge_scores(tmpdir) -> None:
+    """
+    Tests that ranks from the database order scores beyond 64 bits exactly
+    """
+    backend = SQLiteBackend(str(tmpdir.join("scores.db")))
+    backend.add([(2 ** 63 - 1, "al", 30), (2 ** 64, "bob", 30), (10 ** 20, "carl", 30)])
+    assert backend.rank(10 ** 20) == 1 and backend.rank(2 ** 64) == 2
+    assert backend.rank(2 ** 63 - 1) == 3 and backend.rank(2 ** 63) == 3
+    assert backend.rank(5) == 4 and backend.count(30) == 3
+    backend.close()
+
+
+def test_scores_merge_outside_writes(tmpdir) -> None:
+    """
+    Tests that scores stored by other writers are merged in, and that one
+    file opened by different paths shares its leaderboard
+    """
+    file = str(tmpdir.join("scores.db"))
+    s = Scores(file)
+    other = SQLiteBackend(file)
+    other.add([(700, "bob", 30)])
+    s.add((500, "al", 30))
+    s.save()
+    assert s.rank(500) == (2, 2) and s.list[0] == (700, "bob", 30)
+    other.add([(900, "carl", 30)])
+    same = Scores(os.path.join(str(tmpdir), ".", "scores.db"))
+    assert same.board is s.board and same.top(1) == [(900, "carl", 30)]
+    other.close()
+    s._backend.close()
+    same._backend.close()
+
+    file = str(tmpdir.join("scores.csv"))
+    s = Scores(file, backend=CSVBackend(file, keep=None))
+    CSVBackend(file, keep=None).add([(300, "dave", 10)])
+    s.refresh()
+    assert s.best("dave") == (300, "dave", 10)
@@ -0,0 +1,142 @@
+"""
+Contains tests for vectorized market generation
+"""
+import numpy as np
+import pytest
+
+from dopewars import savegame
+from dopewars.drugs import CATALOG, Surge
+from dopewars.engine import Game
+from dopewars.market import MARKET, CounterMarket, PersistentMarket
+from dopewars.rng import GameRNG
+
+
+def test_market_shape() -> None:
+    """
+    Tests that a block covers every turn, city and drug
+    """
+    block = MARKET.generate(np.random.default_rng(1), turns=3, cities=7)
+    for array in block:
+        assert array.shape == (3, 7, len(MARKET.names))
+
+
+def test_market_distributions() -> None:
+    """
+    Tests that prices and quantities stay within the ranges Drug produces
+    """
+    block = MARKET.generate(np.random.default_rng(2), turns=2000, cities=7)
+    base, jitter = MARKET.base_price, MARKET.jitter
+    surge, price, quantity = block
+    assert 0.17 < (surge == Surge.HI).mean() < 0.23
+    assert 0.17 < (surge == Surge.LO).mean() < 0.23
+    assert (price >= (0.15 * base).astype(int)).all()
+
+    none = surge == Surge.NONE
+    assert (price <= base + jitter)[none].all()
+    assert (5 <= quantity[none]).all() and (quantity[none] <= 100).all()
+
+    hi = surge == Surge.HI
+    assert (price >= base * 15 // 10 - jitter)[hi].all()
+    assert (price <= base * 3 + jitter)[hi].all()
+    assert (8 <= quantity[hi]).all() and (quantity[hi] <= 33).all()
+
+    lo = surge == Surge.LO
+    assert (price <= base * 67 // 100 + jitter)[lo].all()
+    assert (15 <= quantity[lo]).all() and (quantity[lo] <= 300).all()
+
+
+def test_counter_market_random_access() -> None:
+    """
+    Tests that quotes, days and blocks agree no matter the order they're
+    computed in
+    """
+    market = CounterMarket(1234)
+    block = market.block(range(1, 21), range(7))
+    for day in (20, 1, 7):
+        for city in range(7):
+            surges, prices, quantities = market.day(day, city)
+            assert surges == block.surge[day - 1, city].tolist()
+            assert prices == block.price[day - 1, city].tolist()
+            assert quantities == block.quantity[day - 1, city].tolist()
+            assert market.quote(day, city, 3) == (surges[3], prices[3], quantities[3])
+    assert CounterMarket(1234).day(10**9, 6) == market.day(10**9, 6)
+    assert CounterMarket(4321).day(5, 0) != market.day(5, 0)
+
+
+def test_counter_market_chunks() -> None:
+    """
+    Tests that days served from cached chunks match days computed alone
+    """
+    market, chunked = CounterMarket(1234), CounterMarket(1234, cities=7)
+    for day in (1, 31, 32, 33, 200, 2, 10**9, 64, 1):
+        for city in (0, 6):
+            assert chunked.day(day, city) == market.day(day, city)
+    assert chunked.day(5, 7) == market.day(5, 7)
+
+
+def test_counter_market_distributions() -> None:
+    """
+    Tests that counter-based markets follow the same rules as MarketGenerator
+    """
+    market = CounterMarket(5)
+    surge, price, quantity = market.block(range(2000), range(7))
+    base, jitter = MARKET.base_price, MARKET.jitter
+    assert 0.17 < (surge == Surge.HI).mean() < 0.23
+    assert 0.17 < (surge == Surge.LO).mean() < 0.23
+    assert (price >= (0.15 * base).astype(int)).all()
+
+    none = surge == Surge.NONE
+    assert (price <= base + jitter)[none].all()
+    assert (price >= base - jitter)[none].any()
+    assert (5 <= quantity[none]).all() and (quantity[none] <= 100).all()
+
+    hi = surge == Surge.HI
+    assert (price <= base * 3 + jitter)[hi].all()
+    assert (8 <= quantity[hi]).all() and (quantity[hi] <= 33).all()
+
+    lo = surge == Surge.LO
+    assert (price <= base * 67 // 100 + jitter)[lo].all()
+    assert (15 <= quantity[lo]).all() and (quantity[lo] <= 300).all()
+
+
+def test_persistent_market() -> None:
+    """
+    Tests that persistent markets quote exactly like counter markets without
+    memory, and that depleted supply replenishes over the following turns
+    """
+    days = range(1, 400)
+    block = CounterMarket(7).block(days, range(8))
+    fresh = PersistentMarket(7, 8, persistence=0.0, replenish=1.0)
+    market = PersistentMarket(7, 8)
+    for day in days:
+        fresh.advance(day)
+        market.advance(day)
+        assert (fresh.surge == block.surge[day - 1]).all()
+        assert (fresh.price == block.price[day - 1]).all()
+        assert (fresh.quantity == block.quantity[day - 1]).all()
+    assert market.price.shape == market.quantity.shape == (8, len(CATALOG))
+    assert (market.price != fresh.price).any()
+    with pytest.raises(ValueError):
+        market.day(4, 0)
+    before = market.quantity[1, 0]
+    market.take(1, 0, before)
+    market.advance(400)
+    assert 0 < market.quantity[1, 0] < CounterMarket(7).day(400, 1)[2][0] + before
+
+
+def test_game_persistent_market() -> None:
+    """
+    Tests that games with a persistent market deplete it and can't be saved
+    """
+    game = Game("Bob", rng=GameRNG(3), persistent_market=True)
+    drug = game.current_day.drugs()[0]
+    quantity = drug.quantity
+    game.buy(drug.name, 1)
+    assert game.market.quantity[0, drug.id] == quantity - 1
+    assert game.prices("NYC") == game.market.day(1, 1)[1]
+    game.skip(3)
+    assert game.market.today == 4
+    with pytest.raises(ValueError):
+        savegame.dumps(game)
+    with pytest.raises(ValueError):
+        Game("Bob", record=True, persistent_market=True)
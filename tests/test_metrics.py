@@ -0,0 +1,96 @@
+"""
+Contains tests for optional game metrics
+"""
+import json
+from io import StringIO
+
+from dopewars.engine import Game
+from dopewars.gameplay import Blocking, Gameplay
+from dopewars.metrics import Metrics
+from dopewars.render import Renderer
+from dopewars.rng import GameRNG
+from tests.helpers import respond
+
+
+def play_session(tmpdir, metrics: Metrics = None) -> Gameplay:
+    """
+    Testing utility, plays two 50 day games through a Gameplay session
+    """
+    gameplay = Gameplay(
+        score_file=str(tmpdir.join("scores.csv")),
+        renderer=Renderer(StringIO()),
+        metrics=metrics,
+    )
+    session = gameplay.session()
+    games = ["1"] * 2
+    previous, prompt = None, next(session)
+    try:
+        while True:
+            answer = respond(prompt, previous, games)
+            previous, prompt = prompt, session.send(answer)
+            while isinstance(prompt, Blocking):
+                prompt = session.send(prompt())
+    except StopIteration:
+        pass
+    return gameplay
+
+
+def test_metrics_count_games(tmpdir) -> None:
+    """
+    Tests that turns, events and finished games are counted
+    """
+    metrics = Metrics()
+    play_session(tmpdir, metrics)
+    games = sum(counter.value for counter in metrics.games.values())
+    assert games == 2
+    assert metrics.turn.count == 2 * 50 - metrics.games["busted"].value
+    assert sum(counter.value for counter in metrics.events) > 0
+
+
+def test_metrics_count_trades() -> None:
+    """
+    Tests that trades and bank transactions of an instrumented game count
+    """
+    metrics = Metrics()
+    game = Game("Bob", days=5, rng=GameRNG(3))
+    metrics.instrument_game(game)
+    game.player.money = 1_000_000
+    game.current_day.get_drugs()["Luuds"].quantity = 10
+    game.buy("Luuds", 1)
+    game.sell("Luuds", 1)
+    game.current_city = game.cities["Atlanta"]
+    game.deposit(10)
+    game.withdraw(10)
+    assert metrics.trades["buy"].value == metrics.trades["sell"].value == 1
+    assert metrics.bank["deposit"].value == metrics.bank["withdraw"].value == 1
+
+
+def test_metrics_off_leaves_game_alone(tmpdir) -> None:
+    """
+    Tests that without metrics no method is wrapped
+    """
+    gameplay = play_session(tmpdir)
+    assert not {"buy", "sell", "_start_day"} & set(vars(gameplay.game))
+    assert "flush" not in vars(gameplay.renderer)
+
+
+def test_metrics_dump(tmpdir) -> None:
+    """
+    Tests dumping in the Prometheus text format and as JSON
+    """
+    metrics = Metrics()
+    metrics.trades["buy"].inc(3)
+    metrics.turn.observe(0.5)
+    prom, js = str(tmpdir.join("m.prom")), str(tmpdir.join("m.json"))
+    metrics.dump(prom)
+    metrics.dump(js)
+    with open(prom) as file:
+        text = file.read()
+    assert "# TYPE dopewars_trades_total counter" in text
+    assert 'dopewars_trades_total{side="buy"} 3' in text
+    assert 'dopewars_turn_seconds_bucket{le="1.0"} 1' in text
+    assert 'dopewars_turn_seconds_bucket{le="+Inf"} 1' in text
+    assert "dopewars_turn_seconds_count 1" in text
+    with open(js) as file:
+        data = json.load(file)["metrics"]
+    assert data["dopewars_trades_total"][0] == {"labels": {"side": "buy"}, "value": 3}
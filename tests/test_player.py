@@ -4,7 +4,7 @@ Contains tests for player class
 
 from pytest import raises
 
-from dopewars.drugs import Drug, InventoryDrug
+from dopewars.drugs import Drug
 from dopewars.player import Player
 from dopewars.weapons import Blackmail, Gun, Knife
 
@@ -24,20 +24,22 @@ def test_player_buying_drug() -> None:
     Tests player buying a drug
     """
     p = Player("Bob", 5000)
-    soma = Drug("Soma", 100, 12)
-    orig_quantity = soma.quantity
-    p.buy_drugs(soma, 5)
-    assert soma.quantity == orig_quantity - 5
-    p.inv = {"Soma": InventoryDrug("Soma", 5)}
-    p.buy_drugs(soma, 1)
-    assert soma.quantity == orig_quantity - 6
-    p.inv = {"Soma": InventoryDrug("Soma", 6)}
+    weed = Drug("Weed", 100, 15)
+    orig_quantity = weed.quantity
+    p.buy_drugs(weed, 5)
+    assert weed.quantity == orig_quantity - 5
+    assert p.inv["Weed"] == 5
+    p.buy_drugs(weed, 1)
+    assert weed.quantity == orig_quantity - 6
+    assert p.inv == {"Weed": 6}
     with raises(RuntimeError):
-        p.buy_drugs(soma, 50000)
-        assert soma.quantity == orig_quantity - 6
+        p.buy_drugs(Drug("Soma", 100, 12), 1)  # Not a known drug
+    with raises(RuntimeError):
+        p.buy_drugs(weed, 50000)
+        assert weed.quantity == orig_quantity - 6
         p._money = 0
-        p.buy_drugs(soma, 1)
-        assert soma.quantity == orig_quantity - 6
+        p.buy_drugs(weed, 1)
+        assert weed.quantity == orig_quantity - 6
 
 
 def test_player_selling_drug() -> None:
@@ -49,15 +51,16 @@ def test_player_selling_drug() -> None:
         p.sell("Soma", 5, 5)
         p.sell("Soma", -5, 5)
         p.sell("Coffee", 2, 5)
-    p.inv = {"Soma": InventoryDrug("Soma", 10)}
+    p.inv["Weed"] = 10
     with raises(RuntimeError):
-        p.sell("Soma", 11, 5)
-    p.sell("Soma", 5, 5)
+        p.sell("Weed", 11, 5)
+    p.sell("Weed", 5, 5)
     assert p.money == 5025
-    assert p.inv["Soma"].quantity == 5
-    p.sell("Soma", 5, 5)
+    assert p.inv["Weed"] == 5
+    p.sell("Weed", 5, 5)
     assert p.money == 5050
-    assert p.inv.get("Soma") is None
+    assert "Weed" not in p.inv
+    assert not p.inv
 
 
 def test_player_steal_money() -> None:
@@ -81,12 +84,12 @@ def test_player_steal_drugs() -> None:
     p = Player("Bob", 5000)
     nothing = p.steal_drugs()
     assert nothing == "Nothing to take!"
-    p.inv = {"Soma": InventoryDrug("Soma", 10)}
+    p.inv["Weed"] = 10
     p.steal_drugs()
-    assert p.inv["Soma"].quantity < 10
-    p.inv = {"Soma": InventoryDrug("Soma", 3)}
+    assert p.inv["Weed"] < 10
+    p.inv["Weed"] = 3
     msg = p.steal_drugs()
-    assert msg == f"1 of Soma were confiscated!"
+    assert msg == f"1 of Weed were confiscated!"
 
 
 def test_player_setter() -> None:
@@ -0,0 +1,47 @@
+"""
+Contains tests for the frame-buffered renderer
+"""
+from io import StringIO
+
+from dopewars.render import CLEAR_SCREEN, Renderer, move_to
+
+
+def test_frame_single_write() -> None:
+    """
+    Tests that a screen is written in one go, clearing with ANSI sequences
+    """
+    out = StringIO()
+    writes = []
+    out.write = writes.append
+    r = Renderer(out)
+    r.clear()
+    r.print("Day 1", "Miami\n$500")
+    r.flush("What do you want to do: ")
+    assert len(writes) == 1
+    assert writes[0].endswith("Day 1\nMiami\n$500\nWhat do you want to do: ")
+    assert CLEAR_SCREEN in writes[0]
+    r.echo("1")
+    r.print("Weed | $100")
+    r.flush("How many: ")
+    assert writes[1] == "Weed | $100\nHow many: "
+
+
+def test_diff_redraw() -> None:
+    """
+    Tests that only changed lines are redrawn in diff mode
+    """
+    out = StringIO()
+    r = Renderer(out, diff=True)
+    r.clear()
+    r.print("Day 1", "Miami", "$500")
+    r.flush("> ")
+    r.echo("4")
+    r.clear()
+    r.print("Day 2", "Miami", "$500")
+    start = out.tell()
+    r.flush("> ")
+    frame = out.getvalue()[start:]
+    assert CLEAR_SCREEN not in frame
+    assert f"{move_to(0)}Day 2" in frame
+    assert "Miami" not in frame
+    assert frame.endswith("$500\n> ")
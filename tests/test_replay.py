@@ -0,0 +1,91 @@
+"""
+Contains tests for action logs and replays
+"""
+from pytest import raises
+
+from dopewars import savegame
+from dopewars.actions import Action, ActionLog
+from dopewars.engine import Game
+from dopewars.replay import Replay
+from dopewars.rng import GameRNG
+from dopewars.strategies import bargain_hunter
+
+
+def state(game: Game) -> bytes:
+    """
+    Testing utility, saves `game` without its action log, which replays lack
+    """
+    log, game.log = game.log, None
+    data = savegame.dumps(game)
+    game.log = log
+    return data
+
+
+def record(game: int) -> tuple:
+    """
+    Testing utility, plays a recorded game with bargain_hunter
+    :return: the finished game, and save games taken at the start of each turn
+    """
+    g = Game("Bob", 30, 5000, GameRNG(42, game), record=True)
+    turns = []
+    while not g.over:
+        turns.append(state(g))
+        bargain_hunter(g)
+    return g, turns
+
+
+def test_action_log_roundtrip() -> None:
+    """
+    Tests that logs survive packing, and record every action
+    """
+    game, _ = record(0)
+    log = ActionLog.loads(game.log.dumps())
+    assert log == game.log
+    assert log.score == game.score
+    assert len(log.events) == game.current_day_num
+    actions = [action for action, _, _ in log]
+    assert Action.MOVE in actions and Action.BUY in actions
+    with raises(ValueError):
+        ActionLog.loads(b"DWSG" + bytes(100))
+    huge = ActionLog("Bob", 1000, 2 ** 80, 42)
+    huge.score = 3 ** 90
+    loaded = ActionLog.loads(huge.dumps())
+    assert (loaded.money, loaded.score) == (2 ** 80, 3 ** 90)
+
+
+def test_replay_reproduces_games() -> None:
+    """
+    Tests that replays end with the recorded score and events
+    """
+    for game in range(20):
+        original, _ = record(game)
+        replay = Replay(ActionLog.loads(original.log.dumps()))
+        assert replay.verify() == []
+        assert savegame.dumps(replay.run()) == state(original)
+
+
+def test_replay_seek() -> None:
+    """
+    Tests that seeking lands on the exact state of any turn, in any order
+    """
+    game, turns = record(1)
+    replay = Replay(game.log, checkpoint_every=4)
+    for turn in (17, 3, 29, 30, 1, 16, 17):
+        assert savegame.dumps(replay.seek(turn)) == turns[turn - 1]
+    with raises(ValueError):
+        replay.seek(31)
+
+
+def test_replay_detects_differences() -> None:
+    """
+    Tests that verify reports logs that no longer replay the same way
+    """
+    game, _ = record(2)
+    log = game.log
+    log.score += 1
+    log.events[5] = (log.events[5] + 1) % 3
+    problems = Replay(log).verify()
+    assert problems == [
+        "Events differ from turn 6",
+        f"Final score {game.score} differs from {log.score}",
+    ]
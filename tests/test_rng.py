@@ -0,0 +1,75 @@
+"""
+Contains tests for per-game random streams
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from dopewars.engine import Game
+from dopewars.rng import GameRNG
+
+
+def play(seed: int, game: int) -> list:
+    """
+    Testing utility, plays a game moving to the first destination every
+    turn, buying one of the cheapest drug whenever it can
+    :return: prices, events and money seen every turn
+    """
+    g = Game("Bob", rng=GameRNG(seed, game))
+    seen = []
+    while not g.over:
+        drugs = g.current_day.get_drugs()
+        cheapest = min(drugs.values(), key=lambda drug: drug.price)
+        try:
+            g.buy(cheapest.name, 1)
+        except RuntimeError:
+            pass
+        seen.append(([d.price for d in drugs.values()], g.current_day.event_text))
+        seen.append(g.player.money)
+        g.move(g.destinations()[0].name)
+    return seen
+
+
+def test_same_seed_same_game() -> None:
+    """
+    Tests that a seed and game index fully determine a game
+    """
+    assert play(1234, 0) == play(1234, 0)
+    assert play(1234, 0) != play(1234, 1)
+    assert play(1234, 0) != play(4321, 0)
+
+
+def test_streams_independent() -> None:
+    """
+    Tests that subsystems and games get distinct streams
+    """
+    a, b = GameRNG(5, 0), GameRNG(5, 1)
+    assert a.events.random() != a.theft.random()
+    assert a.market.integers(1 << 62) != b.market.integers(1 << 62)
+    assert GameRNG().seed != GameRNG().seed
+
+
+def test_threads_reproducible() -> None:
+    """
+    Tests that games played side by side match games played in sequence
+    """
+    sequential = [play(99, game) for game in range(8)]
+    with ThreadPoolExecutor(4) as pool:
+        threaded = list(pool.map(play, [99] * 8, range(8)))
+    assert sequential == threaded
+
+
+def test_counter_streams_seek() -> None:
+    """
+    Tests that event and theft streams can jump straight to any turn
+    """
+    a, b = GameRNG(5), GameRNG(5)
+    for turn in range(1, 20):
+        a.start_turn(turn)
+        a.events.randint(1, 50)
+        a.theft.choice("abc")
+    a.start_turn(20)
+    b.start_turn(20)
+    assert [a.events.random() for _ in range(5)] == [
+        b.events.random() for _ in range(5)
+    ]
+    assert a.theft.getrandbits(100) == b.theft.getrandbits(100)
+    assert 0 <= a.events.getrandbits(100) < 2 ** 100
@@ -0,0 +1,96 @@
+"""
+Contains tests for binary save games
+"""
+from pytest import raises
+
+from dopewars import savegame
+from dopewars.engine import Game
+from dopewars.rng import GameRNG
+from dopewars.strategies import bargain_hunter
+
+
+def test_savegame_roundtrip() -> None:
+    """
+    Tests that a loaded game matches the saved one, down to today's market
+    """
+    game = Game("Bob", rng=GameRNG(7, 3))
+    game.player.money = 2_000_000
+    game.move("Atlanta")
+    game.deposit(1000)
+    game.move("LA")
+    game.buy_weapon("Glock")
+    game.buy("Weed", 1)
+    data = savegame.dumps(game)
+    assert len(data) < 300
+    loaded = savegame.loads(data)
+    assert savegame.dumps(loaded) == data
+    assert loaded.score == game.score
+    assert loaded.player.weapon == game.player.weapon
+    assert loaded.player.inv == game.player.inv
+    assert loaded.cities["Atlanta"].bank.balance == 1010  # Interest for one day
+    assert loaded.current_city.name == "LA"
+    today = [(drug.price, drug.quantity) for drug in game.current_day.drugs()]
+    assert [(drug.price, drug.quantity) for drug in loaded.current_day.drugs()] == today
+
+
+def test_savegame_resume_deterministic() -> None:
+    """
+    Tests that a game resumed from any turn plays out like the original
+    """
+    for turn in (1, 10, 29):
+        original = Game("Bob", rng=GameRNG(11))
+        while original.current_day_num < turn and not original.over:
+            bargain_hunter(original)
+        resumed = savegame.loads(savegame.dumps(original))
+        resumed.rng.strategy.setstate(original.rng.strategy.getstate())
+        for game in (original, resumed):
+            while not game.over:
+                bargain_hunter(game)
+        assert savegame.dumps(resumed) == savegame.dumps(original)
+
+
+def test_savegame_recorded() -> None:
+    """
+    Tests that loading rolls no event of its own and keeps the action log
+    """
+    game = Game("Bob", rng=GameRNG(4), record=True)  # Robbed on day one
+    game.buy("Weed", 1)
+    loaded = savegame.loads(savegame.dumps(game))
+    assert loaded.player.money == game.player.money
+    assert loaded.current_day.event_text == game.current_day.event_text
+    assert loaded.log == game.log and len(loaded.log.events) == 1
+    loaded.rng.strategy.setstate(game.rng.strategy.getstate())
+    for resumed in (game, loaded):
+        while not resumed.over:
+            bargain_hunter(resumed)
+    assert loaded.log == game.log and loaded.log.score == game.score
+    assert savegame.loads(savegame.dumps(Game("Bob"))).log is None
+
+
+def test_savegame_file(tmpdir) -> None:
+    """
+    Tests saving to and loading from files, and rejecting other files
+    """
+    file = str(tmpdir.join("data", "savegame.dat"))
+    game = Game("Bob", days=5)
+    savegame.save(game, file)
+    assert savegame.load(file).player.name == "Bob"
+    with raises(ValueError):
+        savegame.loads(b"PK\x03\x04" + bytes(100))
+    with raises(ValueError):
+        savegame.loads(savegame.MAGIC + bytes([99]) + bytes(100))
+
+
+def test_savegame_huge_balances() -> None:
+    """
+    Tests that money and balances beyond 64 bits are saved exactly
+    """
+    game = Game("Bob", days=1000, rng=GameRNG(7))
+    game.player.money = 2_000_000
+    game.move("NYC")
+    game.deposit(1_000_000)
+    game.skip(700)
+    assert game.cities["NYC"].bank.balance > 2 ** 63
+    loaded = savegame.loads(savegame.dumps(game))
+    assert loaded.player.money == game.player.money
+    assert loaded.cities["NYC"].bank.balance == game.cities["NYC"].bank.balance
@@ -1,8 +1,10 @@
 """
 Contains tests for scores class
 """
+import sqlite3
+from multiprocessing import Process
 
-from dopewars.scores import Scores
+from dopewars.scores import CSVBackend, Scores, SQLiteBackend
 
 
 def test_add_score() -> None:
@@ -47,3 +49,89 @@ def test_add_score() -> None:
         (100, "al"),
         (99, "bob"),
     ]
+
+
+def test_csv_backend(tmpdir) -> None:
+    """
+    Tests that the CSV backend keeps the top five scores on disk
+    """
+    file = str(tmpdir.join("scores.csv"))
+    s = Scores(file)
+    assert s.list == []
+    for score in range(10):
+        s.add((score, "al", 30))
+    s.save()
+    assert Scores(file).list == [
+        (9, "al", 30),
+        (8, "al", 30),
+        (7, "al", 30),
+        (6, "al", 30),
+        (5, "al", 30),
+    ]
+
+
+def test_sqlite_backend(tmpdir) -> None:
+    """
+    Tests that the SQLite backend keeps every score and migrates a CSV file
+    """
+    legacy = str(tmpdir.join("scores.csv"))
+    with open(legacy, "w") as file:
+        file.write("500 al 30\n900 bob 10\n")
+    file = str(tmpdir.join("scores.db"))
+    s = Scores(file)
+    assert s.list == [(900, "bob", 10), (500, "al", 30)]
+    for score in range(10):
+        s.add((score, "charlie", 30))
+    s.save()
+    s = Scores(file)  # Reopening must not migrate the CSV file again
+    assert len(s.list) == 5
+    assert s._backend.count() == 12
+    assert s._backend.top(2, turns=30) == [(500, "al", 30), (9, "charlie", 30)]
+    s._backend.close()
+
+
+def save_score(file: str, score: int) -> None:
+    """
+    Testing utility, saves one score like a finishing game does
+    """
+    s = Scores(file, backend=CSVBackend(file, keep=None))
+    s.add((score, "bot", 30))
+    s.save()
+
+
+def test_csv_concurrent_writers(tmpdir) -> None:
+    """
+    Tests that scores saved by concurrent processes are all kept
+    """
+    file = str(tmpdir.join("scores.csv"))
+    processes = [Process(target=save_score, args=(file, n)) for n in range(16)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    scores = CSVBackend(file, keep=None).top(100)
+    assert sorted(score for score, _, _ in scores) == list(range(16))
+    assert tmpdir.listdir(lambda path: path.basename.startswith(".scores-")) == []
+
+
+def test_sqlite_huge_scores(tmpdir) -> None:
+    """
+    Tests that scores beyond 64 bits are stored exactly and ranked in order,
+    also in databases created before they could be
+    """
+    file = str(tmpdir.join("scores.db"))
+    db = sqlite3.connect(file)
+    db.execute(
+        "CREATE TABLE scores (id INTEGER PRIMARY KEY, score INTEGER NOT NULL, "
+        "name TEXT NOT NULL, turns INTEGER NOT NULL)"
+    )
+    db.execute("INSERT INTO scores (score, name, turns) VALUES (500, 'al', 30)")
+    db.commit()
+    db.close()
+    huge = [(10 ** 30, "bob", 900), (2 ** 63, "carl", 900), (10 ** 25, "dave", 900)]
+    backend = SQLiteBackend(file)
+    backend.add(huge)
+    assert backend.top(3) == [huge[0], huge[2], huge[1]]
+    assert backend.top(5, turns=30) == [(500, "al", 30)]
+    assert sorted(backend.all()) == sorted(huge + [(500, "al", 30)])
+    backend.close()
@@ -0,0 +1,149 @@
+"""
+Contains tests for the asyncio game server
+"""
+import asyncio
+import os
+import threading
+
+from pytest import raises
+
+from dopewars.gameplay import Gameplay
+from dopewars.scores import Scores
+from dopewars.server import GameServer
+from tests.helpers import respond
+
+
+class Connection:
+    """
+    Testing utility, stands in for both ends of a connection, answering
+    every prompt the server writes with tests.helpers.respond
+    """
+
+    def __init__(self, games: list) -> None:
+        self.games = games
+        self.sent = []
+        self.previous = None
+
+    def write(self, data: bytes) -> None:
+        self.sent.append(data.decode())
+
+    async def drain(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    async def readline(self) -> bytes:
+        prompt = self.sent[-1].rsplit("\r\n", 1)[-1]
+        answer = respond(prompt, self.previous, self.games)
+        self.previous = prompt
+        return f"{answer}\r\n".encode()
+
+
+async def converse(port: int, answers: list) -> str:
+    """
+    Testing utility, sends `answers` after the server's first prompt,
+    returns everything the server sent until it hung up
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    received = await reader.read(65536)
+    writer.write("".join(f"{answer}\n" for answer in answers).encode())
+    received += await reader.read()
+    writer.close()
+    return received.decode()
+
+
+def test_server_session_plays_games(tmpdir) -> None:
+    """
+    Tests that a session plays games through the menus and saves scores
+    """
+    file = str(tmpdir.join("scores.db"))
+    game_server = GameServer(file)
+    connection = Connection(["1", "1"])
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(game_server.handle(connection, connection))
+    loop.close()
+    assert connection.sent[-1] == "Goodbye!\r\n"
+    assert not connection.games
+    assert len(Scores(file).list) == 2
+    assert game_server.stats.active == 0
+    assert game_server.stats.lines > 2 * 50
+
+
+def test_server_saves_off_event_loop(tmpdir) -> None:
+    """
+    Tests that scores and action logs are written by the worker thread
+    """
+    game_server = GameServer(str(tmpdir.join("scores.db")), log_dir=str(tmpdir))
+    threads = []
+    add = game_server.scores._backend.add
+
+    def recording_add(scores: list) -> None:
+        threads.append(threading.get_ident())
+        add(scores)
+
+    game_server.scores._backend.add = recording_add
+    connection = Connection(["1"])
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(game_server.handle(connection, connection))
+    loop.close()
+    game_server.io.shutdown()
+    assert threads and threading.get_ident() not in threads
+    assert any(file.endswith(".dwlog") for file in os.listdir(str(tmpdir)))
+
+
+def test_server_concurrent_sessions(tmpdir) -> None:
+    """
+    Tests that many connections are served at once and share scores
+    """
+    game_server = GameServer(str(tmpdir.join("scores.db")))
+    game_server.scores.add((1234, "Alice", 30))
+    game_server.scores.save()
+
+    async def main() -> list:
+        server = await game_server.start("127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        sessions = [converse(port, ["2", "", "3"]) for _ in range(20)]
+        transcripts = await asyncio.gather(*sessions)
+        server.close()
+        return transcripts
+
+    loop = asyncio.new_event_loop()
+    transcripts = loop.run_until_complete(main())
+    loop.close()
+    for transcript in transcripts:
+        assert "Alice: $1,234" in transcript
+        assert transcript.endswith("Goodbye!\r\n")
+    assert game_server.stats.peak > 1
+    assert game_server.stats.served == 20
+    assert game_server.stats.active == 0
+
+
+class LongLine(Connection):
+    """
+    Testing utility, a connection whose player sends an overlong line
+    """
+
+    async def readline(self) -> bytes:
+        raise ValueError("Separator is not found, and chunk exceed the limit")
+
+
+def test_server_errors(tmpdir, monkeypatch) -> None:
+    """
+    Tests that overlong lines end a session quietly, but that errors of the
+    menus are not mistaken for them
+    """
+    game_server = GameServer(str(tmpdir.join("scores.db")))
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(game_server.handle(LongLine([]), LongLine([])))
+
+    def broken(self):
+        raise ValueError("Bug")
+        yield
+
+    monkeypatch.setattr(Gameplay, "new_game_menu", broken)
+    connection = Connection(["1"])
+    with raises(ValueError):
+        loop.run_until_complete(game_server.handle(connection, connection))
+    loop.close()
+    assert game_server.stats.active == 0
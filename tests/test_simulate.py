@@ -0,0 +1,59 @@
+"""
+Contains tests for the simulation runner
+"""
+from pytest import raises
+
+from dopewars.engine import STARTING_MONEY
+from dopewars.simulate import load_strategy, play_game, simulate
+from dopewars.strategies import STRATEGIES, random_trader
+
+
+def idle(game) -> None:
+    """
+    Testing utility, a strategy that never ends its turn
+    """
+
+
+def test_load_strategy() -> None:
+    """
+    Tests looking up strategies by name and import path
+    """
+    assert load_strategy("random") is random_trader
+    assert load_strategy("dopewars.strategies:random_trader") is random_trader
+    assert load_strategy(idle) is idle
+    with raises(ValueError):
+        load_strategy("nonexistent")
+
+
+def test_strategies_finish() -> None:
+    """
+    Tests that every built-in strategy plays a game to the end
+    """
+    for strategy in STRATEGIES.values():
+        game = play_game(strategy, seed=3, game=0)
+        assert game.over
+        assert game.score >= 0
+    with raises(RuntimeError):
+        play_game(idle, seed=3, game=0)
+
+
+def test_simulate_reproducible() -> None:
+    """
+    Tests that results don't depend on the number of workers or chunking
+    """
+    single = simulate(40, "bargain", seed=11, workers=1)
+    pooled = simulate(40, "bargain", seed=11, workers=2, chunk=7)
+    assert (single.scores == pooled.scores).all()
+    assert (single.busted == pooled.busted).all()
+    assert single.games == 40
+    assert 0 <= single.bust_rate <= 1
+    assert single.quantiles() == sorted(single.quantiles())
+    assert "Bust rate" in str(single)
+    assert 0 < single.interval < single.scores.max()
+    wander = simulate(10, "wander", seed=11, days=1, workers=1)
+    assert (wander.scores <= STARTING_MONEY).all()  # Never trades, may be robbed
+    with raises(ValueError):
+        simulate(0, "wander")
+    rich = simulate(3, "wander", seed=11, days=1, money=2 ** 70, workers=1)
+    assert rich.scores.max() <= 2 ** 70 and rich.mean > 2 ** 69
+    assert "$1,180,591,620,717,41" in str(rich)
@@ -0,0 +1,43 @@
+"""
+Contains tests for the optimal-play solver
+"""
+import random
+
+import numpy as np
+
+from dopewars.drugs import CATALOG, Drug
+from dopewars.simulate import play_game
+from dopewars.solver import Solver, perfect_player, price_distribution
+
+
+def test_price_distribution() -> None:
+    """
+    Tests that enumerated prices match the ones markets actually draw
+    """
+    spec = CATALOG[0]
+    prices, probs = price_distribution(spec)
+    assert np.isclose(probs.sum(), 1)
+    assert (np.diff(prices) > 0).all()
+    drawn = [Drug.from_spec(spec, random.Random(n)).price for n in range(3000)]
+    assert set(drawn) <= set(prices)
+    assert abs(np.mean(drawn) - prices @ probs) < 0.05 * spec.base_price
+
+
+def test_solve() -> None:
+    """
+    Tests that longer games are worth more, and a one day game only its money
+    """
+    solver = Solver(scenarios=8, steps=3)
+    assert np.isclose(solver.expected_score(1, 1000), 1000 * solver.growth[0])
+    scores = [solver.expected_score(days) for days in (1, 3, 6)]
+    assert scores == sorted(scores)
+    assert len(solver.values) == 7
+
+
+def test_perfect_player() -> None:
+    """
+    Tests that the solved policy plays valid games, beating its starting money
+    """
+    games = [play_game(perfect_player, seed=5, game=n, days=10) for n in range(10)]
+    assert all(game.over for game in games)
+    assert np.mean([game.score for game in games]) > 500
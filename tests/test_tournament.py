@@ -0,0 +1,32 @@
+"""
+Contains tests for the tournament runner
+"""
+import numpy as np
+from pytest import raises
+
+from dopewars.simulate import simulate
+from dopewars.strategies import wander
+from dopewars.tournament import tournament
+
+
+def test_tournament_same_games() -> None:
+    """
+    Tests that every strategy plays the same games a simulation would
+    """
+    report = tournament(["bargain", wander], 12, seed=4, workers=2, chunk=5)
+    assert report.names == ("bargain", "wander")
+    assert report.scores.shape == report.busted.shape == (2, 12)
+    single = simulate(12, "bargain", seed=4, workers=1)
+    assert (report.scores[0] == single.scores).all()
+    assert report.ranking()[0] == int(np.argmax(report.means))
+    rates = report.win_rates()
+    assert np.allclose(rates + rates.T, 1) and np.allclose(np.diag(rates), 0.5)
+    mean, half = report.difference(0, 1)
+    assert mean == report.means[0] - report.means[1] and half >= 0
+    assert "Win rates" in str(report)
+    with raises(ValueError):
+        tournament(["wander", wander], 1)
+    with raises(ValueError):
+        tournament(["wander"], 0)
+    rich = tournament(["wander", "random"], 3, seed=4, days=1, money=2 ** 70)
+    assert rich.means.min() > 2 ** 69 and "Win rates" in str(rich)
@@ -1,7 +1,7 @@
 """
 Gameplay tests
 """
-from dopewars.utilities import fmt_money
+from dopewars.utilities import fmt_money, pack_int, unpack_int
 
 
 def test_format_money() -> None:
@@ -15,3 +15,17 @@ def test_format_money() -> None:
     assert fmt_money(100000) == "$100,000"
     assert fmt_money(1000000) == "$1,000,000"
     assert "$10,000,000" == fmt_money(10000000)
+    assert fmt_money(10 ** 120) == "$1" + ",000" * 40
+
+
+def test_pack_int() -> None:
+    """
+    Tests that integers of any size and sign survive packing, back to back
+    """
+    values = [0, 1, -1, 255, -(2 ** 63), 2 ** 63, 3 ** 500]
+    data = b"".join(map(pack_int, values))
+    offset = 0
+    for value in values:
+        unpacked, offset = unpack_int(data, offset)
+        assert unpacked == value
+    assert offset == len(data)
@@ -48,6 +48,34 @@ def test_calc_interest() -> None:
     assert b.balance == 105
 
 
+def test_calc_interest_days() -> None:
+    """
+    Checks compounding several days at once, truncating each day, at any size
+    """
+    b = Bank("", 0.05)
+    b.deposit(1000)
+    b.calc_interest(3)
+    assert b.balance == 1157  # 1050, 1102, 1157
+    b.restore(10 ** 400, True)
+    b.calc_interest()
+    assert b.balance == 105 * 10 ** 398
+
+
+def test_lazy_interest() -> None:
+    """
+    Checks that a bank with a clock accrues a day per tick once read
+    """
+    day = [0]
+    b = TexasMidland()
+    b.set_clock(lambda: day[0])
+    b.deposit(1000)
+    day[0] = 2
+    assert b.balance == 1020  # 1010, 1020
+    b.withdraw(20)
+    day[0] = 3
+    assert b.balance == 1010
+
+
 def test_texas_midland_goldman() -> None:
     """
     Test Texas Midland's & Goldman Sacks